@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Seeds Aura - Criador de Malhas Exóticas - Benchmarks
+--------------------------------------
+Mede as versões em arrays das malhas contra as referências ponto a ponto
+(Poisson-Disk, geometria da colmeia e arcos da topologia) e o tempo de
+desenho da colmeia.
+
+A referência do Poisson-Disk é quadrática no número de pontos (remoção
+em lista), então acima de --ref-max pontos ela não é medida.
+
+Execução:
+  python Malhas_benchmark.py
+  python Malhas_benchmark.py --points 10000 1000000
+  python Malhas_benchmark.py --only honeycomb --cells 64 200
+  python Malhas_benchmark.py --only topology --cells 16 128
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import Malhas_exoticas as me
+
+
+def timeit(fn, *args, repeat=1, **kwargs):
+    """Melhor tempo (s) de `repeat` execuções e o último resultado"""
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def report(name, size, t_ref, t_fast):
+    ref = "         -" if t_ref is None else f"{t_ref:9.2f}s"
+    speedup = "" if t_ref is None else f"   speedup {t_ref / t_fast:8.1f}x"
+    print(f"{name:<28} {size:>9}  ref {ref}   rápido {t_fast:8.3f}s{speedup}")
+
+
+# ------------------------
+# POISSON-DISK
+# ------------------------
+
+# pontos por unidade de área com r = 1 (medido; Bridson preenche ~0.62/r²)
+POISSON_DENSITY = 0.62
+
+
+def check_poisson(pts, r):
+    """Nenhum par a menos de r (precisa do SciPy; sem ele não confere)"""
+    if not me.SCIPY_OK:
+        return
+    from scipy.spatial import cKDTree
+    if cKDTree(pts).query_pairs(r * (1 - 1e-9)):
+        raise AssertionError("poisson-disk: pontos a menos de r")
+
+
+def bench_poisson(points, ref_max=20_000, r=1.0, seed=0):
+    """Área escolhida para ~points pontos com raio r"""
+    side = np.sqrt(points / POISSON_DENSITY) * r
+    t_fast, pts = timeit(me.poisson_disk_sampling, side, side, r, rng=seed)
+    check_poisson(pts, r)
+    t_ref = None
+    if points <= ref_max:
+        np.random.seed(seed)
+        t_ref, ref = timeit(me.poisson_disk_sampling_loop, side, side, r)
+        if abs(len(ref) - len(pts)) > 0.05 * len(ref):
+            raise AssertionError("poisson-disk: densidade diverge da referência")
+    report("Poisson-Disk (Bridson)", len(pts), t_ref, t_fast)
+
+
+# ------------------------
+# COLMEIA
+# ------------------------
+
+HONEYCOMB_SIZES = (64, 200)
+
+
+def bench_honeycomb(sizes=HONEYCOMB_SIZES, ref_max=64, R=18.0, bulge=0.22):
+    """Geometria célula a célula vs broadcast (referência até ref_max x ref_max); desenho a 120 DPI.
+
+    A conferência usa os 28 pontos por aresta da referência; a linha
+    "adaptativo" mede o padrão (pontos pela tolerância).
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    for n in sizes:
+        t_fast, fixed = timeit(me.honeycomb_geometry, n, n, R, bulge, 28, repeat=3)
+        t_ref = None
+        if n <= ref_max:
+            t_ref, ref = timeit(me.honeycomb_geometry_loop, n, n, R, bulge, 28)
+            if not np.allclose(fixed.points, ref.points, rtol=0, atol=1e-9):
+                raise AssertionError("colmeia vetorizada diverge da referência")
+        report(f"Colmeia {n}x{n} (28 pts)", len(fixed), t_ref, t_fast)
+        t_fast, geom = timeit(me.honeycomb_geometry, n, n, R, bulge, repeat=3)
+        report(f"Colmeia {n}x{n} (adaptativo)", len(geom), t_ref, t_fast)
+        print(f"{'':<28} {'':>9}  {len(geom.points) // len(geom)} pts/aresta, "
+              f"{geom.nbytes / 1e6:.1f} MB (28 pts: {fixed.nbytes / 1e6:.1f} MB)")
+        fig = Figure(figsize=(6, 6), dpi=120)
+        FigureCanvasAgg(fig)
+        t0 = time.perf_counter()
+        me.draw_pattern(fig.add_subplot(111), geom, 0.7)
+        fig.canvas.draw()
+        print(f"{'':<28} {'':>9}  desenho {time.perf_counter() - t0:8.3f}s")
+
+
+# ------------------------
+# TOPOLOGIA (ARCOS EM LOTE)
+# ------------------------
+
+def bench_topology(sizes=(16, 128), sx=1.2, sy=1.0, sag_frac=0.42):
+    """arc_through um a um (60 pts) vs arcs_through em lote, com 60 pts e adaptativo"""
+    for n in sizes:
+        t_ref, (_, ref) = timeit(me.generate_topology_loop, n, n, sx, sy, sag_frac)
+        t_fast, (_, arcs) = timeit(me.generate_topology, n, n, sx, sy, sag_frac, 60, repeat=3)
+        if not np.allclose(arcs, ref, rtol=0, atol=1e-9):
+            raise AssertionError("arcos em lote divergem da referência")
+        report(f"Topologia {n}x{n} (60 pts)", len(arcs), t_ref, t_fast)
+        t_fast, (_, arcs) = timeit(me.generate_topology, n, n, sx, sy, sag_frac, repeat=3)
+        report(f"Topologia {n}x{n} ({arcs.shape[1]} pts)", len(arcs), t_ref, t_fast)
+
+
+BENCHMARKS = {
+    "poisson": lambda args: [bench_poisson(n, ref_max=args.ref_max) for n in args.points],
+    "honeycomb": lambda args: bench_honeycomb(args.cells),
+    "topology": lambda args: bench_topology(args.cells),
+}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks do Criador de Malhas Exóticas")
+    ap.add_argument("--points", type=int, nargs="+", default=[10_000, 1_000_000],
+                    help="tamanhos do Poisson-Disk (pontos)")
+    ap.add_argument("--cells", type=int, nargs="+", default=list(HONEYCOMB_SIZES),
+                    help="lados da colmeia e da topologia (células)")
+    ap.add_argument("--only", choices=sorted(BENCHMARKS), nargs="+")
+    ap.add_argument("--ref-max", type=int, default=20_000,
+                    help="maior tamanho em que a referência ponto a ponto é medida")
+    args = ap.parse_args()
+
+    for name in args.only or BENCHMARKS:
+        BENCHMARKS[name](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -34,13 +34,17 @@ import os
 import math
 import json
 import random
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional, Tuple
 
 import numpy as np
 import matplotlib
 matplotlib.use("Agg")  # backend não-interativo para preparar a Figure antes de embed
 from matplotlib.figure import Figure
+from matplotlib.collections import PathCollection
+from matplotlib.colors import Normalize
+from matplotlib.path import Path
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 from PyQt5.QtCore import Qt
@@ -72,11 +76,322 @@ def seed_everything(seed: int):
     np.random.seed(seed)
 
 
+# ------------------- Geometria (polilinhas empacotadas) -------------------
+
+@dataclass
+class PolylineGeometry:
+    """
+    Polilinhas empacotadas: todos os vértices em `points` (N, 2) e a linha i
+    em points[offsets[i]:offsets[i+1]]. `values` (opcional) é um escalar por
+    linha para colorir por colormap (contornos); `bounds` fixa os limites
+    (xmin, xmax, ymin, ymax) do eixo, senão ele se ajusta aos dados.
+    """
+    points: np.ndarray
+    offsets: np.ndarray
+    values: Optional[np.ndarray] = None
+    bounds: Optional[Tuple[float, float, float, float]] = None
+
+    @classmethod
+    def from_array(cls, segs, **kw):
+        """Array (n, npts, 2) de linhas do mesmo tamanho."""
+        segs = np.asarray(segs, dtype=float)
+        n, npts = segs.shape[:2]
+        return cls(segs.reshape(-1, 2), np.arange(n + 1) * npts, **kw)
+
+    @classmethod
+    def stack(cls, blocks, **kw):
+        """Blocos (n_i, npts_i, 2), cada um com linhas do mesmo tamanho, na ordem dada."""
+        blocks = [np.asarray(b, dtype=float) for b in blocks]
+        lengths = np.concatenate([np.full(len(b), b.shape[1], dtype=np.int64) for b in blocks])
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(np.concatenate([b.reshape(-1, 2) for b in blocks]), offsets, **kw)
+
+    @classmethod
+    def from_lines(cls, lines, **kw):
+        """Lista de arrays (n_i, 2) de tamanhos quaisquer."""
+        offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+        np.cumsum([len(l) for l in lines], out=offsets[1:])
+        points = np.concatenate(lines).astype(float) if lines else np.empty((0, 2))
+        return cls(points, offsets, **kw)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self):
+        return self.points.nbytes + self.offsets.nbytes + (0 if self.values is None else self.values.nbytes)
+
+    def lines(self):
+        """(n, npts, 2) se todas as linhas têm o mesmo tamanho, senão lista de views."""
+        lengths = np.diff(self.offsets)
+        if len(lengths) and (lengths == lengths[0]).all():
+            return self.points.reshape(len(lengths), lengths[0], 2)
+        return np.split(self.points, self.offsets[1:-1])
+
+    def compound_path(self, idx):
+        """Uma única Path com as linhas idx (MOVETO no início de cada uma)."""
+        lengths = np.diff(self.offsets)[idx]
+        firsts = np.zeros(len(idx), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=firsts[1:])
+        pos = np.arange(lengths.sum()) + np.repeat(self.offsets[idx] - firsts, lengths)
+        codes = np.full(len(pos), Path.LINETO, dtype=Path.code_type)
+        codes[firsts] = Path.MOVETO
+        return Path(self.points[pos], codes)
+
+
+def render_geometry(ax, geom, lw, color=None, cmap=None):
+    """
+    Desenha a geometria e ajusta os limites. As linhas são agrupadas por cor
+    e cada grupo vira uma única Path composta, então o custo não depende do
+    número de linhas. Sem `color`, linhas com `values` usam o colormap (como
+    ax.contour) e as demais seguem o ciclo de cores do eixo, como se cada
+    uma fosse um ax.plot.
+    """
+    n = len(geom)
+    if color is not None:
+        groups, colors = np.zeros(n, dtype=np.int64), [color]
+    elif geom.values is not None:
+        levels, groups = np.unique(geom.values, return_inverse=True)
+        norm = Normalize(geom.values.min(), geom.values.max())
+        colors = matplotlib.colormaps[cmap or matplotlib.rcParams["image.cmap"]](norm(levels))
+    else:
+        colors = [c["color"] for c in matplotlib.rcParams["axes.prop_cycle"]]
+        groups = np.arange(n) % len(colors)
+    order = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[order], np.arange(len(colors) + 1))
+    used = [g for g in range(len(colors)) if bounds[g + 1] > bounds[g]]
+    paths = [geom.compound_path(order[bounds[g]:bounds[g + 1]]) for g in used]
+    pc = PathCollection(paths, facecolors="none", edgecolors=[colors[g] for g in used],
+                        linewidths=lw, capstyle="projecting", joinstyle="round")
+    ax.add_collection(pc)
+    if geom.bounds is not None:
+        ax.set_xlim(*geom.bounds[:2]); ax.set_ylim(*geom.bounds[2:])
+    elif n:
+        ax.autoscale_view()
+    return pc
+
+
+# ---------------------------- Arcos em lote ----------------------------
+
+# Tolerância dos arcos como fração da extensão do desenho: ~0.25 px numa
+# exportação de 2400 px (8 pol a 300 DPI); o preview fica abaixo disso.
+ARC_TOLERANCE = 1e-4
+ARC_MAX_POINTS = 64
+
+
+def arc_point_count(radius, span, tol, max_pts=ARC_MAX_POINTS):
+    """
+    Menor número de pontos com que todos os arcos (raio, ângulo) ficam a
+    menos de tol da curva: cada corda de ângulo d se afasta r(1 - cos(d/2)).
+    """
+    radius = np.asarray(radius, dtype=float)
+    if radius.size == 0:
+        return 2
+    step = 2*np.arccos(np.clip(1 - tol/np.maximum(radius, 1e-12), -1.0, 1.0))
+    n = np.ceil(np.abs(span) / np.maximum(step, 1e-12)).max() + 1
+    return int(np.clip(n, 2, max_pts))
+
+
+def _extent_tolerance(*points):
+    """ARC_TOLERANCE vezes o maior lado da caixa que contém os pontos."""
+    pts = np.concatenate([np.asarray(p, dtype=float).reshape(-1, 2) for p in points])
+    return ARC_TOLERANCE * max(np.ptp(pts, axis=0).max(), 1e-12) if len(pts) else 1.0
+
+
+def _arcs(p0, p1, nrm, s, npts, tol):
+    """
+    Núcleo comum: arcos de p0 a p1 com flecha s para o lado da normal unitária
+    nrm (todos (n, 2) / (n,)). Mesmas contas de arc_between/arc_through.
+    """
+    v = p1 - p0
+    L = np.hypot(v[:, 0], v[:, 1])
+    mid = 0.5*(p0 + p1)
+    flat = s <= 1e-9
+    r = np.where(flat, 1e9, L**2/(8*np.where(flat, 1.0, s)) + s/2)
+    center = mid + nrm*(r - s)[:, None]
+    a0 = np.arctan2(p0[:, 1]-center[:, 1], p0[:, 0]-center[:, 0])
+    a1 = np.arctan2(p1[:, 1]-center[:, 1], p1[:, 0]-center[:, 0])
+    da = a1 - a0
+    a1 = np.where(da > np.pi, a1 - 2*np.pi, np.where(da < -np.pi, a1 + 2*np.pi, a1))
+
+    if npts is None:
+        if tol is None:
+            tol = _extent_tolerance(p0, p1)
+        npts = arc_point_count(r, a1 - a0, tol)
+    ang = np.linspace(a0, a1, npts, axis=1)
+    arcs = np.stack([center[:, 0, None] + np.cos(ang)*r[:, None],
+                     center[:, 1, None] + np.sin(ang)*r[:, None]], axis=-1)
+    # pontas coincidentes: segmento degenerado, como nas versões escalares
+    short = L < 1e-9
+    if short.any():
+        arcs[short] = np.linspace(p0[short], p1[short], npts, axis=1)
+    return arcs
+
+
+def arcs_between(p0, p1, bulge=0.25, outward=None, npts=None, tol=None):
+    """
+    Versão em lote de arc_between: p0, p1 (n, 2) e outward (n, 2) opcional
+    (a normal de cada arco é virada para o lado de outward). Devolve
+    (n, npts, 2). Com npts=None o número de pontos se adapta à tolerância
+    tol (padrão: ARC_TOLERANCE da extensão dos pontos).
+    """
+    p0 = np.asarray(p0, dtype=float).reshape(-1, 2)
+    p1 = np.asarray(p1, dtype=float).reshape(-1, 2)
+    v = p1 - p0
+    L = np.hypot(v[:, 0], v[:, 1])
+    nrm = np.stack([-v[:, 1], v[:, 0]], axis=1)
+    nrm /= (np.hypot(nrm[:, 0], nrm[:, 1]) + 1e-12)[:, None]
+    if outward is not None:
+        outward = np.broadcast_to(np.asarray(outward, dtype=float), nrm.shape)
+        flip = (nrm*outward).sum(axis=1) < 0
+        nrm[flip] *= -1
+    return _arcs(p0, p1, nrm, bulge*L, npts, tol)
+
+
+def arcs_through(p0, p1, bow_to, sag_frac=0.35, npts=None, tol=None):
+    """
+    Versão em lote de arc_through: p0, p1, bow_to (n, 2). O arco se curva
+    para o lado de bow_to com flecha sag_frac*L. Devolve (n, npts, 2); com
+    npts=None o número de pontos se adapta à tolerância tol.
+    """
+    p0 = np.asarray(p0, dtype=float).reshape(-1, 2)
+    p1 = np.asarray(p1, dtype=float).reshape(-1, 2)
+    bow_to = np.broadcast_to(np.asarray(bow_to, dtype=float), p0.shape)
+    v = p1 - p0
+    L = np.hypot(v[:, 0], v[:, 1])
+    t = v / np.where(L < 1e-9, 1.0, L)[:, None]
+    nrm = np.stack([-t[:, 1], t[:, 0]], axis=1)
+    mid = 0.5*(p0 + p1)
+    flip = (nrm*(bow_to - mid)).sum(axis=1) < 0
+    nrm[flip] *= -1
+    return _arcs(p0, p1, nrm, sag_frac*L, npts, tol)
+
+
 # ------------------------ Padrão: Voronoi Poisson ------------------------
 
-def poisson_disk_sampling(width, height, r, k=30):
+POISSON_BATCH = 4096   # pontos ativos testados por rodada
+POISSON_TRIES = 4      # candidatos por ativo em cada rodada
+
+# vizinhança 5x5 de células sem os cantos (célula = r/sqrt(2): os cantos
+# ficam a pelo menos r e 2 células cobrem r). Ordem: a própria célula, o
+# anel 3x3 (rejeita a maioria dos candidatos) e o anel externo, que só os
+# sobreviventes conferem.
+_POISSON_NEIGHBORS = sorted(((dy, dx) for dy in range(-2, 3) for dx in range(-2, 3) if abs(dy) + abs(dx) < 4),
+                            key=lambda d: max(abs(d[0]), abs(d[1])))
+
+
+def poisson_disk_sampling(width, height, r, k=30, rng=None, batch=POISSON_BATCH, tries=POISSON_TRIES):
+    """
+    Amostragem Poisson-Disk (Bridson) em bbox [0,width]x[0,height], com arrays.
+
+    Cada rodada sorteia até `batch` pontos ativos e testa `tries` candidatos
+    de cada um de uma vez contra a grade de aceleração. Cada ativo aceita
+    seu primeiro candidato válido; entre os aceitos da mesma rodada, um
+    candidato só entra se nenhum de índice menor estiver a menos de r (o
+    ativo recusado por isso tenta de novo). Como no Bridson, um ativo sai
+    da lista (troca com o último) depois de k candidatos seguidos inválidos.
+
+    rng: numpy Generator ou semente; None deriva a semente do np.random
+    global (respeita seed_everything).
+    """
+    if rng is None:
+        rng = np.random.default_rng(np.random.randint(2**31))
+    rng = np.random.default_rng(rng)
+    tries = max(1, min(tries, k))
+
+    cell_size = r / np.sqrt(2)
+    grid_width = int(np.ceil(width / cell_size))
+    grid_height = int(np.ceil(height / cell_size))
+    # grades com borda de 2 células (a vizinhança nunca sai do array): o
+    # ponto de cada célula como x + iy (x = inf: vazia; um único acesso à
+    # memória por vizinho) e uma marca temporária para os candidatos da rodada
+    stride = grid_width + 4
+    gz = np.full((grid_height + 4) * stride, complex(np.inf, 0))
+    mark = np.full(gz.shape, -1, dtype=np.int64)
+    neighbors = np.array([dy*stride + dx for dy, dx in _POISSON_NEIGHBORS])
+    r2 = r*r
+
+    # no máximo um ponto por célula
+    capacity = grid_width * grid_height
+    xs = np.empty(capacity)
+    ys = np.empty(capacity)
+    active = np.empty(capacity, dtype=np.int64)
+    fails = np.zeros(capacity, dtype=np.int64)
+
+    def cell_of(x, y):
+        return (np.floor(y / cell_size).astype(np.int64) + 2) * stride \
+            + np.floor(x / cell_size).astype(np.int64) + 2
+
+    xs[0], ys[0] = rng.uniform(0, width), rng.uniform(0, height)
+    gz[cell_of(xs[0], ys[0])] = complex(xs[0], ys[0])
+    active[0] = 0
+    n_points, n_active = 1, 1
+
+    while n_active:
+        m = min(n_active, batch)
+        slots = np.arange(n_active) if m == n_active else rng.choice(n_active, m, replace=False)
+        src = active[slots]
+
+        ang = rng.random((m, tries)) * (2*np.pi)
+        dist = rng.uniform(r, 2*r, (m, tries))
+        cx = xs[src, None] + dist*np.cos(ang)
+        cy = ys[src, None] + dist*np.sin(ang)
+
+        ok = (cx >= 0) & (cx < width) & (cy >= 0) & (cy < height)
+        cells = np.where(ok, cell_of(cx, cy), 2*stride + 2)
+        ok &= gz.real[cells] == np.inf
+        for ring in (neighbors[1:9], neighbors[9:]):
+            i, j = np.nonzero(ok)
+            near = cells[i, j, None] + ring
+            d = gz[near] - (cx[i, j] + 1j*cy[i, j])[:, None]
+            d2 = d.real**2 + d.imag**2
+            ok[i, j] = d2.min(axis=1) >= r2
+
+        found = ok.any(axis=1)
+        first = ok.argmax(axis=1)[found]
+        new_x = cx[found, first]
+        new_y = cy[found, first]
+        new_cells = cells[found, first]
+        order = np.arange(len(new_cells))
+
+        # conflitos dentro da rodada: o menor índice de cada célula fica na
+        # marca e cada candidato confere os de índice menor ao redor
+        mark[new_cells[::-1]] = order[::-1]
+        keep = mark[new_cells] == order
+        nb = mark[new_cells[:, None] + neighbors]
+        mark[new_cells] = -1
+        lower = (nb >= 0) & (nb < order[:, None])
+        nb[~lower] = 0
+        close = (new_x[nb] - new_x[:, None])**2 + (new_y[nb] - new_y[:, None])**2 < r2
+        keep &= ~(lower & close).any(axis=1)
+
+        ids = np.arange(n_points, n_points + keep.sum())
+        xs[ids] = new_x[keep]
+        ys[ids] = new_y[keep]
+        gz[new_cells[keep]] = xs[ids] + 1j*ys[ids]
+        n_points += len(ids)
+
+        # k falhas seguidas: o ativo sai (troca com o fim da lista)
+        fails[slots] = np.where(found, 0, fails[slots] + tries)
+        dead = np.sort(slots[fails[slots] >= k])
+        if len(dead):
+            n_left = n_active - len(dead)
+            holes = dead[dead < n_left]
+            tail = np.setdiff1d(np.arange(n_left, n_active), dead, assume_unique=True)
+            active[holes] = active[tail]
+            fails[holes] = fails[tail]
+            n_active = n_left
+        active[n_active:n_active + len(ids)] = ids
+        fails[n_active:n_active + len(ids)] = 0
+        n_active += len(ids)
+
+    return np.c_[xs[:n_points], ys[:n_points]]
+
+
+def poisson_disk_sampling_loop(width, height, r, k=30):
     """
-    Amostragem Poisson-Disk simples (Bridson) em bbox [0,width]x[0,height].
+    Referência antiga: Bridson ponto a ponto com listas (usada nos benchmarks).
     """
     cell_size = r / np.sqrt(2)
     grid_width = int(np.ceil(width / cell_size))
@@ -131,21 +446,20 @@ def poisson_disk_sampling(width, height, r, k=30):
     return np.array(points)
 
 
-def plot_voronoi_poisson(ax, W=10.0, H=10.0, r=0.45, lw=0.6):
+def voronoi_geometry(W=10.0, H=10.0, r=0.45):
+    """Arestas finitas do Voronoi dos pontos Poisson (None sem SciPy)."""
     if not SCIPY_OK:
-        ax.text(0.5, 0.5, "SciPy ausente\n(Voronoi indisponível)", ha="center", va="center")
-        set_ax_clean(ax); return
-
+        return None
     pts = poisson_disk_sampling(W, H, r=r)
     vor = Voronoi(pts)
-    # desenha segmentos finitos apenas (evita os infinitos nas bordas)
-    for (v0, v1) in vor.ridge_vertices:
-        if v0 != -1 and v1 != -1:
-            p0 = vor.vertices[v0]
-            p1 = vor.vertices[v1]
-            ax.plot([p0[0], p1[0]], [p0[1], p1[1]], linewidth=lw)
-    ax.set_xlim(0, W); ax.set_ylim(0, H)
-    set_ax_clean(ax)
+    # só segmentos finitos (evita os infinitos nas bordas)
+    ridges = np.array(vor.ridge_vertices)
+    ridges = ridges[(ridges != -1).all(axis=1)]
+    return PolylineGeometry.from_array(vor.vertices[ridges], bounds=(0, W, 0, H))
+
+
+def plot_voronoi_poisson(ax, W=10.0, H=10.0, r=0.45, lw=0.6):
+    draw_pattern(ax, voronoi_geometry(W, H, r), lw)
 
 
 # ---------------------- Padrão: Colmeia Curvilínea ----------------------
@@ -176,37 +490,63 @@ def arc_between(p0, p1, bulge=0.25, outward_normal=None, npts=24):
     return np.c_[center[0]+np.cos(ang)*r, center[1]+np.sin(ang)*r]
 
 
-def curved_hex_edges(center=(0,0), R=1.0, bulge=0.25, rotation=0.0, n_per_edge=24):
+def curved_hex_edges(center=(0,0), R=1.0, bulge=0.25, rotation=0.0, n_per_edge=24, tol=None):
+    """
+    As 6 arestas do hexágono como array (6, n_per_edge, 2): arcos (em lote)
+    e retas nas arestas quase verticais. n_per_edge=None adapta o número de
+    pontos à tolerância tol (padrão: ARC_TOLERANCE do tamanho da célula).
+    """
     angles = np.deg2rad(np.arange(0, 360, 60) + rotation)
-    verts = np.stack([R*np.cos(angles), R*np.sin(angles)], axis=1) + np.asarray(center)
-    c = np.asarray(center)
-    segs = []
-    for i in range(6):
-        p0 = verts[i]; p1 = verts[(i+1)%6]
-        v = p1 - p0
-        ang = (np.degrees(np.arctan2(v[1], v[0])) % 180.0)
-        is_verticalish = np.isclose(ang, 90.0, atol=2.5)
-        if is_verticalish:
-            seg = np.linspace(p0, p1, n_per_edge)
-        else:
-            outward = (p0+p1)/2 - c
-            seg = arc_between(p0, p1, bulge=bulge, outward_normal=outward, npts=n_per_edge)
-        segs.append(seg)
+    c = np.asarray(center, dtype=float)
+    verts = np.stack([R*np.cos(angles), R*np.sin(angles)], axis=1) + c
+    p0, p1 = verts, np.roll(verts, -1, axis=0)
+    v = p1 - p0
+    ang = np.degrees(np.arctan2(v[:, 1], v[:, 0])) % 180.0
+    is_verticalish = np.isclose(ang, 90.0, atol=2.5)
+    segs = arcs_between(p0, p1, bulge=bulge, outward=(p0+p1)/2 - c, npts=n_per_edge, tol=tol)
+    segs[is_verticalish] = np.linspace(p0[is_verticalish], p1[is_verticalish], segs.shape[1], axis=1)
     return segs
 
 
-def plot_curvy_honeycomb(ax, nx=16, ny=12, R=18.0, bulge=0.22, lw=0.7):
+def honeycomb_centers(nx, ny, R):
+    """Centros das células (ny*nx, 2) linha a linha; linhas ímpares deslocadas 1.5R."""
+    H = np.sqrt(3)*R
+    row, col = np.mgrid[0:ny, 0:nx]
+    return np.stack([col*3*R + (row % 2)*1.5*R, row*H], axis=-1).reshape(-1, 2).astype(float)
+
+
+def honeycomb_geometry(nx=16, ny=12, R=18.0, bulge=0.22, n_per_edge=None):
+    """
+    Arestas curvas de todas as células (nx*ny*6 linhas de n_per_edge pontos).
+
+    Todas as células são translações da mesma: as 6 arestas são calculadas
+    uma vez na origem e somadas aos centros num único broadcast. Nesta grade
+    (linhas a sqrt(3)R, deslocadas 1.5R) as células não se tocam, então não
+    há arestas compartilhadas a deduplicar. n_per_edge=None adapta os pontos
+    por aresta ao tamanho da colmeia inteira (ARC_TOLERANCE).
+    """
+    centers = honeycomb_centers(nx, ny, R)
+    tol = _extent_tolerance(centers - R, centers + R)
+    template = curved_hex_edges(center=(0, 0), R=R, bulge=bulge, rotation=0.0, n_per_edge=n_per_edge, tol=tol)
+    segs = template[None] + centers[:, None, None, :]
+    return PolylineGeometry.from_array(segs.reshape(-1, template.shape[1], 2))
+
+
+def honeycomb_geometry_loop(nx=16, ny=12, R=18.0, bulge=0.22, n_per_edge=28):
+    """Referência antiga: arcos célula a célula (usada nos benchmarks)."""
     H = np.sqrt(3)*R
+    segs = []
     for row in range(ny):
         y = row*H
         x_offset = 0 if row%2==0 else 1.5*R
         for col in range(nx):
             cx = col*3*R + x_offset
-            cy = y
-            for seg in curved_hex_edges(center=(cx,cy), R=R, bulge=bulge, rotation=0.0, n_per_edge=28):
-                ax.plot(seg[:,0], seg[:,1], linewidth=lw)
-    ax.set_aspect("equal"); ax.axis("off")
-    set_ax_clean(ax)
+            segs.extend(curved_hex_edges(center=(cx,y), R=R, bulge=bulge, rotation=0.0, n_per_edge=n_per_edge))
+    return PolylineGeometry.from_array(np.array(segs).reshape(-1, n_per_edge, 2))
+
+
+def plot_curvy_honeycomb(ax, nx=16, ny=12, R=18.0, bulge=0.22, lw=0.7):
+    draw_pattern(ax, honeycomb_geometry(nx, ny, R, bulge), lw)
 
 
 # ------------------- Padrão: Malha Topológica com Arcos -------------------
@@ -237,7 +577,31 @@ def arc_through(p0, p1, bow_to, sag_frac=0.35, n=40):
     return np.c_[center[0]+np.cos(ang)*r, center[1]+np.sin(ang)*r]
 
 
-def generate_topology(nx=14, ny=20, sx=1.2, sy=1.0, sag_frac=0.35):
+def generate_topology(nx=14, ny=20, sx=1.2, sy=1.0, sag_frac=0.35, npts=None, tol=None):
+    """
+    Verticais (nx*(ny-1), 2, 2) e arcos (n, npts, 2) na mesma ordem do laço
+    de referência (coluna a coluna); os arcos saem todos de um arcs_through.
+    """
+    k, m = np.mgrid[0:nx, 0:ny]
+    x = k*sx
+    y = m*sy + (k % 2)*(sy/2)
+    verticals = np.stack([np.stack([x[:, :-1], y[:, :-1]], -1),
+                          np.stack([x[:, 1:], y[:, 1:]], -1)], axis=2).reshape(-1, 2, 2)
+
+    # paridade 0 liga à coluna seguinte, 1 à anterior (se existir)
+    parity = (k + m) % 2
+    k2 = np.where(parity == 0, k + 1, k - 1)
+    valid = (k2 >= 0) & (k2 < nx)
+    k, m, x, y, k2 = k[valid], m[valid], x[valid], y[valid], k2[valid]
+    x2 = k2*sx
+    y2 = m*sy + (k2 % 2)*(sy/2)
+    bow = np.stack([(x+x2)/2, (y+y2)/2], -1)
+    arcs = arcs_through(np.stack([x, y], -1), np.stack([x2, y2], -1), bow, sag_frac, npts, tol)
+    return verticals, arcs
+
+
+def generate_topology_loop(nx=14, ny=20, sx=1.2, sy=1.0, sag_frac=0.35):
+    """Referência antiga: um arc_through de 60 pontos por arco (usada nos benchmarks)."""
     verticals, arcs = [], []
     for k in range(nx):
         x = k*sx
@@ -261,13 +625,14 @@ def generate_topology(nx=14, ny=20, sx=1.2, sy=1.0, sag_frac=0.35):
     return verticals, arcs
 
 
-def plot_topology(ax, nx=16, ny=22, sx=1.2, sy=1.0, sag_frac=0.42, lw=0.6):
+def topology_geometry(nx=16, ny=22, sx=1.2, sy=1.0, sag_frac=0.42):
+    """Verticais (2 pontos) seguidas dos arcos."""
     verticals, arcs = generate_topology(nx, ny, sx, sy, sag_frac)
-    for seg in verticals:
-        ax.plot(seg[:,0], seg[:,1], linewidth=lw)
-    for poly in arcs:
-        ax.plot(poly[:,0], poly[:,1], linewidth=lw)
-    set_ax_clean(ax)
+    return PolylineGeometry.stack([verticals, arcs])
+
+
+def plot_topology(ax, nx=16, ny=22, sx=1.2, sy=1.0, sag_frac=0.42, lw=0.6):
+    draw_pattern(ax, topology_geometry(nx, ny, sx, sy, sag_frac), lw)
 
 
 # ------------------- Padrão: Quasicristal (ondas + contorno) -------------------
@@ -295,45 +660,127 @@ def quasicrystal_field(W=800, H=800, k=7, scale=0.012, phases=None):
     return field
 
 
-def plot_quasicrystal(ax, W=900, H=900, k=9, scale=0.018, levels=14, lw=0.6):
+def quasicrystal_geometry(W=900, H=900, k=9, scale=0.018, levels=14):
+    """Curvas de nível do campo; `values` guarda o nível de cada curva."""
     f = quasicrystal_field(W, H, k=k, scale=scale)
     # escolhe níveis de contorno próximos da média
     vmin, vmax = np.percentile(f, 10), np.percentile(f, 90)
     lv = np.linspace(vmin, vmax, levels)
-    # desenha apenas contornos (linhas)
-    CS = ax.contour(f, lv, linewidths=lw)
-    ax.set_aspect("equal"); ax.axis("off")
-    set_ax_clean(ax)
+    # extrai as linhas com uma figura descartável (sem desenhar)
+    cs = Figure().add_subplot(111).contour(f, lv)
+    lines = [seg for segs in cs.allsegs for seg in segs]
+    values = np.concatenate([np.full(len(segs), v) for segs, v in zip(cs.allsegs, cs.levels)])
+    return PolylineGeometry.from_lines(lines, values=values, bounds=(0, W - 1, 0, H - 1))
+
+
+def plot_quasicrystal(ax, W=900, H=900, k=9, scale=0.018, levels=14, lw=0.6):
+    draw_pattern(ax, quasicrystal_geometry(W, H, k, scale, levels), lw)
 
 
 # ------------------ Padrão: Grade Senoidal Distorcida (warp) ------------------
 
-def plot_warped_grid(ax, W=900, H=900, n=22, amp=24.0, freq=0.06, lw=0.6):
+def warped_grid_geometry(W=900, H=900, n=22, amp=24.0, freq=0.06, npts=1000):
     """
-    Grade base (linhas verticais/horizontais) com deslocamento senoidal 2D.
+    Grade base (linhas verticais/horizontais) com deslocamento senoidal 2D:
+    2n linhas de npts pontos, primeiro as verticais, depois as horizontais.
     """
     phases = np.random.uniform(0, 2*np.pi, size=4)
-    # linhas verticais
     xs = np.linspace(0, W, n)
     ys = np.linspace(0, H, n)
+    t = np.linspace(0, 1, npts)
+    segs = np.empty((2*n, npts, 2))
+
+    # o deslocamento só depende de t: uma curva por eixo, somada à posição
+    segs[:n, :, 0] = xs[:, None] + amp*np.sin(2*np.pi*freq*(t*H) + phases[0]) \
+        + 0.6*amp*np.sin(2*np.pi*(freq*0.53)*(t*H) + phases[1])
+    segs[:n, :, 1] = t*H + amp*np.sin(2*np.pi*(freq*0.77)*(t*H) + phases[2])
+
+    segs[n:, :, 1] = ys[:, None] + amp*np.sin(2*np.pi*freq*(t*W) + phases[1]) \
+        + 0.5*amp*np.sin(2*np.pi*(freq*1.17)*(t*W) + phases[0])
+    segs[n:, :, 0] = t*W + amp*np.sin(2*np.pi*(freq*0.66)*(t*W) + phases[3])
+    return PolylineGeometry.from_array(segs, bounds=(0, W, 0, H))
+
+
+def plot_warped_grid(ax, W=900, H=900, n=22, amp=24.0, freq=0.06, lw=0.6):
+    """
+    Grade base (linhas verticais/horizontais) com deslocamento senoidal 2D.
+    """
+    draw_pattern(ax, warped_grid_geometry(W, H, n, amp, freq), lw)
+
+
+# ------------------- Geometria por padrão + cache -------------------
+
+PATTERN_GEOMETRY = {
+    "Voronoi Poisson-Disk": voronoi_geometry,
+    "Colmeia Curvilínea": honeycomb_geometry,
+    "Malha Topológica (Arcos)": topology_geometry,
+    "Quasicristal (contornos)": quasicrystal_geometry,
+    "Grade Senoidal Distorcida": warped_grid_geometry,
+}
+
+GEOMETRY_CACHE_BYTES = 256 * 1024**2
 
-    t = np.linspace(0, 1, 1000)
-    for x in xs:
-        X = np.full_like(t, x) + amp*np.sin(2*np.pi*freq*(t*H) + phases[0]) \
-            + 0.6*amp*np.sin(2*np.pi*(freq*0.53)*(t*H) + phases[1])
-        Y = t*H + amp*np.sin(2*np.pi*(freq*0.77)*(t*H) + phases[2])
-        ax.plot(X, Y, linewidth=lw)
 
-    for y in ys:
-        Y = np.full_like(t, y) + amp*np.sin(2*np.pi*freq*(t*W) + phases[1]) \
-            + 0.5*amp*np.sin(2*np.pi*(freq*1.17)*(t*W) + phases[0])
-        X = t*W + amp*np.sin(2*np.pi*(freq*0.66)*(t*W) + phases[3])
-        ax.plot(X, Y, linewidth=lw)
+def build_geometry(pattern, seed, params):
+    """Semeia os geradores e monta a geometria do padrão."""
+    seed_everything(int(seed))
+    return PATTERN_GEOMETRY[pattern](**params)
 
-    ax.set_xlim(0, W); ax.set_ylim(0, H)
+
+def draw_pattern(ax, geom, lw, color=None):
+    """Desenha uma geometria pronta (None = Voronoi sem SciPy) num eixo limpo."""
+    if geom is None:
+        ax.text(0.5, 0.5, "SciPy ausente\n(Voronoi indisponível)", ha="center", va="center")
+    else:
+        render_geometry(ax, geom, lw, color)
     set_ax_clean(ax)
 
 
+class GeometryCache:
+    """
+    Cache LRU de geometrias por padrão + semente + parâmetros, limitado por
+    memória. Mudanças só de estilo (espessura, cor) reaproveitam a geometria;
+    as que não cabem no orçamento são montadas mas não guardadas.
+    """
+
+    def __init__(self, max_bytes=GEOMETRY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # chave -> geometria
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(pattern, seed, params):
+        return (pattern, int(seed), tuple(sorted(params.items())))
+
+    def get(self, pattern, seed, params):
+        """Geometria guardada ou recém-montada (e guardada, se couber)."""
+        key = self.key(pattern, seed, params)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        geom = build_geometry(pattern, seed, params)
+        if geom is not None and geom.nbytes <= self.max_bytes:
+            for a in (geom.points, geom.offsets, geom.values):
+                if a is not None:
+                    a.flags.writeable = False
+            self._entries[key] = geom
+            self._bytes += geom.nbytes
+            while self._bytes > self.max_bytes:
+                self._bytes -= self._entries.popitem(last=False)[1].nbytes
+        return geom
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+
+GEOMETRY_CACHE = GeometryCache()
+
+
 # ------------------------------ GUI ------------------------------
 
 PATTERNS = [
@@ -352,6 +799,17 @@ class PatternParams:
     extras: Dict[str, Any] = None
 
 
+# cores das linhas; None = ciclo de cores do Matplotlib (uma cor por linha)
+LINE_COLORS = {
+    "Ciclo de cores": None,
+    "Preto": "black",
+    "Grafite": "#404040",
+    "Azul": "tab:blue",
+    "Vermelho": "tab:red",
+    "Verde": "tab:green",
+}
+
+
 DEFAULTS: Dict[str, PatternParams] = {
     "Voronoi Poisson-Disk": PatternParams(
         seed=1234, linewidth=0.65,
@@ -397,6 +855,10 @@ class SeedsAuraApp(QWidget):
         self.lw_spin.setRange(0.05, 3.0); self.lw_spin.setSingleStep(0.05)
         self.lw_spin.setValue(0.7); self.lw_spin.valueChanged.connect(self.update_preview)
 
+        self.color_combo = QComboBox()
+        self.color_combo.addItems(list(LINE_COLORS))
+        self.color_combo.currentTextChanged.connect(self.update_preview)
+
         # Caixa de parâmetros específicos
         self.params_box = QGroupBox("Parâmetros do Padrão")
         self.form = QFormLayout()
@@ -424,6 +886,8 @@ class SeedsAuraApp(QWidget):
         grid_basic.addWidget(self.seed_spin, 0, 1)
         grid_basic.addWidget(QLabel("Espessura (lw):"), 1, 0)
         grid_basic.addWidget(self.lw_spin, 1, 1)
+        grid_basic.addWidget(QLabel("Cor:"), 2, 0)
+        grid_basic.addWidget(self.color_combo, 2, 1)
         left.addLayout(grid_basic)
         left.addWidget(self.params_box)
         btns = QHBoxLayout()
@@ -442,7 +906,6 @@ class SeedsAuraApp(QWidget):
         # inicializa
         self.dynamic_widgets: Dict[str, Any] = {}
         self.reload_controls()
-        self.update_preview()
 
     # ----- Dinâmica de parâmetros específicos -----
     def clear_dynamic(self):
@@ -464,8 +927,13 @@ class SeedsAuraApp(QWidget):
     def reload_controls(self):
         p = self.combo.currentText()
         defs = DEFAULTS[p]
+        # sem prévia até os controles do novo padrão existirem
+        for w in (self.seed_spin, self.lw_spin):
+            w.blockSignals(True)
         self.seed_spin.setValue(defs.seed)
         self.lw_spin.setValue(defs.linewidth)
+        for w in (self.seed_spin, self.lw_spin):
+            w.blockSignals(False)
 
         self.clear_dynamic()
         if p == "Voronoi Poisson-Disk":
@@ -473,8 +941,8 @@ class SeedsAuraApp(QWidget):
             self.add_spin("H", "Altura (H)", 2.0, 40.0, 0.5, defs.extras["H"], True)
             self.add_spin("r", "Raio mínimo (r)", 0.1, 2.0, 0.05, defs.extras["r"], True)
         elif p == "Colmeia Curvilínea":
-            self.add_spin("nx", "Nx células", 4, 64, 1, defs.extras["nx"], False)
-            self.add_spin("ny", "Ny células", 4, 64, 1, defs.extras["ny"], False)
+            self.add_spin("nx", "Nx células", 4, 200, 1, defs.extras["nx"], False)
+            self.add_spin("ny", "Ny células", 4, 200, 1, defs.extras["ny"], False)
             self.add_spin("R", "Raio R", 4.0, 64.0, 0.5, defs.extras["R"], True)
             self.add_spin("bulge", "Curvatura (bulge)", 0.0, 0.75, 0.02, defs.extras["bulge"], True)
         elif p == "Malha Topológica (Arcos)":
@@ -495,6 +963,7 @@ class SeedsAuraApp(QWidget):
             self.add_spin("n", "Linhas por eixo", 4, 120, 1, defs.extras["n"], False)
             self.add_spin("amp", "Amplitude", 0.0, 120.0, 1.0, defs.extras["amp"], True)
             self.add_spin("freq", "Frequência base", 0.005, 0.2, 0.001, defs.extras["freq"], True)
+        self.update_preview()
 
     # ----- Renderização -----
     def collect_params(self) -> Tuple[str, Dict[str, Any]]:
@@ -511,32 +980,19 @@ class SeedsAuraApp(QWidget):
                 d["n"] = int(d.get("n", 22))
         return p, d
 
-    def update_preview(self):
-        seed_everything(int(self.seed_spin.value()))
-        self.fig.clf()
-        ax = self.fig.add_subplot(111)
-        lw = float(self.lw_spin.value())
+    def current_geometry(self):
+        """Geometria do padrão atual (do cache se padrão, semente e parâmetros não mudaram)"""
         pattern, d = self.collect_params()
+        return GEOMETRY_CACHE.get(pattern, int(self.seed_spin.value()), d)
 
-        # CORREÇÃO: Passar apenas os parâmetros esperados por cada função
-        if pattern == "Voronoi Poisson-Disk":
-            plot_voronoi_poisson(ax, W=d.get('W', 10.0), H=d.get('H', 10.0), r=d.get('r', 0.45), lw=lw)
-        elif pattern == "Colmeia Curvilínea":
-            plot_curvy_honeycomb(ax, nx=d.get('nx', 16), ny=d.get('ny', 12), 
-                                R=d.get('R', 18.0), bulge=d.get('bulge', 0.22), lw=lw)
-        elif pattern == "Malha Topológica (Arcos)":
-            plot_topology(ax, nx=d.get('nx', 16), ny=d.get('ny', 22), 
-                         sx=d.get('sx', 1.2), sy=d.get('sy', 1.0), 
-                         sag_frac=d.get('sag_frac', 0.42), lw=lw)
-        elif pattern == "Quasicristal (contornos)":
-            plot_quasicrystal(ax, W=d.get('W', 900), H=d.get('H', 900), 
-                            k=d.get('k', 9), scale=d.get('scale', 0.018), 
-                            levels=d.get('levels', 14), lw=lw)
-        elif pattern == "Grade Senoidal Distorcida":
-            plot_warped_grid(ax, W=d.get('W', 900), H=d.get('H', 900), 
-                           n=d.get('n', 22), amp=d.get('amp', 24.0), 
-                           freq=d.get('freq', 0.06), lw=lw)
+    def draw_current(self, fig):
+        fig.clf()
+        ax = fig.add_subplot(111)
+        draw_pattern(ax, self.current_geometry(), float(self.lw_spin.value()),
+                     LINE_COLORS[self.color_combo.currentText()])
 
+    def update_preview(self):
+        self.draw_current(self.fig)
         self.canvas.draw_idle()
 
     # ----- Utilidades de GUI -----
@@ -545,36 +1001,14 @@ class SeedsAuraApp(QWidget):
 
     def save_figure(self, fmt: str = "png"):
         # caixa de diálogo
-        pattern, params = self.collect_params()
+        pattern, _ = self.collect_params()
         fname_sug = f"seeds_aura_{pattern.replace(' ','_').replace('(','').replace(')','').lower()}.{fmt}"
         path, _ = QFileDialog.getSaveFileName(self, f"Salvar como {fmt.upper()}", fname_sug, f"*.{fmt}")
         if not path:
             return
-        # renderizar em figura "limpa" para export com alta DPI
-        seed_everything(int(self.seed_spin.value()))
+        # renderizar em figura "limpa" para export com alta DPI (mesma geometria do preview)
         fig = Figure(figsize=(8,8), dpi=300)
-        ax = fig.add_subplot(111)
-        lw = float(self.lw_spin.value())
-        
-        # CORREÇÃO: Passar apenas os parâmetros esperados por cada função
-        if pattern == "Voronoi Poisson-Disk":
-            plot_voronoi_poisson(ax, W=params.get('W', 10.0), H=params.get('H', 10.0), 
-                               r=params.get('r', 0.45), lw=lw)
-        elif pattern == "Colmeia Curvilínea":
-            plot_curvy_honeycomb(ax, nx=params.get('nx', 16), ny=params.get('ny', 12), 
-                                R=params.get('R', 18.0), bulge=params.get('bulge', 0.22), lw=lw)
-        elif pattern == "Malha Topológica (Arcos)":
-            plot_topology(ax, nx=params.get('nx', 16), ny=params.get('ny', 22), 
-                         sx=params.get('sx', 1.2), sy=params.get('sy', 1.0), 
-                         sag_frac=params.get('sag_frac', 0.42), lw=lw)
-        elif pattern == "Quasicristal (contornos)":
-            plot_quasicrystal(ax, W=params.get('W', 900), H=params.get('H', 900), 
-                            k=params.get('k', 9), scale=params.get('scale', 0.018), 
-                            levels=params.get('levels', 14), lw=lw)
-        elif pattern == "Grade Senoidal Distorcida":
-            plot_warped_grid(ax, W=params.get('W', 900), H=params.get('H', 900), 
-                           n=params.get('n', 22), amp=params.get('amp', 24.0), 
-                           freq=params.get('freq', 0.06), lw=lw)
+        self.draw_current(fig)
 
         fig.tight_layout(pad=0)
         # salva
@@ -583,9 +1017,6 @@ class SeedsAuraApp(QWidget):
         elif fmt.lower() == "pdf":
             fig.savefig(path, bbox_inches="tight", pad_inches=0)
 
-        # Atualiza preview para manter consistência visual
-        self.update_preview()
-
 
 def main():
     # Para embed correto do Matplotlib em PyQt5
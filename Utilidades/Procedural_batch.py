@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Seeds Aura - Procedural Explorer - Lote sem interface
+--------------------------------------
+Roda qualquer entrada de ALGOS do Procedural Explorer a partir de uma
+varredura de parâmetros em JSON ou CSV e grava arrays e PNGs, sem PyQt5.
+As tarefas são distribuídas entre processos.
+
+Varredura JSON: um objeto ou uma lista de objetos. "algo" é o nome da
+entrada em ALGOS; as demais chaves são parâmetros (os que faltarem usam o
+padrão do painel). Uma lista de valores ou {"range": [início, fim, passo]}
+vira uma varredura, e o produto cartesiano de todas elas gera as tarefas:
+
+  [{"algo": "2D - Perlin Noise", "seed": {"range": [0, 100]}, "octaves": [4, 6]},
+   {"algo": "2D - Worley F2-F1", "width": 2048, "height": 2048, "seed": [1, 2, 3]}]
+
+Varredura CSV: coluna "algo" e uma coluna por parâmetro; uma linha por
+tarefa (células vazias usam o padrão, valores são lidos como JSON).
+
+Execução:
+  python Procedural_batch.py varredura.json -o saida --workers 8
+  python Procedural_batch.py varredura.csv -o saida --formats image npz --cmap magma
+  python Procedural_batch.py --list
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+import unicodedata
+
+import numpy as np
+
+import Procedural_explorer as pe
+
+FORMATS = ("png", "image", "npz")
+
+
+# ------------------------
+# LEITURA DAS VARREDURAS
+# ------------------------
+
+def _sweep_values(value):
+    """Valores de um parâmetro: lista, {"range": [...]} ou valor único"""
+    if isinstance(value, dict) and set(value) == {"range"}:
+        return list(range(*value["range"]))
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def expand_job(spec):
+    """Um objeto da varredura -> lista de (algo, params) do produto cartesiano"""
+    spec = dict(spec)
+    algo = spec.pop("algo")
+    spec.update(spec.pop("params", {}))
+    names = list(spec)
+    combos = itertools.product(*(_sweep_values(spec[n]) for n in names))
+    return [(algo, pe.resolve_params(algo, dict(zip(names, values)))) for values in combos]
+
+
+def _csv_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def load_jobs(path):
+    """Lê uma varredura .json ou .csv e devolve a lista de (algo, params)"""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            specs = [{k: _csv_value(v) for k, v in row.items() if k and v not in (None, "")}
+                     for row in csv.DictReader(f)]
+    else:
+        with open(path, encoding="utf-8") as f:
+            specs = json.load(f)
+        if isinstance(specs, dict):
+            specs = [specs]
+    jobs = []
+    for spec in specs:
+        jobs.extend(expand_job(spec))
+    return jobs
+
+
+# ------------------------
+# EXECUÇÃO
+# ------------------------
+
+def slug(algo):
+    """'2D - Worley F2-F1' -> '2d-worley-f2-f1' (nome de arquivo)"""
+    text = unicodedata.normalize("NFKD", algo).encode("ascii", "ignore").decode().lower()
+    return "-".join("".join(c if c.isalnum() else " " for c in text).split())
+
+
+def result_arrays(data):
+    """Arrays de um resultado de generate() (listas viram um array só)"""
+    arrays = pe._result_arrays(data)
+    if arrays is None:
+        arrays = [np.asarray(data, dtype=np.float64)]
+    return arrays
+
+
+def write_image(path, img, cmap=None):
+    """Grava um mapa 2D como PNG pixel a pixel (sem eixos)"""
+    img = np.asarray(img, dtype=np.float32)
+    lo, hi = float(img.min()), float(img.max())
+    if lo < 0 or hi > 1:
+        img = (img - lo) / (hi - lo + 1e-8)
+    height, width = img.shape
+    with pe.PNGStreamWriter(path, width, height, rgb=cmap is not None) as png:
+        for y0 in range(0, height, 1024):
+            png.write_rows(pe.to_pixels(img[y0:y0+1024], cmap))
+
+
+def run_job(index, algo, params, out_dir, formats=("png", "npz"), cmap=None, dpi=150, figsize=8.0,
+            full_mesh=False):
+    """Gera uma tarefa e grava as saídas pedidas; erros voltam no registro, não interrompem o lote"""
+    name = f"{index:05d}_{slug(algo)}"
+    base = os.path.join(out_dir, name)
+    record = {"index": index, "algo": algo, "params": params, "files": [], "seconds": 0.0, "error": None}
+    t0 = time.perf_counter()
+    try:
+        data = pe.generate(algo, params)
+        if "npz" in formats:
+            np.savez_compressed(base + ".npz", *result_arrays(data))
+            record["files"].append(name + ".npz")
+        if "image" in formats and isinstance(data, np.ndarray) and data.ndim == 2:
+            write_image(base + ".image.png", data, cmap)
+            record["files"].append(name + ".image.png")
+        if "png" in formats:
+            fig = pe.Figure(figsize=(figsize, figsize))
+            pe.FigureCanvasAgg(fig)
+            pe.draw_result(fig, algo, params, data, preview=not full_mesh)
+            fig.savefig(base + ".png", bbox_inches="tight", dpi=dpi)
+            record["files"].append(name + ".png")
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - t0, 3)
+    return record
+
+
+def run_batch(jobs, out_dir, workers=None, formats=("png", "npz"), cmap=None, dpi=150, figsize=8.0,
+              full_mesh=False, progress=None):
+    """Roda as tarefas (em processos se workers > 1) e grava manifest.json em out_dir"""
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(i, algo, params, out_dir, tuple(formats), cmap, dpi, figsize, full_mesh)
+             for i, (algo, params) in enumerate(jobs)]
+    records = pe.run_chunks(run_job, tasks, workers, progress)
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=1)
+    return records
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Procedural Explorer em lote, sem interface")
+    ap.add_argument("sweep", nargs="?", help="varredura .json ou .csv")
+    ap.add_argument("-o", "--out", default="procedural_out", help="pasta de saída")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="processos (1 = serial)")
+    ap.add_argument("--formats", nargs="+", choices=FORMATS, default=["png", "npz"],
+                    help="png = figura como na interface, image = mapa 2D pixel a pixel, npz = arrays")
+    ap.add_argument("--cmap", default=None, help="colormap do formato image (padrão: cinza)")
+    ap.add_argument("--dpi", type=int, default=150)
+    ap.add_argument("--figsize", type=float, default=8.0, help="lado da figura em polegadas")
+    ap.add_argument("--full-mesh", action="store_true", help="superfícies 3D com a malha inteira")
+    ap.add_argument("--list", action="store_true", help="lista os algoritmos e seus parâmetros padrão")
+    args = ap.parse_args()
+
+    if args.list:
+        for algo in pe.ALGOS:
+            print(json.dumps({"algo": algo, **pe.default_params(algo)}, ensure_ascii=False))
+        return
+    if not args.sweep:
+        ap.error("informe a varredura (.json ou .csv) ou use --list")
+
+    jobs = load_jobs(args.sweep)
+    print(f"{len(jobs)} tarefas -> {args.out} ({args.workers} processos)")
+
+    def progress(fraction):
+        print(f"\r{fraction * 100:5.1f}%", end="", flush=True)
+
+    t0 = time.perf_counter()
+    records = run_batch(jobs, args.out, args.workers, args.formats, args.cmap, args.dpi,
+                        args.figsize, args.full_mesh, progress)
+    pe.shutdown_pools()
+    failed = [r for r in records if r["error"]]
+    print(f"\r{len(records) - len(failed)} ok, {len(failed)} com erro em {time.perf_counter() - t0:.1f}s")
+    for r in failed:
+        print(f"  #{r['index']} {r['algo']}: {r['error']}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
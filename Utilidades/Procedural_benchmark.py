@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Seeds Aura - Procedural Explorer - Benchmarks
+--------------------------------------
+Mede os motores vetorizados do Procedural Explorer contra as versões
+de referência pixel a pixel.
+
+As referências em Python puro têm custo constante por pixel, então para
+mapas grandes elas são medidas numa faixa de linhas e extrapoladas
+(use --full para medir o mapa inteiro).
+
+Execução:
+  python Procedural_benchmark.py
+  python Procedural_benchmark.py --sizes 512 2048 --full
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import Procedural_explorer as pe
+
+
+def timeit(fn, *args, repeat=1, **kwargs):
+    """Melhor tempo (s) de `repeat` execuções e o último resultado"""
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def report(name, size, t_ref, t_fast, extrapolated, dim="²"):
+    mark = "~" if extrapolated else " "
+    print(f"{name:<28} {size:>5}{dim}  ref {mark}{t_ref:9.2f}s   rápido {t_fast:8.3f}s   "
+          f"speedup {t_ref / t_fast:8.1f}x")
+
+
+# ------------------------
+# PERLIN
+# ------------------------
+
+def bench_perlin(size, full=False, strip=16, octaves=6, scale=60.0, seed=0):
+    t_fast, fast = timeit(pe.perlin_noise_2d_map, size, size, scale=scale,
+                          octaves=octaves, seed=seed, repeat=3)
+    rows = size if full else min(strip, size)
+    t_ref, ref = timeit(pe.perlin_noise_2d_map_loop, size, rows, scale=scale,
+                        octaves=octaves, seed=seed)
+    t_ref *= size / rows
+    # A faixa usa uma grade de gradientes menor em y; os valores só batem
+    # quando o mapa inteiro é medido.
+    if full and not np.array_equal(fast, ref):
+        raise AssertionError("perlin vetorizado diverge da referência")
+    report(f"Perlin ({octaves} oitavas)", size, t_ref, t_fast, not full)
+
+
+# ------------------------
+# WORLEY
+# ------------------------
+
+def worley_loop(width, height, num_points, seed):
+    """Referência antiga: distância a todos os pontos + sort completo por pixel"""
+    rng = np.random.RandomState(seed)
+    pts = rng.rand(num_points, 2)
+    pts[:, 0] *= width
+    pts[:, 1] *= height
+    f1 = np.zeros((height, width), dtype=np.float32)
+    f2 = np.zeros((height, width), dtype=np.float32)
+    for y in range(height):
+        for x in range(width):
+            d = np.sqrt((pts[:, 0] - x)**2 + (pts[:, 1] - y)**2)
+            d.sort()
+            f1[y, x] = d[0]
+            f2[y, x] = d[min(1, len(d)-1)]
+    return f1, f2
+
+
+def bench_worley(size, full=False, strip=8, num_points=200, seed=0):
+    t_fast, (f1, f2) = timeit(pe.worley_features, size, size, num_points, seed, repeat=3)
+    rows = size if full else min(strip, size)
+    t_ref, (r1, r2) = timeit(worley_loop, size, rows, num_points, seed)
+    t_ref *= size / rows
+    if full and not (np.array_equal(f1, r1) and np.array_equal(f2, r2)):
+        raise AssertionError("worley acelerado diverge da referência")
+    report(f"Worley F1/F2 ({num_points} pts)", size, t_ref, t_fast, not full)
+
+
+# ------------------------
+# DIAMOND-SQUARE
+# ------------------------
+
+def bench_diamond(size, full=False, ref_max=513, roughness=0.6, seed=0):
+    """Tamanhos viram 2^k + 1; a referência é medida até ref_max (custo ~ n²)"""
+    n = 2
+    while n + 1 < size:
+        n *= 2
+    n += 1
+    t_fast, fast = timeit(pe.diamond_square, n, roughness, seed, repeat=3)
+    m = n if full else min(n, ref_max)
+    t_ref, ref = timeit(pe.diamond_square_loop, m, roughness, seed)
+    if m == n and not np.array_equal(fast, ref):
+        raise AssertionError("diamond-square vetorizado diverge da referência")
+    t_ref *= (n / m) ** 2
+    report("Diamond-square", n, t_ref, t_fast, m != n)
+
+
+# ------------------------
+# FAULT FORMATION
+# ------------------------
+
+def bench_fault(size, full=False, strip=4, iterations=5000, seed=0):
+    faults = pe.fault_lines(size, iterations, seed=seed)
+    n = iterations if full else min(strip, iterations)
+    t_ref, ref = timeit(pe._fault_chunk_loop, size, faults[:n])
+    t_ref *= iterations / n
+    for method in ("mask", "batched"):
+        t_fast, fast = timeit(pe.FAULT_METHODS[method], size, faults, repeat=2)
+        if not np.allclose(fast, pe._fault_chunk_masks(size, faults), rtol=0, atol=1e-12):
+            raise AssertionError(f"fault formation ({method}) diverge da referência")
+        report(f"Fault formation {method}", size, t_ref, t_fast, not full)
+
+
+# ------------------------
+# K-MEANS
+# ------------------------
+
+def kmeans_dense(pts, k, seed=0, iterations=20):
+    """Referência antiga: tensor (n, k, 2) inteiro a cada iteração, 20 iterações fixas"""
+    rng = np.random.RandomState(seed)
+    centroids = pts[rng.choice(len(pts), k, replace=False)]
+    for _ in range(iterations):
+        d = np.linalg.norm(pts[:, None] - centroids, axis=2)
+        labels = np.argmin(d, axis=1)
+        for i in range(k):
+            if (labels == i).any():
+                centroids[i] = pts[labels == i].mean(axis=0)
+    return labels, centroids
+
+
+def bench_kmeans(size, full=False, k=16, seed=0):
+    """size² pontos 2D (um por pixel de um mapa size x size)"""
+    n = size * size
+    rng = np.random.RandomState(seed)
+    pts = rng.randn(n, 2) + rng.randn(k, 2)[rng.randint(0, k, n)] * 4
+    t_ref, _ = timeit(kmeans_dense, pts, k, seed)
+    # Lloyd com as mesmas 20 iterações da referência; mini-batch até convergir
+    t_fast, _ = timeit(pe.kmeans, pts, k, seed, "lloyd", max_iter=20, tol=0, repeat=2)
+    report(f"K-means lloyd (k={k})", size, t_ref, t_fast, False)
+    t_fast, _ = timeit(pe.kmeans, pts, k, seed, "minibatch", repeat=2)
+    report(f"K-means minibatch (k={k})", size, t_ref, t_fast, False)
+
+
+# ------------------------
+# VOXEL
+# ------------------------
+
+def bench_voxel(size, full=False, ref_max=64):
+    """Esfera n³ (n = size/8): laço triplo vs voxelizador em fatias; RLE e faces expostas"""
+    n = max(16, size // 8)
+    r = n // 2 - 1
+    t_fast, rle = timeit(pe.voxelize, pe.sphere_field(n, r), n, repeat=2)
+    m = n if full else min(n, ref_max)
+    t_ref, ref = timeit(pe.voxel_grid_sphere_loop, m, min(r, m // 2 - 1))
+    if m == n and not np.array_equal(rle.to_dense(), ref):
+        raise AssertionError("voxelizador diverge da referência")
+    t_ref *= (n / m) ** 3
+    report("Voxel esfera (RLE)", n, t_ref, t_fast, m != n, dim="³")
+    t_faces, (vox, _) = timeit(rle.surface_faces)
+    print(f"{'':<28} {n:>5}³  {rle.count()} voxels em {rle.nbytes / 1e6:.1f} MB "
+          f"(denso {n**3 / 1e6:.1f} MB), {len(vox)} faces expostas em {t_faces:.3f}s")
+
+
+# ------------------------
+# QUADTREE
+# ------------------------
+
+QUADTREE_POINTS = (100_000, 1_000_000)
+
+
+def bench_quadtree(size, full=False, points=QUADTREE_POINTS, strip=20_000,
+                   queries=200, cap=8, max_depth=16, seed=0):
+    """Construção em lote vs inserção ponto a ponto; consultas vs força bruta.
+
+    size é o lado do retângulo. A inserção é medida em `strip` pontos e
+    extrapolada linearmente (use --full para inserir todos).
+    """
+    rng = np.random.RandomState(seed)
+    for n in points:
+        pts = rng.rand(n, 2) * size
+        t_fast, qt = timeit(pe.PointQuadtree, pts, pe.Rect(0, 0, size, size),
+                            cap, max_depth, repeat=2)
+        m = n if full else min(n, strip)
+        old = pe.Quadtree(pe.Rect(0, 0, size, size), cap=cap, max_depth=max_depth)
+        sub = pts[:m].tolist()
+        t_ref, _ = timeit(lambda: [old.insert(pt) for pt in sub])
+        t_ref *= n / m
+        report(f"Quadtree build ({n} pts)", size, t_ref, t_fast, m != n)
+
+        centers = rng.rand(queries, 2) * size
+        half = size * 0.01
+        r = size * 0.01
+        k = 16
+
+        def brute():
+            for cx, cy in centers:
+                np.flatnonzero((pts[:, 0] >= cx - half) & (pts[:, 0] < cx + half) &
+                               (pts[:, 1] >= cy - half) & (pts[:, 1] < cy + half))
+                np.flatnonzero((pts[:, 0] - cx)**2 + (pts[:, 1] - cy)**2 <= r*r)
+                d = (pts[:, 0] - cx)**2 + (pts[:, 1] - cy)**2
+                np.argpartition(d, k)[:k]
+
+        def tree():
+            for cx, cy in centers:
+                qt.query_rect(cx - half, cy - half, cx + half, cy + half)
+                qt.query_radius(cx, cy, r)
+                qt.knn(cx, cy, k)
+
+        for cx, cy in centers[:10]:
+            d = np.hypot(pts[:, 0] - cx, pts[:, 1] - cy)
+            if not np.array_equal(qt.query_radius(cx, cy, r), np.flatnonzero(d <= r)):
+                raise AssertionError("quadtree: consulta por raio diverge da força bruta")
+            if not np.allclose(qt.knn(cx, cy, k)[1], np.sort(d)[:k]):
+                raise AssertionError("quadtree: kNN diverge da força bruta")
+        t_ref, _ = timeit(brute)
+        t_fast, _ = timeit(tree)
+        report(f"Quadtree consultas x{queries}", size, t_ref, t_fast, False)
+
+
+# ------------------------
+# ESCALONAMENTO MULTIPROCESSO
+# ------------------------
+
+SCALING_WORKERS = (1, 2, 4, 8)
+
+
+def bench_scaling(size, full=False, workers=SCALING_WORKERS):
+    """Curvas de escalonamento do run_chunks; confere que o resultado é igual ao serial"""
+    jobs = [
+        ("Perlin (8 oitavas)", size,
+         lambda w: pe.perlin_noise_2d_map(size, size, octaves=8, seed=0, workers=w)),
+        ("Worley F1 (1000 pts)", size,
+         lambda w: pe.worley_noise_2d(size, size, 1000, seed=0, workers=w)),
+        ("Fault formation (1024)", 64,
+         lambda w: pe.fault_formation(64, 1024, seed=0, workers=w)),
+    ]
+    for name, n, job in jobs:
+        base_t, base = None, None
+        for w in workers:
+            job(w)  # aquece o pool
+            t, out = timeit(job, w, repeat=2)
+            if base is None:
+                base_t, base = t, out
+            same = "ok" if np.array_equal(out, base) else "DIFERENTE"
+            print(f"{name:<28} {n:>5}²  workers {w:>2}  {t:8.3f}s   "
+                  f"speedup {base_t / t:5.2f}x   {same}")
+    pe.shutdown_pools()
+
+
+BENCHMARKS = {
+    "perlin": bench_perlin,
+    "worley": bench_worley,
+    "diamond": bench_diamond,
+    "fault": bench_fault,
+    "kmeans": bench_kmeans,
+    "voxel": bench_voxel,
+    "quadtree": bench_quadtree,
+    "scaling": bench_scaling,
+}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks do Procedural Explorer")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[512, 2048])
+    ap.add_argument("--only", choices=sorted(BENCHMARKS), nargs="+")
+    ap.add_argument("--full", action="store_true",
+                    help="mede a referência no mapa inteiro (lento)")
+    args = ap.parse_args()
+
+    for name in args.only or BENCHMARKS:
+        for size in args.sizes:
+            BENCHMARKS[name](size, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,22 +7,55 @@ GUI em PyQt5 com preview Matplotlib para explorar algoritmos
 de geração procedural com controles específicos e descrições educativas.
 """
 
+import os
 import sys
 import math
+import zlib
+import struct
+import functools
+import itertools
+import heapq
+import hashlib
+import tempfile
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import random
 import numpy as np
 import matplotlib
-matplotlib.use("Qt5Agg")
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.patches import Circle
 from mpl_toolkits.mplot3d import Axes3D
-
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QComboBox, QSpinBox, QDoubleSpinBox, QCheckBox,
-    QGroupBox, QFormLayout, QSlider, QFileDialog, QTextEdit
-)
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+# Opcional SciPy (acelera Worley e Voronoi). Sem ele, usamos força bruta vetorizada em blocos.
+try:
+    from scipy.spatial import cKDTree
+    from scipy.ndimage import distance_transform_edt
+    SCIPY_OK = True
+except Exception:
+    SCIPY_OK = False
+
+# Opcional PyQt5 (só a janela precisa dele). Sem ele o módulo continua importável:
+# geradores, generate() e draw_result() rodam em servidores (ver Procedural_batch.py).
+try:
+    from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+    from PyQt5.QtWidgets import (
+        QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+        QLabel, QPushButton, QComboBox, QSpinBox, QDoubleSpinBox, QCheckBox,
+        QGroupBox, QFormLayout, QSlider, QFileDialog, QTextEdit, QInputDialog,
+        QProgressBar
+    )
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+    QT_OK = True
+except Exception:
+    QT_OK = False
+    # bases neutras só para as classes da interface poderem ser definidas
+    QThread = QWidget = QMainWindow = object
+    def pyqtSignal(*types):
+        return None
 
 # ------------------------
 # Utilidades matemáticas
@@ -37,21 +70,105 @@ def lerp(a, b, t):
 def smoothstep(t):
     return t*t*(3.0 - 2.0*t)
 
+# ------------------------
+# ESCALONADOR MULTIPROCESSO
+# ------------------------
+
+_POOLS = {}
+
+# Sem fork: na interface o pool nasce dentro de uma QThread, e fazer fork de
+# um processo com várias threads pode travar o filho. As tarefas são funções
+# de módulo, então chegam aos workers por pickle.
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+def get_pool(workers):
+    """Pool de processos reaproveitado entre chamadas (um por número de workers)"""
+    pool = _POOLS.get(workers)
+    if pool is None:
+        pool = _POOLS[workers] = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context(POOL_START_METHOD))
+    return pool
+
+def shutdown_pools():
+    for pool in _POOLS.values():
+        pool.shutdown(cancel_futures=True)
+    _POOLS.clear()
+
+class GenerationCancelled(Exception):
+    """Levantada pelo callback de progresso para interromper um gerador"""
+
+def report(progress, fraction):
+    """Chama o callback de progresso (se houver) com uma fração em [0, 1]"""
+    if progress is not None:
+        progress(min(1.0, max(0.0, fraction)))
+
+def run_chunks(fn, tasks, workers=None, progress=None):
+    """Executa fn(*task) para cada task e devolve os resultados na ordem das tasks.
+
+    Com workers > 1 as tasks vão para um pool de processos; fn precisa ser
+    uma função de módulo (picklable). A divisão em tasks é sempre a mesma
+    do caminho serial, e quem chama combina os resultados em ordem fixa,
+    então o resultado não depende do número de workers. progress(fração)
+    é chamado a cada task concluída; se ele levantar uma exceção, as tasks
+    pendentes são canceladas.
+    """
+    tasks = list(tasks)
+    results = []
+    if not workers or workers <= 1 or len(tasks) <= 1:
+        for i, t in enumerate(tasks):
+            results.append(fn(*t))
+            report(progress, (i + 1) / len(tasks))
+        return results
+    futures = [get_pool(workers).submit(fn, *t) for t in tasks]
+    try:
+        for i, f in enumerate(futures):
+            results.append(f.result())
+            report(progress, (i + 1) / len(tasks))
+    except BaseException:
+        for f in futures:
+            f.cancel()
+        raise
+    return results
+
 # ------------------------
 # PERLIN NOISE (2D / 3D)
 # ------------------------
 
+def _periodic_cells(length, scale):
+    """Número inteiro de células da grade periódica mais próximo de length / scale"""
+    return max(1, int(round(length / scale)))
+
 class Perlin2D:
-    def __init__(self, w, h, seed=0):
+    """Grade de gradientes w x h células.
+
+    Com periodic=True a grade tem exatamente w x h gradientes e os índices
+    dão a volta (módulo w e h): o ruído tem período w em x e h em y, e um
+    bloco de w x h células emenda com ele mesmo. Sem periodic a grade tem
+    (w+1) x (h+1) gradientes e os índices são truncados no limite superior.
+    """
+    def __init__(self, w, h, seed=0, periodic=False):
         self.w = w
         self.h = h
+        self.periodic = periodic
         rng = np.random.RandomState(seed)
-        self.grad = rng.rand(w+1, h+1, 2)*2 - 1
+        gw, gh = (w, h) if periodic else (w+1, h+1)
+        self.grad = rng.rand(gw, gh, 2)*2 - 1
         norms = np.linalg.norm(self.grad, axis=2, keepdims=True)
         norms[norms == 0] = 1.0
         self.grad /= norms
 
+    def _corners(self, i, n):
+        """Índices de gradiente (g0, g1) e posições de referência (r0, r1) dos cantos i e i+1"""
+        if self.periodic:
+            return i % n, (i + 1) % n, i, i + 1
+        c0, c1 = np.minimum(i, n), np.minimum(i + 1, n)
+        return c0, c1, c0, c1
+
     def dot_grid(self, ix, iy, x, y):
+        if self.periodic:
+            dx, dy = x - ix, y - iy
+            g = self.grad[ix % self.w, iy % self.h]
+            return dx*g[0] + dy*g[1]
         ix = int(min(ix, self.w))
         iy = int(min(iy, self.h))
         dx, dy = x - ix, y - iy
@@ -73,7 +190,120 @@ class Perlin2D:
         ix1 = lerp(n01, n11, sx)
         return lerp(ix0, ix1, sy)
 
-def perlin_noise_2d_map(width=256, height=256, scale=60.0, octaves=4, persistence=0.5, lacunarity=2.0, seed=0):
+    def sample_many(self, xs, ys):
+        """Amostra pontos arbitrários em lote (xs e ys com o mesmo shape).
+
+        Mesmas operações de sample() em float64, com os gradientes dos quatro
+        cantos buscados por fancy indexing; o resultado tem o shape de xs.
+        """
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=np.float64),
+                                     np.asarray(ys, dtype=np.float64))
+        x0 = np.floor(xs).astype(np.intp)
+        y0 = np.floor(ys).astype(np.intp)
+        sx = smoothstep(xs - x0)
+        sy = smoothstep(ys - y0)
+        ix0, ix1, rx0, rx1 = self._corners(x0, self.w)
+        iy0, iy1, ry0, ry1 = self._corners(y0, self.h)
+        dx0, dx1 = xs - rx0, xs - rx1
+        dy0, dy1 = ys - ry0, ys - ry1
+        gx = self.grad[..., 0]
+        gy = self.grad[..., 1]
+
+        def edge(iy, dy):
+            n0 = dx0*gx[ix0, iy] + dy*gy[ix0, iy]
+            n1 = dx1*gx[ix1, iy] + dy*gy[ix1, iy]
+            n1 -= n0; n1 *= sx; n1 += n0
+            return n1
+
+        a0 = edge(iy0, dy0)
+        a1 = edge(iy1, dy1)
+        a1 -= a0; a1 *= sy; a1 += a0
+        return a1
+
+    def sample_grid(self, xs, ys):
+        """Amostra a grade separável xs (colunas) x ys (linhas) de uma vez.
+
+        Equivale a chamar sample(x, y) para cada par, com as mesmas operações
+        em float64 (resultado bit a bit idêntico), retornando (len(ys), len(xs)).
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        x0 = np.floor(xs).astype(np.intp)
+        y0 = np.floor(ys).astype(np.intp)
+        sx = smoothstep(xs - x0)
+        sy = smoothstep(ys - y0)[:, None]
+        # mesmo clamp (ou volta, se periódico) de dot_grid
+        ix0, ix1, rx0, rx1 = self._corners(x0, self.w)
+        iy0, iy1, ry0, ry1 = self._corners(y0, self.h)
+        dx0, dx1 = xs - rx0, xs - rx1
+        dy0, dy1 = (ys - ry0)[:, None], (ys - ry1)[:, None]
+        # componentes transpostas (linha = iy): gather em dois passos baratos
+        gx = self.grad[..., 0].T
+        gy = self.grad[..., 1].T
+
+        def row(iy, dy):
+            rx, ry = gx[iy], gy[iy]
+            n0 = dx0*rx[:, ix0] + dy*ry[:, ix0]
+            n1 = dx1*rx[:, ix1] + dy*ry[:, ix1]
+            # lerp(n0, n1, sx) in-place
+            n1 -= n0; n1 *= sx; n1 += n0
+            return n1
+
+        a0 = row(iy0, dy0)
+        a1 = row(iy1, dy1)
+        a1 -= a0; a1 *= sy; a1 += a0
+        return a1
+
+def _perlin_octave(width, height, scale, seed, window, frequency, amplitude, periodic=False):
+    x0, y0, w, h = window
+    xs = np.arange(x0, x0 + w)
+    ys = np.arange(y0, y0 + h)
+    if periodic:
+        # número inteiro de células por período do mapa em cada oitava
+        cx = _periodic_cells(width * frequency, scale)
+        cy = _periodic_cells(height * frequency, scale)
+        perlin = Perlin2D(cx, cy, seed=seed, periodic=True)
+        return perlin.sample_grid(xs * cx / width, ys * cy / height) * amplitude
+    perlin = Perlin2D(int(width/scale)+2, int(height/scale)+2, seed=seed)
+    return perlin.sample_grid(xs / scale * frequency, ys / scale * frequency) * amplitude
+
+def perlin_noise_2d_map(width=256, height=256, scale=60.0, octaves=4, persistence=0.5, lacunarity=2.0, seed=0, window=None,
+                        periodic=False, workers=None, progress=None):
+    """Perlin fractal vetorizado: cada oitava é avaliada na grade inteira.
+
+    Produz o mesmo mapa que perlin_noise_2d_map_loop (mesma seed, mesmas
+    operações em float64 acumuladas em float32). window=(x0, y0, w, h)
+    calcula só esse recorte do mapa width x height. Com workers > 1 as
+    oitavas são calculadas em processos e somadas na ordem serial.
+
+    periodic=True faz o mapa width x height emendar com ele mesmo: cada
+    oitava usa uma grade periódica com um número inteiro de células por
+    período (a escala é arredondada para isso).
+    """
+    window = window or (0, 0, width, height)
+    tasks = []
+    amplitude = 1.0
+    frequency = 1.0
+    max_amp = 0.0
+    for _ in range(octaves):
+        tasks.append((width, height, scale, seed, window, frequency, amplitude, periodic))
+        max_amp += amplitude
+        amplitude *= persistence
+        frequency *= lacunarity
+    noise = np.zeros((window[3], window[2]), dtype=np.float32)
+    if workers and workers > 1:
+        for layer in run_chunks(_perlin_octave, tasks, workers, progress):
+            noise += layer
+    else:
+        for i, task in enumerate(tasks):
+            noise += _perlin_octave(*task)
+            report(progress, (i + 1) / len(tasks))
+    if max_amp > 0:
+        noise = (noise + max_amp) / (2.0 * max_amp)
+    return np.clip(noise, 0, 1)
+
+def perlin_noise_2d_map_loop(width=256, height=256, scale=60.0, octaves=4, persistence=0.5, lacunarity=2.0, seed=0):
+    """Versão de referência pixel a pixel (lenta), mantida para validação e benchmark."""
     perlin = Perlin2D(int(width/scale)+2, int(height/scale)+2, seed=seed)
     noise = np.zeros((height, width), dtype=np.float32)
     amplitude = 1.0
@@ -92,54 +322,251 @@ def perlin_noise_2d_map(width=256, height=256, scale=60.0, octaves=4, persistenc
         noise = (noise + max_amp) / (2.0 * max_amp)
     return np.clip(noise, 0, 1)
 
-def domain_warping_map(width=256, height=256, base_scale=60.0, warp_scale=30.0, warp_strength=1.5, seed=0):
-    warp_u = perlin_noise_2d_map(width, height, scale=warp_scale, octaves=3, seed=seed)
-    warp_v = perlin_noise_2d_map(width, height, scale=warp_scale*1.1, octaves=3, seed=seed+1337)
+def perlin_fbm_many(perlin, xs, ys, octaves=4, persistence=0.5, lacunarity=2.0):
+    """Soma fractal (fBm) de Perlin em coordenadas arbitrárias, normalizada em [0, 1].
+
+    xs/ys já estão em unidades da grade de gradientes (pixel / escala).
+    """
+    noise = np.zeros(np.broadcast(xs, ys).shape, dtype=np.float64)
+    amplitude = 1.0
+    frequency = 1.0
+    max_amp = 0.0
+    for _ in range(octaves):
+        noise += perlin.sample_many(xs * frequency, ys * frequency) * amplitude
+        max_amp += amplitude
+        amplitude *= persistence
+        frequency *= lacunarity
+    if max_amp > 0:
+        noise = (noise + max_amp) / (2.0 * max_amp)
+    return np.clip(noise, 0, 1)
+
+def _domain_warp_fields(width, height, warp_scale, seed, window=None, periodic=False):
+    warp_u = perlin_noise_2d_map(width, height, scale=warp_scale, octaves=3, seed=seed, window=window,
+                                 periodic=periodic)
+    warp_v = perlin_noise_2d_map(width, height, scale=warp_scale*1.1, octaves=3, seed=seed+1337, window=window,
+                                 periodic=periodic)
+    return warp_u, warp_v
+
+def _warp_lattice(width, height, scale, seed, periodic=False):
+    """Perlin2D de uma camada do warp e os divisores pixel -> grade em x e y"""
+    if periodic:
+        cx, cy = _periodic_cells(width, scale), _periodic_cells(height, scale)
+        return Perlin2D(cx, cy, seed=seed, periodic=True), width / cx, height / cy
+    return Perlin2D(int(width/scale)+2, int(height/scale)+2, seed=seed), scale, scale
+
+@functools.lru_cache(maxsize=8)
+def domain_warp_fields(width, height, warp_scale, seed, periodic=False):
+    """Campos de deslocamento (u, v) em [0, 1] do primeiro nível de warp.
+
+    Não dependem de warp_strength, então ficam em cache: mudar só a força
+    reaproveita os campos. Os arrays retornados são somente leitura.
+    """
+    warp_u, warp_v = _domain_warp_fields(width, height, warp_scale, seed, periodic=periodic)
+    warp_u.flags.writeable = False
+    warp_v.flags.writeable = False
+    return warp_u, warp_v
+
+def domain_warping_map(width=256, height=256, base_scale=60.0, warp_scale=30.0, warp_strength=1.5, seed=0, levels=1,
+                       window=None, normalize=True, periodic=False, progress=None):
+    """Domain warping vetorizado: campo de warp -> coordenadas deslocadas -> ruído base.
+
+    Com levels > 1 o próprio campo de warp é reamostrado nas coordenadas já
+    deslocadas (warp de um warp). Os campos do primeiro nível vêm do cache de
+    domain_warp_fields; os níveis seguintes dependem de warp_strength e são
+    recalculados.
+
+    As coordenadas deslocadas são calculadas em float64; a versão escalar
+    antiga operava em float32, então os mapas diferem em até ~1e-6.
+
+    window=(x0, y0, w, h) calcula só um recorte (sem passar pelo cache) e
+    normalize=False devolve o ruído cru, antes do min/max global.
+
+    periodic=True usa grades periódicas em todas as camadas: os campos de
+    warp são periódicos e as coordenadas deslocadas caem de novo na grade
+    periódica do ruído base, então o mapa emenda com ele mesmo.
+    """
+    if window is None:
+        warp_u, warp_v = domain_warp_fields(width, height, float(warp_scale), seed, periodic)
+        x0, y0, w, h = 0, 0, width, height
+    else:
+        warp_u, warp_v = _domain_warp_fields(width, height, warp_scale, seed, window, periodic)
+        x0, y0, w, h = window
     du = (warp_u * 2.0 - 1.0) * warp_strength
     dv = (warp_v * 2.0 - 1.0) * warp_strength
-    base = Perlin2D(int(width/base_scale)+2, int(height/base_scale)+2, seed=seed+7)
-    out = np.zeros((height, width), dtype=np.float32)
-    for y in range(height):
-        for x in range(width):
-            sx = (x + du[y, x]) / base_scale
-            sy = (y + dv[y, x]) / base_scale
-            out[y, x] = base.sample(sx, sy)
-    out = (out - out.min()) / (out.max() - out.min() + 1e-8)
+    y, x = np.mgrid[y0:y0+h, x0:x0+w]
+    report(progress, 1 / (levels + 1))
+    for level in range(1, levels):
+        pu, ux, uy = _warp_lattice(width, height, warp_scale, seed+101*level, periodic)
+        pv, vx, vy = _warp_lattice(width, height, warp_scale*1.1, seed+1337+101*level, periodic)
+        wx = x + du
+        wy = y + dv
+        du = (perlin_fbm_many(pu, wx / ux, wy / uy, octaves=3) * 2.0 - 1.0) * warp_strength
+        dv = (perlin_fbm_many(pv, wx / vx, wy / vy, octaves=3) * 2.0 - 1.0) * warp_strength
+        report(progress, (level + 1) / (levels + 1))
+    base, bx, by = _warp_lattice(width, height, base_scale, seed+7, periodic)
+    sx = (x + du) / bx
+    sy = (y + dv) / by
+    out = base.sample_many(sx, sy).astype(np.float32)
+    if normalize:
+        out = (out - out.min()) / (out.max() - out.min() + 1e-8)
     return out
 
 # ------------------------
 # WORLEY (CELL) NOISE
 # ------------------------
 
-def worley_noise_2d(width=256, height=256, num_points=50, seed=0, mode=1):
+def _periodic_images(pts, width, height):
+    """Os pontos e suas 8 cópias deslocadas de ±width/±height (distância no toro)"""
+    shifts = np.array([(dx*width, dy*height) for dx in (0, -1, 1) for dy in (0, -1, 1)], dtype=np.float64)
+    return (pts[None, :, :] + shifts[:, None, :]).reshape(-1, 2)
+
+def worley_features(width=256, height=256, num_points=50, seed=0, tile=32, batch=256, window=None, periodic=False,
+                    progress=None):
+    """Distâncias F1 e F2 de cada pixel aos pontos de feature, numa única passada.
+
+    A imagem é dividida em blocos tile x tile. Para cada bloco, o cKDTree
+    seleciona só os pontos que podem ser F1/F2 de algum pixel do bloco
+    (raio F2(centro) + 2 * meia-diagonal); depois um mínimo corrente sobre
+    esses candidatos é feito em lote para vários blocos. Sem SciPy todos os
+    pontos são candidatos. Retorna (f1, f2) em float32 com shape
+    (height, width), iguais à ordenação completa por pixel; com
+    window=(x0, y0, w, h), só o recorte (h, w).
+
+    periodic=True mede as distâncias no toro width x height (os pontos
+    entram com as 8 cópias vizinhas), então o mapa emenda com ele mesmo.
+    """
     rng = np.random.RandomState(seed)
     pts = rng.rand(num_points, 2)
     pts[:, 0] *= width
     pts[:, 1] *= height
-    img = np.zeros((height, width), dtype=np.float32)
-    for y in range(height):
-        for x in range(width):
-            d = np.sqrt((pts[:,0] - x)**2 + (pts[:,1] - y)**2)
-            d.sort()
-            val = d[0] if mode == 1 else d[min(1, len(d)-1)]
-            img[y, x] = val
-    img = (img - img.min()) / (img.max() - img.min() + 1e-8)
+    if periodic:
+        pts = _periodic_images(pts, width, height)
+        num_points = len(pts)
+    x0, y0, width, height = window or (0, 0, width, height)
+    k = min(2, num_points)
+    ty, tx = -(-height // tile), -(-width // tile)
+    n_tiles = ty * tx
+
+    if SCIPY_OK:
+        tree = cKDTree(pts)
+        cy, cx = np.divmod(np.arange(n_tiles), tx)
+        centers = np.column_stack([x0 + cx*tile + (tile-1)/2.0, y0 + cy*tile + (tile-1)/2.0])
+        dc, _ = tree.query(centers, k=k)
+        dk = dc[:, -1] if k > 1 else dc
+        cand = tree.query_ball_point(centers, dk + (tile-1)*math.sqrt(2.0) + 1e-6)
+        counts = np.array([len(c) for c in cand])
+        idx = np.full((n_tiles, counts.max()), num_points)
+        for i, c in enumerate(cand):
+            idx[i, :len(c)] = c
+    else:
+        counts = np.full(n_tiles, num_points)
+        idx = np.broadcast_to(np.arange(num_points), (n_tiles, num_points))
+    # índice num_points aponta para um ponto no infinito (preenchimento)
+    padded = np.vstack([pts, [[np.inf, np.inf]]])
+    cand_x, cand_y = padded[idx, 0], padded[idx, 1]
+
+    f1 = np.empty((ty, tile, tx, tile), dtype=np.float32)
+    f2 = np.empty((ty, tile, tx, tile), dtype=np.float32)
+    off = np.arange(tile)
+    for b0 in range(0, n_tiles, batch):
+        b1 = min(n_tiles, b0 + batch)
+        rows, cols = np.divmod(np.arange(b0, b1), tx)
+        dx2 = (cand_x[b0:b1, None, :] - (x0 + cols[:, None]*tile + off)[:, :, None])**2
+        dy2 = (cand_y[b0:b1, None, :] - (y0 + rows[:, None]*tile + off)[:, :, None])**2
+        shape = (b1 - b0, tile, tile)
+        d1 = np.full(shape, np.inf)
+        d2 = np.full(shape, np.inf)
+        d = np.empty(shape)
+        tmp = np.empty(shape)
+        # distâncias ao quadrado; sqrt só no final (monótona)
+        for m in range(counts[b0:b1].max()):
+            np.add(dx2[:, None, :, m], dy2[:, :, None, m], out=d)
+            np.maximum(d1, d, out=tmp)
+            np.minimum(d2, tmp, out=d2)
+            np.minimum(d1, d, out=d1)
+        f1[rows, :, cols, :] = np.sqrt(d1)
+        f2[rows, :, cols, :] = np.sqrt(d2 if k > 1 else d1)
+        report(progress, b1 / n_tiles)
+    f1 = f1.reshape(ty*tile, tx*tile)[:height, :width]
+    f2 = f2.reshape(ty*tile, tx*tile)[:height, :width]
+    return f1, f2
+
+def worley_noise_2d(width=256, height=256, num_points=50, seed=0, mode=1, window=None, normalize=True, periodic=False,
+                    workers=None, progress=None):
+    """Worley normalizado em [0, 1]: mode 1 = F1, 2 = F2, 3 = F2 - F1 (bordas das células).
+
+    Com workers > 1 o mapa é dividido em blocos calculados em processos.
+    """
+    if workers and workers > 1 and window is None:
+        kind = {1: "worley_f1", 2: "worley_f2"}.get(mode, "worley_f2f1")
+        return tiled_map(kind, width, height, workers=workers, normalize=normalize, progress=progress,
+                         num_points=num_points, seed=seed, periodic=periodic)
+    f1, f2 = worley_features(width, height, num_points, seed, window=window, periodic=periodic, progress=progress)
+    if mode == 1:
+        img = f1
+    elif mode == 2:
+        img = f2
+    else:
+        img = f2 - f1
+    if normalize:
+        img = (img - img.min()) / (img.max() - img.min() + 1e-8)
     return img
 
 # ------------------------
 # VORONOI
 # ------------------------
 
-def voronoi_distance_map(width=256, height=256, num_points=30, seed=0):
+def voronoi_maps(width=256, height=256, num_points=30, seed=0, fast=True, chunk_rows=256, window=None, progress=None):
+    """Mapa de distâncias e mapa de células (rótulos) de um diagrama de Voronoi.
+
+    fast=True rasteriza as sementes no pixel mais próximo e roda uma transformada
+    de distância euclidiana exata (distance_transform_edt com return_indices),
+    em tempo linear; as distâncias são até a semente rasterizada (erro <= 0.71 px).
+    fast=False mede até a posição exata de cada semente (cKDTree, ou força bruta
+    em blocos sem SciPy). Retorna (dist float32, labels int32), com labels[y, x]
+    igual ao índice da semente mais próxima.
+
+    window=(x0, y0, w, h) calcula só um recorte e sempre usa o modo exato
+    (a EDT precisa enxergar todas as sementes de uma vez). Se duas sementes
+    caírem no mesmo pixel, uma célula sumiria no modo rápido; nesse caso
+    também vale o modo exato.
+    """
     rng = np.random.RandomState(seed)
     pts = rng.rand(num_points, 2)
     pts[:, 0] *= width
     pts[:, 1] *= height
-    img = np.zeros((height, width), dtype=np.float32)
-    for y in range(height):
-        for x in range(width):
-            d = np.sqrt((pts[:,0] - x)**2 + (pts[:,1] - y)**2)
-            img[y, x] = np.min(d)
+    x0, y0, width, height = window or (0, 0, width, height)
+    if fast and SCIPY_OK and window is None:
+        rx = np.clip(np.rint(pts[:, 0]).astype(np.intp), 0, width-1)
+        ry = np.clip(np.rint(pts[:, 1]).astype(np.intp), 0, height-1)
+        fast = len(np.unique(ry*width + rx)) == num_points
+    if fast and SCIPY_OK and window is None:
+        seed_ids = np.full((height, width), -1, dtype=np.int32)
+        seed_ids[ry, rx] = np.arange(num_points, dtype=np.int32)
+        dist, (iy, ix) = distance_transform_edt(seed_ids < 0, return_indices=True)
+        return dist.astype(np.float32), seed_ids[iy, ix]
+
+    dist = np.empty((height, width), dtype=np.float32)
+    labels = np.empty((height, width), dtype=np.int32)
+    tree = cKDTree(pts) if SCIPY_OK else None
+    for r0 in range(0, height, chunk_rows):
+        r1 = min(height, r0 + chunk_rows)
+        gy, gx = np.mgrid[y0+r0:y0+r1, x0:x0+width]
+        if tree is not None:
+            d, i = tree.query(np.column_stack([gx.ravel(), gy.ravel()]).astype(np.float64))
+            dist[r0:r1] = d.reshape(r1 - r0, width)
+            labels[r0:r1] = i.reshape(r1 - r0, width)
+        else:
+            for r in range(r0, r1):
+                d = np.sqrt((pts[:, 0][None, :] - gx[0][:, None])**2 + (pts[:, 1][None, :] - (y0 + r))**2)
+                labels[r] = np.argmin(d, axis=1)
+                dist[r] = d[np.arange(width), labels[r]]
+        report(progress, r1 / height)
+    return dist, labels
+
+def voronoi_distance_map(width=256, height=256, num_points=30, seed=0, fast=True):
+    """Distância à semente mais próxima, normalizada em [0, 1] (ver voronoi_maps)"""
+    img, _ = voronoi_maps(width, height, num_points, seed, fast=fast)
     img = (img - img.min()) / (img.max() - img.min() + 1e-8)
     return img
 
@@ -147,88 +574,482 @@ def voronoi_distance_map(width=256, height=256, num_points=30, seed=0):
 # MAZE
 # ------------------------
 
-def maze_recursive_backtracker(w=30, h=20, seed=0):
+# Direções (dr, dc) e as 24 ordens possíveis delas: sorteia-se uma ordem por passo
+MAZE_DIRS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+MAZE_PERMS = tuple(itertools.permutations(range(4)))
+
+def _maze_moves(w, h):
+    """Deslocamentos no índice plano das células e da grade de saída, por direção"""
+    W = 2*w + 1
+    dcell = [dr*w + dc for dr, dc in MAZE_DIRS]
+    dgrid = [dr*W + dc for dr, dc in MAZE_DIRS]
+    return dcell, dgrid
+
+def maze_recursive_backtracker(w=30, h=20, seed=0, progress=None):
+    """Retrocesso recursivo com pilha de inteiros pré-alocada e grade plana.
+
+    As ordens de direção vêm de MAZE_PERMS, sorteadas em blocos de tamanho
+    fixo (uma por passo), em vez de embaralhar uma lista nova a cada célula.
+    """
     rng = np.random.RandomState(seed)
-    W, H = w*2+1, h*2+1
-    grid = np.ones((H, W), dtype=np.uint8)
-    visited = np.zeros((h, w), dtype=bool)
-    stack = []
-    cr, cc = rng.randint(0, h), rng.randint(0, w)
-    stack.append((cr, cc))
-    visited[cr, cc] = True
-    grid[cr*2+1, cc*2+1] = 0
-
-    def get_neighbors(r, c):
-        dirs = [(0,1),(0,-1),(1,0),(-1,0)]
-        rng.shuffle(dirs)
-        result = []
-        for dr, dc in dirs:
-            nr, nc = r+dr, c+dc
-            if 0 <= nr < h and 0 <= nc < w and not visited[nr, nc]:
-                result.append((nr, nc, dr, dc))
-        return result
-
-    while stack:
-        r, c = stack[-1]
-        neighbors = get_neighbors(r, c)
-        if neighbors:
-            nr, nc, dr, dc = neighbors[0]
-            visited[nr, nc] = True
-            grid[r*2+1+dr, c*2+1+dc] = 0
-            grid[nr*2+1, nc*2+1] = 0
-            stack.append((nr, nc))
+    n = w*h
+    W = 2*w + 1
+    grid = np.ones((2*h + 1) * W, dtype=np.uint8)
+    visited = bytearray(n)
+    stack = [0] * n
+    dcell, dgrid = _maze_moves(w, h)
+    # um sorteio por passo do laço: n-1 empilhamentos + n desempilhamentos
+    # = 2n-1 passos, tirados em blocos para não montar uma lista de 2n itens
+    buf, k = [], 0
+    
+    start = rng.randint(0, n)
+    stack[0] = start
+    sp = 1
+    visited[start] = 1
+    grid[(2*(start // w) + 1)*W + 2*(start % w) + 1] = 0
+    carved = 1
+    while sp:
+        i = stack[sp - 1]
+        r, c = divmod(i, w)
+        g = (2*r + 1)*W + 2*c + 1
+        if k == len(buf):
+            buf, k = rng.randint(0, len(MAZE_PERMS), size=65536).tolist(), 0
+        order = MAZE_PERMS[buf[k]]
+        k += 1
+        for d in order:
+            dr, dc = MAZE_DIRS[d]
+            if 0 <= r + dr < h and 0 <= c + dc < w:
+                j = i + dcell[d]
+                if not visited[j]:
+                    visited[j] = 1
+                    grid[g + dgrid[d]] = 0
+                    grid[g + 2*dgrid[d]] = 0
+                    stack[sp] = j
+                    sp += 1
+                    carved += 1
+                    if carved % 65536 == 0:
+                        report(progress, carved / n)
+                    break
         else:
-            stack.pop()
-    return grid
+            sp -= 1
+    return grid.reshape(2*h + 1, W)
+
+def maze_wilson(w=30, h=20, seed=0, progress=None):
+    """Algoritmo de Wilson: passeios aleatórios com apagamento de laços.
+
+    Gera uma árvore geradora uniforme (todos os labirintos perfeitos são
+    igualmente prováveis). O passeio guarda só a última direção de saída de
+    cada célula, o que já apaga os laços.
+    """
+    rng = np.random.RandomState(seed)
+    n = w*h
+    W = 2*w + 1
+    grid = np.ones((2*h + 1) * W, dtype=np.uint8)
+    in_tree = bytearray(n)
+    exit_dir = bytearray(n)
+    dcell, dgrid = _maze_moves(w, h)
+    
+    def cell_grid(i):
+        return (2*(i // w) + 1)*W + 2*(i % w) + 1
+    
+    root = rng.randint(0, n)
+    in_tree[root] = 1
+    grid[cell_grid(root)] = 0
+    done = 1
+    # um aviso de progresso a cada 1/64 das células (na interface cada um é um sinal Qt)
+    report_every = max(1, n // 64)
+    next_report = report_every
+    buf, k = [], 0
+    for start in rng.permutation(n).tolist():
+        if in_tree[start]:
+            continue
+        # passeio até encontrar a árvore
+        i = start
+        while not in_tree[i]:
+            r, c = divmod(i, w)
+            while True:
+                if k == len(buf):
+                    buf, k = rng.randint(0, 4, size=65536).tolist(), 0
+                d = buf[k]
+                k += 1
+                dr, dc = MAZE_DIRS[d]
+                if 0 <= r + dr < h and 0 <= c + dc < w:
+                    break
+            exit_dir[i] = d
+            i += dcell[d]
+        # refaz o caminho sem laços, escavando e incorporando à árvore
+        i = start
+        while not in_tree[i]:
+            d = exit_dir[i]
+            g = cell_grid(i)
+            in_tree[i] = 1
+            grid[g] = 0
+            grid[g + dgrid[d]] = 0
+            i += dcell[d]
+            done += 1
+        if done >= next_report:
+            report(progress, done / n)
+            next_report = done + report_every
+    return grid.reshape(2*h + 1, W)
+
+def maze_eller_rows(w=30, h=20, seed=0, progress=None):
+    """Algoritmo de Eller linha a linha: gera as 2h+1 linhas da grade de saída.
+
+    Só guarda os conjuntos da linha atual (memória O(w)), então labirintos
+    enormes podem ser gravados em disco enquanto são gerados.
+    """
+    rng = np.random.RandomState(seed)
+    W = 2*w + 1
+    yield np.ones(W, dtype=np.uint8)
+    sets = np.arange(w)
+    next_set = w
+    parent = {}
+    
+    def find(a):
+        while parent.get(a, a) != a:
+            a = parent[a]
+        return a
+    
+    for r in range(h):
+        last = r == h - 1
+        # junções horizontais entre conjuntos diferentes (union-find da linha)
+        parent.clear()
+        row = np.ones(W, dtype=np.uint8)
+        row[1::2] = 0
+        join = (np.ones(w - 1, dtype=bool) if last else rng.rand(w - 1) < 0.5).tolist()
+        labels = sets.tolist()
+        for c in range(w - 1):
+            if join[c]:
+                a, b = find(labels[c]), find(labels[c + 1])
+                if a != b:
+                    parent[b] = a
+                    row[2*c + 2] = 0
+        sets = np.array([find(a) for a in labels])
+        yield row
+        
+        below = np.ones(W, dtype=np.uint8)
+        if last:
+            yield below
+            break
+        # descidas: cada conjunto desce pelo menos uma vez
+        _, inv = np.unique(sets, return_inverse=True)
+        down = rng.rand(w) < 0.5
+        has_down = np.bincount(inv, weights=down) > 0
+        order = np.lexsort((rng.rand(w), inv))
+        first = order[np.r_[0, np.flatnonzero(np.diff(inv[order])) + 1]]
+        down[first[~has_down]] = True
+        below[1::2][down] = 0
+        yield below
+        
+        # quem não desceu começa um conjunto novo na próxima linha
+        fresh = np.flatnonzero(~down)
+        sets = sets.copy()
+        sets[fresh] = next_set + np.arange(len(fresh))
+        next_set += len(fresh)
+        if r % 64 == 0:
+            report(progress, r / h)
+
+def maze_eller(w=30, h=20, seed=0, progress=None):
+    """Labirinto de Eller montado numa grade (2h+1, 2w+1)"""
+    return np.vstack(list(maze_eller_rows(w, h, seed, progress)))
+
+MAZE_ALGORITHMS = {
+    "Backtracker": maze_recursive_backtracker,
+    "Wilson": maze_wilson,
+    "Eller": maze_eller,
+}
+
+def write_maze_png(path, w, h, seed=0, algorithm="Eller", progress=None):
+    """Grava um labirinto w x h células como PNG (parede preta, passagem branca).
+
+    Com Eller as linhas vão direto para o PNGStreamWriter sem montar a grade;
+    os outros algoritmos precisam da grade inteira em memória.
+    """
+    if algorithm == "Eller":
+        rows = maze_eller_rows(w, h, seed, progress)
+    else:
+        rows = iter(MAZE_ALGORITHMS[algorithm](w, h, seed, progress))
+    with PNGStreamWriter(path, 2*w + 1, 2*h + 1) as png:
+        for row in rows:
+            png.write_rows((1 - row[None, :]) * 255)
 
 # ------------------------
 # DLA
 # ------------------------
 
-def dla(grid_size=256, num_particles=1500, seed=0):
+# 8 direções de passo dos caminhantes
+DLA_STEPS = np.array([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+
+# Saltos longe do aglomerado: distância exata até DLA_NEAR células e, além
+# disso, blocos de DLA_BLOCKS com o entorno 3x3 vazio
+DLA_NEAR = 12
+DLA_BLOCKS = (16, 64)
+
+def dla(grid_size=256, num_particles=1500, seed=0, stickiness=1.0, bias=0.0, walkers=2048,
+        max_rounds=None, progress=None):
+    """DLA com milhares de caminhantes avançando juntos como arrays.
+
+    num_particles é o número de partículas agregadas (além da semente
+    central). A adesão é testada contra uma máscara dilatada da ocupação
+    (vizinhança 3x3 do aglomerado), atualizada a cada partícula que gruda.
+    Os caminhantes nascem num círculo logo fora do raio atual do aglomerado
+    e renascem se passam do raio de descarte, então o raio de lançamento
+    acompanha o aglomerado em vez de ficar na borda da grade.
+
+    Longe do aglomerado o passo vira um salto em direção aleatória: até a
+    folga para o raio atual, até a distância ao aglomerado (mantida de forma
+    incremental até DLA_NEAR células) ou até o tamanho do maior bloco de
+    DLA_BLOCKS cujo entorno 3x3 de blocos está vazio (atravessa os fiordes).
+
+    stickiness: probabilidade de grudar ao tocar o aglomerado (menor = mais denso)
+    bias: probabilidade de o passo ir na direção do centro (deriva)
+    walkers: máximo de caminhantes simultâneos
+    """
     rng = np.random.RandomState(seed)
-    grid = np.zeros((grid_size, grid_size), dtype=np.uint8)
-    cx, cy = grid_size//2, grid_size//2
-    grid[cy, cx] = 1
-    spawn_radius = max(2, grid_size//2 - 3)
-
-    for _ in range(num_particles):
-        ang = rng.rand() * 2*math.pi
-        x = int(cx + spawn_radius * math.cos(ang))
-        y = int(cy + spawn_radius * math.sin(ang))
-        x = np.clip(x, 1, grid_size-2)
-        y = np.clip(y, 1, grid_size-2)
-        
-        max_steps = grid_size * 4
-        steps = 0
-        while steps < max_steps:
-            steps += 1
-            dx = rng.randint(-1, 2)
-            dy = rng.randint(-1, 2)
-            nx, ny = x+dx, y+dy
-            if 0 <= nx < grid_size and 0 <= ny < grid_size:
-                if (grid[max(0,ny-1):min(grid_size,ny+2), max(0,nx-1):min(grid_size,nx+2)]).any():
-                    grid[y, x] = 1
-                    break
-                x, y = nx, ny
+    n = grid_size
+    grid = np.zeros((n, n), dtype=np.uint8)
+    sticky = np.zeros((n + 2, n + 2), dtype=bool)    # borda de 1 célula para a dilatação
+    cx, cy = n // 2, n // 2
+    limit = n // 2 - 2                                # raio máximo do aglomerado
+    # near[B][by+1, bx+1]: algum bloco BxB vizinho (3x3) tem partícula
+    blocks = [B for B in DLA_BLOCKS if 4 * B <= n]
+    near = {B: np.zeros(((n - 1) // B + 3, (n - 1) // B + 3), dtype=bool) for B in blocks}
+    # distância até a partícula mais próxima, limitada a DLA_NEAR (com borda)
+    R = DLA_NEAR
+    dist = np.full((n + 2*R, n + 2*R), R, dtype=np.float32)
+    oy, ox = np.mgrid[-R:R+1, -R:R+1]
+    patch = np.minimum(np.hypot(ox, oy), R).astype(np.float32)
+    
+    nb_y, nb_x = np.mgrid[0:3, 0:3].reshape(2, 1, 9)
+    
+    def attach(xs, ys):
+        grid[ys, xs] = 1
+        xs, ys = xs[:, None], ys[:, None]
+        sticky[ys + nb_y, xs + nb_x] = True
+        for B in blocks:
+            near[B][ys // B + nb_y, xs // B + nb_x] = True
+        for px, py in zip(xs[:, 0], ys[:, 0]):
+            window = dist[py:py + 2*R + 1, px:px + 2*R + 1]
+            np.minimum(window, patch, out=window)
+    
+    attach(np.array([cx]), np.array([cy]))
+    radius = 1.0
+    count = 0
+    
+    def launch(k):
+        r = min(radius + 3, limit)
+        ang = rng.rand(k) * 2*math.pi
+        xs = np.clip(np.rint(cx + r*np.cos(ang)).astype(np.intp), 0, n-1)
+        ys = np.clip(np.rint(cy + r*np.sin(ang)).astype(np.intp), 0, n-1)
+        return xs, ys
+    
+    x = y = np.zeros(0, dtype=np.intp)
+    rounds = 0
+    if max_rounds is None:
+        max_rounds = 200 * n
+    while count < num_particles and radius < limit and rounds < max_rounds:
+        rounds += 1
+        # Caminhantes simultâneos crescem com o perímetro do aglomerado; muitos
+        # de uma vez em volta da semente formariam um miolo compacto
+        active = min(walkers, num_particles - count, 16 + int(8*radius))
+        if active > len(x):
+            nx, ny = launch(active - len(x))
+            x = np.concatenate([x, nx])
+            y = np.concatenate([y, ny])
+        active = len(x)
+        # Tamanho do salto seguro: nada do aglomerado a menos de `reach` células
+        reach = np.maximum(np.hypot(x - cx, y - cy) - radius, dist[y + R, x + R]) - 3
+        for B in blocks:
+            clear = ~near[B][y // B + 1, x // B + 1]
+            reach = np.where(clear, np.maximum(reach, B - 2), reach)
+        jump = reach >= 2
+        
+        # Passo de uma célula, ou salto em direção aleatória
+        d = DLA_STEPS[rng.randint(0, 8, size=active)]
+        dx, dy = d[:, 0], d[:, 1]
+        ang = rng.rand(active) * 2*math.pi
+        if bias > 0:
+            # deriva: o passo (ou salto) vai na direção do centro
+            pull = rng.rand(active) < bias
+            dx = np.where(pull, np.sign(cx - x), dx)
+            dy = np.where(pull, np.sign(cy - y), dy)
+            ang = np.where(pull, np.arctan2(cy - y, cx - x), ang)
+        if jump.any():
+            length = np.floor(reach)
+            dx = np.where(jump, np.rint(length * np.cos(ang)).astype(np.intp), dx)
+            dy = np.where(jump, np.rint(length * np.sin(ang)).astype(np.intp), dy)
+        nx = np.minimum(np.maximum(x + dx, 0), n-1)
+        ny = np.minimum(np.maximum(y + dy, 0), n-1)
+        free = grid[ny, nx] == 0
+        x = np.where(free, nx, x)
+        y = np.where(free, ny, y)
+        
+        # Adesão: tocando o aglomerado (máscara dilatada) e numa célula livre
+        touch = sticky[y + 1, x + 1] & (grid[y, x] == 0)
+        if stickiness < 1.0:
+            touch &= rng.rand(active) < stickiness
+        idx = np.flatnonzero(touch)
+        if len(idx):
+            # uma partícula por célula; respeita o total pedido
+            cells, first = np.unique(y[idx] * n + x[idx], return_index=True)
+            idx = idx[np.sort(first)][:num_particles - count]
+            attach(x[idx], y[idx])
+            count += len(idx)
+            radius = max(radius, np.hypot(x[idx] - cx, y[idx] - cy).max())
+            report(progress, count / num_particles)
+        
+        # Renasce quem grudou e quem se afastou demais
+        kill_r = min(1.5*radius + 20, n)
+        reset = (x - cx)**2 + (y - cy)**2 > kill_r**2
+        reset[idx] = True
+        k = int(reset.sum())
+        if k:
+            x[reset], y[reset] = launch(k)
     return grid
 
 # ------------------------
 # K-MEANS
 # ------------------------
 
-def k_means_demo(n_points=200, k=5, seed=0):
+# A partir de quantos centróides a KD-tree ganha do produto matricial
+KMEANS_TREE_MIN_K = 32
+
+def _kmeans_assign(points, centroids, chunk=65536):
+    """Rótulo e distância² do centróide mais próximo, em blocos de `chunk` pontos.
+
+    Com muitos centróides (e SciPy) usa uma KD-tree sobre eles; senão,
+    distâncias por ||x||² - 2x·c + ||c||² bloco a bloco. A memória fica em
+    O(chunk·k).
+    """
+    n = len(points)
+    labels = np.empty(n, dtype=np.int32)
+    dist2 = np.empty(n, dtype=np.float64)
+    use_tree = SCIPY_OK and len(centroids) >= KMEANS_TREE_MIN_K
+    tree = cKDTree(centroids) if use_tree else None
+    c2 = (centroids.astype(np.float64)**2).sum(axis=1)
+    for i in range(0, n, chunk):
+        block = points[i:i+chunk].astype(np.float64, copy=False)
+        if tree is not None:
+            d, lab = tree.query(block)
+            dist2[i:i+chunk] = d*d
+        else:
+            d = c2[None, :] - 2.0 * block @ centroids.T
+            lab = np.argmin(d, axis=1)
+            dist2[i:i+chunk] = np.maximum(d[np.arange(len(block)), lab] + (block**2).sum(axis=1), 0)
+        labels[i:i+chunk] = lab
+    return labels, dist2
+
+def _kmeans_plus_plus(points, k, rng, sample=20000):
+    """Inicialização k-means++ sobre uma amostra de até `sample` pontos"""
+    if len(points) > sample:
+        points = points[rng.choice(len(points), sample, replace=False)]
+    points = points.astype(np.float64)
+    centroids = np.empty((k, points.shape[1]))
+    centroids[0] = points[rng.randint(len(points))]
+    d2 = ((points - centroids[0])**2).sum(axis=1)
+    for i in range(1, k):
+        total = d2.sum()
+        j = rng.choice(len(points), p=d2 / total) if total > 0 else rng.randint(len(points))
+        centroids[i] = points[j]
+        d2 = np.minimum(d2, ((points - centroids[i])**2).sum(axis=1))
+    return centroids
+
+def kmeans(points, k, seed=0, method="lloyd", init="k-means++", max_iter=100, tol=1e-4,
+           batch_size=4096, chunk=65536, progress=None):
+    """K-means escalável para milhões de pontos com memória limitada.
+
+    method:
+      "lloyd": atribuição exata (KD-tree sobre os centróides, em blocos) e
+               médias por bincount a cada iteração
+      "minibatch": atualizações com lotes de `batch_size` pontos e taxa
+               1/contagem por centróide (Sculley, 2010); a atribuição
+               final de todos os pontos é feita em blocos
+    Para quando o maior deslocamento de centróide fica abaixo de
+    tol * (desvio padrão dos dados). init: "k-means++" ou "random".
+    Retorna (labels, centroids, iterações).
+    """
+    rng = np.random.RandomState(seed)
+    points = np.asarray(points)
+    n, dim = points.shape
+    k = min(k, n)
+    if init == "k-means++":
+        centroids = _kmeans_plus_plus(points, k, rng)
+    else:
+        centroids = points[rng.choice(n, k, replace=False)].astype(np.float64)
+    sample = points[rng.choice(n, min(n, 20000), replace=False)]
+    limit = tol * float(sample.std(axis=0).mean() or 1.0)
+    
+    it = 0
+    if method == "lloyd":
+        for it in range(1, max_iter + 1):
+            labels, _ = _kmeans_assign(points, centroids, chunk)
+            counts = np.bincount(labels, minlength=k)
+            sums = np.empty((k, dim))
+            for j in range(dim):
+                sums[:, j] = np.bincount(labels, weights=points[:, j], minlength=k)
+            new = centroids.copy()
+            filled = counts > 0
+            new[filled] = sums[filled] / counts[filled, None]
+            shift = np.sqrt(((new - centroids)**2).sum(axis=1)).max()
+            centroids = new
+            report(progress, it / max_iter)
+            if shift <= limit:
+                break
+    elif method == "minibatch":
+        counts = np.zeros(k)
+        for it in range(1, max_iter + 1):
+            batch = points[rng.randint(0, n, size=min(batch_size, n))].astype(np.float64)
+            lab, _ = _kmeans_assign(batch, centroids, chunk)
+            nb = np.bincount(lab, minlength=k)
+            sums = np.empty((k, dim))
+            for j in range(dim):
+                sums[:, j] = np.bincount(lab, weights=batch[:, j], minlength=k)
+            hit = nb > 0
+            # média corrente por centróide: mesmo resultado de aplicar a taxa 1/v ponto a ponto
+            new = centroids.copy()
+            new[hit] = (counts[hit, None] * centroids[hit] + sums[hit]) / (counts[hit] + nb[hit])[:, None]
+            counts += nb
+            shift = np.sqrt(((new - centroids)**2).sum(axis=1)).max()
+            centroids = new
+            report(progress, it / max_iter)
+            if shift <= limit:
+                break
+    else:
+        raise ValueError(f"Método de k-means desconhecido: {method}")
+    labels, _ = _kmeans_assign(points, centroids, chunk)
+    return labels, centroids, it
+
+# Nomes da interface -> method de kmeans
+KMEANS_METHODS = {
+    "Lloyd": "lloyd",
+    "Mini-batch": "minibatch",
+}
+
+def k_means_demo(n_points=200, k=5, seed=0, method="lloyd", progress=None):
     rng = np.random.RandomState(seed)
     pts = rng.randn(n_points, 2) * 2 + rng.randn(k, 2)[rng.randint(0, k, n_points)]
-    centroids = pts[rng.choice(n_points, k, replace=False)]
-    for _ in range(20):
-        d = np.linalg.norm(pts[:, None] - centroids, axis=2)
-        labels = np.argmin(d, axis=1)
-        for i in range(k):
-            if (labels == i).any():
-                centroids[i] = pts[labels == i].mean(axis=0)
+    labels, centroids, _ = kmeans(pts, k, seed=seed, method=method, progress=progress)
     return pts, labels, centroids
 
+def image_palette(image, k=8, seed=0, method="minibatch", progress=None):
+    """Paleta de k cores de uma imagem (H, W, 3|4), usando todos os pixels.
+
+    Retorna (paleta (k, 3) no tipo da imagem, fração de pixels de cada cor,
+    mapa de rótulos (H, W)), com as cores em ordem decrescente de frequência.
+    """
+    image = np.asarray(image)
+    h, w = image.shape[:2]
+    pixels = image[..., :3].reshape(-1, 3).astype(np.float32)
+    labels, centroids, _ = kmeans(pixels, k, seed=seed, method=method, progress=progress)
+    counts = np.bincount(labels, minlength=len(centroids))
+    order = np.argsort(-counts, kind="stable")
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    palette = centroids[order]
+    if np.issubdtype(image.dtype, np.integer):
+        palette = np.clip(np.rint(palette), 0, np.iinfo(image.dtype).max).astype(image.dtype)
+    return palette, counts[order] / counts.sum(), remap[labels].reshape(h, w)
+
 # ------------------------
 # QUADTREE
 # ------------------------
@@ -282,41 +1103,480 @@ class Quadtree:
             for child in self.children:
                 child.collect_rects(out)
 
+def _part1by1(v):
+    """Espalha os bits de v (uint64 < 2^32) nas posições pares"""
+    v = v & np.uint64(0xFFFFFFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return v
+
+def morton_codes(ix, iy):
+    """Códigos Z-order (x nos bits pares, y nos ímpares) de coordenadas inteiras"""
+    return _part1by1(np.asarray(ix, dtype=np.uint64)) | (_part1by1(np.asarray(iy, dtype=np.uint64)) << np.uint64(1))
+
+class PointQuadtree:
+    """Quadtree de pontos construída em lote a partir da ordem de Morton.
+
+    Os pontos são quantizados na grade 2^max_depth do retângulo, ordenados
+    pelo código Z-order e cada nó vira um intervalo [start, end) desse
+    array ordenado. A árvore é montada nível a nível com searchsorted e
+    guardada em arrays lineares (filhos de um nó são consecutivos, na mesma
+    ordem de Quadtree.subdivide). Um nó se divide nos 4 quadrantes sempre
+    que tem mais de cap pontos e está acima de max_depth, então a forma da
+    árvore depende só do conjunto de pontos, não da ordem de inserção. Ela
+    não reproduz os nós da classe Quadtree (inserção ponto a ponto).
+
+    Consultas (índices no array original de pontos):
+        query_rect(x0, y0, x1, y1)   pontos com x0 <= x < x1 e y0 <= y < y1
+        query_radius(cx, cy, r)      pontos a distância <= r
+        knn(cx, cy, k)               (índices, distâncias) dos k mais próximos
+    """
+    
+    def __init__(self, points, boundary, cap=4, max_depth=8):
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.boundary = boundary
+        self.cap = cap
+        self.max_depth = max_depth = min(max_depth, 31)
+        bx, by, bw, bh = boundary.x, boundary.y, boundary.w, boundary.h
+        inside = np.flatnonzero((pts[:, 0] >= bx) & (pts[:, 0] < bx + bw) &
+                                (pts[:, 1] >= by) & (pts[:, 1] < by + bh))
+        side = 1 << max_depth
+        ix = np.minimum(((pts[inside, 0] - bx) / bw * side).astype(np.int64), side - 1)
+        iy = np.minimum(((pts[inside, 1] - by) / bh * side).astype(np.int64), side - 1)
+        codes = morton_codes(ix, iy)
+        order = np.argsort(codes, kind="stable")
+        self.codes = codes[order]
+        self.index = inside[order]             # posição ordenada -> índice original
+        self.px = pts[self.index, 0]
+        self.py = pts[self.index, 1]
+        self._build(len(self.index))
+    
+    def _build(self, n):
+        cap, D = self.cap, self.max_depth
+        b = self.boundary
+        xs, ys, ws, hs = [np.array([b.x])], [np.array([b.y])], [np.array([b.w])], [np.array([b.h])]
+        starts, ends = [np.array([0])], [np.array([n])]
+        depths = [np.zeros(1, dtype=np.int32)]
+        children = []
+        prefix = np.zeros(1, dtype=np.uint64)
+        total = 1
+        for depth in range(D + 1):
+            s, e = starts[-1], ends[-1]
+            split = (e - s > cap) if depth < D else np.zeros(len(s), dtype=bool)
+            child = np.full(len(s), -1, dtype=np.int64)
+            k = int(split.sum())
+            child[split] = total + 4*np.arange(k)
+            children.append(child)
+            if k == 0:
+                break
+            total += 4*k
+            # prefixos e intervalos dos 4 filhos (ordem Morton: x baixo/alto, depois y)
+            q = np.arange(4, dtype=np.uint64)
+            prefix = (prefix[split][:, None] * np.uint64(4) + q).ravel()
+            shift = np.uint64(2 * (D - depth - 1))
+            lo = prefix << shift
+            hi = (prefix + np.uint64(1)) << shift
+            starts.append(np.searchsorted(self.codes, lo))
+            ends.append(np.searchsorted(self.codes, hi))
+            hw, hh = ws[-1][split] / 2, hs[-1][split] / 2
+            qx, qy = np.tile([0, 1, 0, 1], k), np.tile([0, 0, 1, 1], k)
+            xs.append(np.repeat(xs[-1][split], 4) + qx * np.repeat(hw, 4))
+            ys.append(np.repeat(ys[-1][split], 4) + qy * np.repeat(hh, 4))
+            ws.append(np.repeat(hw, 4))
+            hs.append(np.repeat(hh, 4))
+            depths.append(np.full(4*k, depth + 1, dtype=np.int32))
+        n_levels = len(children)
+        self.x = np.concatenate(xs[:n_levels])
+        self.y = np.concatenate(ys[:n_levels])
+        self.w = np.concatenate(ws[:n_levels])
+        self.h = np.concatenate(hs[:n_levels])
+        self.start = np.concatenate(starts[:n_levels])
+        self.end = np.concatenate(ends[:n_levels])
+        self.depth = np.concatenate(depths[:n_levels])
+        self.child = np.concatenate(children)
+        # listas para o percurso em Python (acesso escalar bem mais rápido)
+        self._nodes = list(zip(self.x.tolist(), self.y.tolist(), self.w.tolist(), self.h.tolist(),
+                               self.start.tolist(), self.end.tolist(), self.child.tolist()))
+    
+    def __len__(self):
+        return len(self.index)
+    
+    @property
+    def node_count(self):
+        return len(self.x)
+    
+    def rect_array(self):
+        """Retângulos de todos os nós: array (nós, 4) com x, y, w, h"""
+        return np.stack([self.x, self.y, self.w, self.h], axis=1)
+    
+    def collect_rects(self, out):
+        out.extend(Rect(*r) for r in self.rect_array().tolist())
+    
+    def _result(self, parts):
+        if not parts:
+            return np.zeros(0, dtype=np.intp)
+        return np.sort(self.index[np.concatenate(parts)])
+    
+    def query_rect(self, x0, y0, x1, y1):
+        parts = []
+        stack = [0]
+        nodes = self._nodes
+        while stack:
+            nx, ny, nw, nh, s, e, c = nodes[stack.pop()]
+            if s == e or nx >= x1 or nx + nw <= x0 or ny >= y1 or ny + nh <= y0:
+                continue
+            if x0 <= nx and nx + nw <= x1 and y0 <= ny and ny + nh <= y1:
+                parts.append(np.arange(s, e))
+            elif c < 0:
+                px, py = self.px[s:e], self.py[s:e]
+                hit = (px >= x0) & (px < x1) & (py >= y0) & (py < y1)
+                parts.append(s + np.flatnonzero(hit))
+            else:
+                stack.extend((c, c + 1, c + 2, c + 3))
+        return self._result(parts)
+    
+    def query_radius(self, cx, cy, r):
+        parts = []
+        stack = [0]
+        nodes = self._nodes
+        r2 = r*r
+        while stack:
+            nx, ny, nw, nh, s, e, c = nodes[stack.pop()]
+            if s == e:
+                continue
+            # distância do centro ao retângulo (0 se dentro) e ao canto mais longe
+            dx = max(nx - cx, 0.0, cx - nx - nw)
+            dy = max(ny - cy, 0.0, cy - ny - nh)
+            if dx*dx + dy*dy > r2:
+                continue
+            fx = max(abs(cx - nx), abs(cx - nx - nw))
+            fy = max(abs(cy - ny), abs(cy - ny - nh))
+            if fx*fx + fy*fy <= r2:
+                parts.append(np.arange(s, e))
+            elif c < 0:
+                d2 = (self.px[s:e] - cx)**2 + (self.py[s:e] - cy)**2
+                parts.append(s + np.flatnonzero(d2 <= r2))
+            else:
+                stack.extend((c, c + 1, c + 2, c + 3))
+        return self._result(parts)
+    
+    def knn(self, cx, cy, k=1):
+        """Os k pontos mais próximos (busca best-first pelos nós)"""
+        k = min(k, len(self))
+        best_d = np.full(0, np.inf)
+        best_i = np.zeros(0, dtype=np.intp)
+        if k <= 0:
+            return self.index[best_i], best_d
+        heap = [(0.0, 0)]
+        nodes = self._nodes
+        while heap:
+            d2_node, i = heapq.heappop(heap)
+            if len(best_d) == k and d2_node > best_d[-1]:
+                break
+            nx, ny, nw, nh, s, e, c = nodes[i]
+            if c < 0:
+                d2 = (self.px[s:e] - cx)**2 + (self.py[s:e] - cy)**2
+                best_d = np.concatenate([best_d, d2])
+                best_i = np.concatenate([best_i, np.arange(s, e)])
+                keep = np.argsort(best_d, kind="stable")[:k]
+                best_d, best_i = best_d[keep], best_i[keep]
+                continue
+            for j in range(c, c + 4):
+                qx, qy, qw, qh, qs, qe, _ = nodes[j]
+                if qs == qe:
+                    continue
+                dx = max(qx - cx, 0.0, cx - qx - qw)
+                dy = max(qy - cy, 0.0, cy - qy - qh)
+                heapq.heappush(heap, (dx*dx + dy*dy, j))
+        return self.index[best_i], np.sqrt(best_d)
+
 # ------------------------
 # CIRCLE PACKING
 # ------------------------
 
-def circle_packing(container_r=100, n=100, rmin=2, rmax=20, seed=0):
+class CircleGrid:
+    """Hash espacial uniforme de círculos para testes de sobreposição em lote.
+
+    Células de lado 2*rmax num array denso de slots (índices, -1 = vazio):
+    um círculo de raio <= rmax só pode tocar círculos das 3x3 células em
+    volta da sua. Pontos fora da área coberta caem nas células da borda, o
+    que só acrescenta candidatos, nunca perde sobreposições.
+    
+    Com rmin, mantém também um raster de lado rmin/2 com os pixels que ficam
+    inteiros a menos de r_i + rmin de algum círculo: um centro ali nunca
+    serve para um círculo novo, o que descarta candidatos com um só acesso.
+    """
+    
+    def __init__(self, extent, rmax, rmin=None, capacity=8):
+        self.cell = 2.0 * rmax
+        self.origin = -float(extent)
+        self.size = int(math.ceil(2*extent / self.cell)) + 1
+        self.slots = np.full((self.size + 2, self.size + 2, capacity), -1, dtype=np.int32)
+        self.count = np.zeros((self.size + 2, self.size + 2), dtype=np.int32)
+        self.xyr = np.empty((1024, 3))
+        self.n = 0
+        self._oy, self._ox = np.mgrid[-1:2, -1:2]
+        self.rmin = rmin
+        if rmin is not None:
+            self.pix = rmin / 2.0
+            side = int(math.ceil(2*extent / self.pix)) + 1
+            self.blocked = np.zeros((side, side), dtype=bool)
+    
+    def _block(self, x, y, r):
+        """Marca no raster os pixels inteiros dentro de r + rmin do centro"""
+        reach = r + self.rmin - self.pix * math.sqrt(0.5)
+        side = self.blocked.shape[0]
+        i0 = max(int((x - reach - self.origin) / self.pix), 0)
+        i1 = min(int((x + reach - self.origin) / self.pix) + 1, side)
+        j0 = max(int((y - reach - self.origin) / self.pix), 0)
+        j1 = min(int((y + reach - self.origin) / self.pix) + 1, side)
+        if i0 >= i1 or j0 >= j1:
+            return
+        px = self.origin + (np.arange(i0, i1) + 0.5) * self.pix - x
+        py = self.origin + (np.arange(j0, j1) + 0.5) * self.pix - y
+        self.blocked[j0:j1, i0:i1] |= px[None, :]**2 + py[:, None]**2 <= reach**2
+    
+    def maybe_free(self, xs, ys):
+        """Máscara dos pontos fora do raster bloqueado (sem raster, todos True)"""
+        if self.rmin is None:
+            return np.ones(len(xs), dtype=bool)
+        side = self.blocked.shape[0]
+        i = np.clip(((xs - self.origin) / self.pix).astype(np.intp), 0, side - 1)
+        j = np.clip(((ys - self.origin) / self.pix).astype(np.intp), 0, side - 1)
+        return ~self.blocked[j, i]
+    
+    def _cells(self, xs, ys):
+        gx = np.clip(((np.asarray(xs) - self.origin) // self.cell).astype(np.intp), 0, self.size - 1) + 1
+        gy = np.clip(((np.asarray(ys) - self.origin) // self.cell).astype(np.intp), 0, self.size - 1) + 1
+        return gx, gy
+    
+    def add(self, x, y, r):
+        """Insere um círculo e devolve o índice dele"""
+        if self.n == len(self.xyr):
+            self.xyr = np.concatenate([self.xyr, np.empty_like(self.xyr)])
+        i = self.n
+        self.xyr[i] = x, y, r
+        self.n += 1
+        gx = min(max(int((x - self.origin) // self.cell), 0), self.size - 1) + 1
+        gy = min(max(int((y - self.origin) // self.cell), 0), self.size - 1) + 1
+        k = self.count[gy, gx]
+        if k == self.slots.shape[2]:
+            grow = np.full(self.slots.shape, -1, dtype=np.int32)
+            self.slots = np.concatenate([self.slots, grow], axis=2)
+        self.slots[gy, gx, k] = i
+        self.count[gy, gx] = k + 1
+        if self.rmin is not None:
+            self._block(x, y, r)
+        return i
+    
+    def neighbors(self, xs, ys):
+        """Índices (K, 9*capacidade) dos círculos nas 3x3 células de cada ponto"""
+        gx, gy = self._cells(xs, ys)
+        block = self.slots[gy[:, None, None] + self._oy, gx[:, None, None] + self._ox]
+        return block.reshape(len(gx), 9 * self.slots.shape[2])
+    
+    def near(self, x, y):
+        """Índices dos círculos nas 3x3 células em volta de um ponto"""
+        gx = min(max(int((x - self.origin) // self.cell), 0), self.size - 1) + 1
+        gy = min(max(int((y - self.origin) // self.cell), 0), self.size - 1) + 1
+        block = self.slots[gy-1:gy+2, gx-1:gx+2].ravel()
+        return block[block >= 0]
+    
+    def overlaps(self, xs, ys, rs, eps=1e-9):
+        """Máscara (K,) dos candidatos que sobrepõem algum círculo já inserido"""
+        xs, ys, rs = np.atleast_1d(xs), np.atleast_1d(ys), np.atleast_1d(rs)
+        idx = self.neighbors(xs, ys)
+        valid = idx >= 0
+        c = self.xyr[np.where(valid, idx, 0)]
+        d2 = (c[..., 0] - xs[:, None])**2 + (c[..., 1] - ys[:, None])**2
+        lim = np.maximum(c[..., 2] + rs[:, None] - eps, 0)
+        return (valid & (d2 < lim**2)).any(axis=1)
+    
+    def circles(self):
+        return self.xyr[:self.n]
+
+def _disk_points(rng, k, radius):
+    """k pontos uniformes num disco (raio pode ser um array de tamanho k)"""
+    ang = rng.rand(k) * 2*math.pi
+    d = np.sqrt(rng.rand(k)) * radius
+    return d * np.cos(ang), d * np.sin(ang)
+
+def _tangent_circle(a, b, r):
+    """Centro do círculo de raio r tangente por fora a a e b, à direita de a -> b"""
+    ax, ay, ra = a
+    bx, by, rb = b
+    dx, dy = bx - ax, by - ay
+    d = math.hypot(dx, dy)
+    la, lb = ra + r, rb + r
+    cos_t = max(-1.0, min(1.0, (la*la + d*d - lb*lb) / (2*la*d)))
+    sin_t = math.sqrt(1 - cos_t*cos_t)
+    ux, uy = dx / d, dy / d
+    # gira a direção a -> b no sentido horário
+    return ax + la*(ux*cos_t + uy*sin_t), ay + la*(uy*cos_t - ux*sin_t)
+
+def _pack_front_chain(container_r, n, rmin, rmax, rng, progress):
+    """Empacotamento por cadeia de frente (Wang et al. 2006).
+
+    Os círculos crescem a partir do centro, cada um tangente a dois círculos
+    vizinhos da frente (lista duplamente ligada anti-horária). O par usado
+    é o do círculo da frente mais próximo da origem e o seguinte; se o novo
+    círculo invadir outro da frente, o trecho entre eles sai da cadeia e a
+    tangência é refeita.
+    """
+    grid = CircleGrid(container_r + 4*rmax, rmax)
+    nxt, prv, on_chain = {}, {}, {}
+    heap = []
+    inside = []
+    
+    def place(x, y, r):
+        i = grid.add(x, y, r)
+        on_chain[i] = True
+        heapq.heappush(heap, (math.hypot(x, y), i))
+        if math.hypot(x, y) + r <= container_r:
+            inside.append(i)
+        return i
+    
+    # três círculos tangentes entre si em volta da origem, em sentido anti-horário
+    r0, r1, r2 = rng.uniform(rmin, rmax, 3)
+    c0 = (-r0, 0.0, r0)
+    c1 = (r1, 0.0, r1)
+    x2, y2 = _tangent_circle(c1, c0, r2)
+    cx, cy = (c0[0] + c1[0] + x2) / 3, (c0[1] + c1[1] + y2) / 3
+    ids = [place(c0[0] - cx, -cy, r0), place(c1[0] - cx, -cy, r1), place(x2 - cx, y2 - cy, r2)]
+    for k in range(3):
+        nxt[ids[k]] = ids[(k + 1) % 3]
+        prv[ids[(k + 1) % 3]] = ids[k]
+    
+    xyr = grid.circles
+    r = rng.uniform(rmin, rmax)
+    while len(inside) < n and heap:
+        dist, m = heap[0]
+        if not on_chain[m]:
+            heapq.heappop(heap)
+            continue
+        if dist - rmax > container_r:
+            break
+        nn = nxt[m]
+        while True:
+            cm, cn = xyr()[m], xyr()[nn]
+            x, y = _tangent_circle(cm, cn, r)
+            hits = grid.near(x, y)
+            c = xyr()[hits]
+            lim = c[:, 2] + r - 1e-7 * (r + rmax)
+            bad = hits[((c[:, 0] - x)**2 + (c[:, 1] - y)**2 < lim**2)]
+            bad = {j for j in bad.tolist() if on_chain[j] and j != m and j != nn}
+            if not bad:
+                break
+            # o círculo invadido mais perto na cadeia decide de que lado cortar
+            fwd, bwd = nxt[nn], prv[m]
+            while fwd not in bad and bwd not in bad and fwd != bwd:
+                fwd, bwd = nxt[fwd], prv[bwd]
+            if fwd in bad:
+                j = nn
+                while j != fwd:
+                    on_chain[j] = False
+                    j = nxt[j]
+                nn = fwd
+            else:
+                j = m
+                while j != bwd:
+                    on_chain[j] = False
+                    j = prv[j]
+                m = bwd
+            nxt[m], prv[nn] = nn, m
+            if nxt[nn] == m:
+                # cadeia degenerada (dois círculos): não há mais onde encaixar
+                return xyr()[inside]
+        i = place(x, y, r)
+        nxt[m], prv[i], nxt[i], prv[nn] = i, m, nn, i
+        if len(inside) % 256 == 0:
+            report(progress, len(inside) / n)
+        r = rng.uniform(rmin, rmax)
+    return xyr()[inside]
+
+# Nomes da interface -> method de circle_packing
+CIRCLE_PACKING_METHODS = {
+    "Aleatório": "random",
+    "Maior primeiro": "largest_first",
+    "Cadeia de frente": "front_chain",
+}
+
+def circle_packing(container_r=100, n=100, rmin=2, rmax=20, seed=0, method="random", batch=64,
+                   max_attempts=None, progress=None):
+    """Empacota até n círculos sem sobreposição num container de raio container_r.
+
+    Os testes de sobreposição usam um CircleGrid e os candidatos são gerados
+    e testados em lotes de `batch`. Métodos:
+      "random": raios e posições aleatórios (até max_attempts candidatos, padrão n*100)
+      "largest_first": sorteia os n raios e encaixa do maior para o menor
+      "front_chain": círculos tangentes crescendo do centro (empacotamento denso)
+    Retorna uma lista de (x, y, r). rmin > rmax é tratado como o intervalo
+    trocado (a grade assume raios em [rmin, rmax]).
+    """
+    rmin, rmax = sorted((rmin, rmax))
     rng = np.random.RandomState(seed)
-    circles = []
-    max_attempts = n * 100
+    if method == "front_chain":
+        return [tuple(c) for c in _pack_front_chain(container_r, n, rmin, rmax, rng, progress).tolist()]
+    
+    grid = CircleGrid(container_r, rmax, rmin=rmin)
+    if max_attempts is None:
+        max_attempts = n * 100
     attempts = 0
-    while len(circles) < n and attempts < max_attempts:
-        attempts += 1
-        r = rng.uniform(rmin, rmax)
-        ang = rng.rand() * 2*math.pi
-        max_d = container_r - r
-        d = rng.rand() * max_d
-        x = d * math.cos(ang)
-        y = d * math.sin(ang)
-        dist_origin = math.sqrt(x*x + y*y)
-        if dist_origin + r > container_r:
-            continue
-        valid = True
-        for (cx, cy, cr) in circles:
-            dd = math.sqrt((x-cx)**2 + (y-cy)**2)
-            if dd < r + cr:
-                valid = False
+    
+    def accept(xs, ys, rs):
+        """Insere, em ordem, os candidatos dentro do container, livres e que não se sobrepõem entre si"""
+        placed = np.zeros(len(xs), dtype=bool)
+        inside = np.hypot(xs, ys) + rs <= container_r
+        keep = np.flatnonzero(inside & grid.maybe_free(xs, ys))
+        if len(keep) == 0:
+            return placed
+        for k in keep[~grid.overlaps(xs[keep], ys[keep], rs[keep])]:
+            if grid.n >= n:
                 break
-        if valid:
-            circles.append((x, y, r))
-    return circles
+            p = np.flatnonzero(placed)
+            if len(p) and (np.hypot(xs[p] - xs[k], ys[p] - ys[k]) < rs[p] + rs[k]).any():
+                continue
+            grid.add(xs[k], ys[k], rs[k])
+            placed[k] = True
+        return placed
+    
+    if method == "largest_first":
+        # Fila de raios em ordem decrescente; cada lote testa os `batch` maiores
+        # pendentes, um candidato cada, e quem falha `tries` vezes é descartado
+        radii = np.sort(rng.uniform(rmin, rmax, n))[::-1]
+        fails = np.zeros(n, dtype=np.int32)
+        tries = max(1, max_attempts // max(1, n))
+        pending = np.arange(n)
+        while len(pending) and grid.n < n:
+            head = pending[:batch]
+            rs = radii[head]
+            xs, ys = _disk_points(rng, len(head), np.maximum(container_r - rs, 0))
+            placed = accept(xs, ys, rs)
+            fails[head[~placed]] += 1
+            done = placed | (fails[head] >= tries)
+            pending = np.concatenate([head[~done], pending[batch:]])
+            report(progress, 1 - len(pending) / n)
+    elif method == "random":
+        while grid.n < n and attempts < max_attempts:
+            k = min(batch, max_attempts - attempts)
+            attempts += k
+            rs = rng.uniform(rmin, rmax, k)
+            xs, ys = _disk_points(rng, k, np.maximum(container_r - rs, 0))
+            accept(xs, ys, rs)
+            report(progress, max(grid.n / n, attempts / max_attempts))
+    else:
+        raise ValueError(f"Método de empacotamento desconhecido: {method}")
+    return [tuple(c) for c in grid.circles().tolist()]
 
 # ------------------------
 # TERRENO 3D
 # ------------------------
 
-def diamond_square(n=129, roughness=0.6, seed=0):
+def diamond_square_loop(n=129, roughness=0.6, seed=0):
+    """Referência célula a célula (lenta), usada nos benchmarks"""
     rng = np.random.RandomState(seed)
     hm = np.zeros((n, n), dtype=np.float32)
     hm[0, 0] = rng.rand()
@@ -344,15 +1604,96 @@ def diamond_square(n=129, roughness=0.6, seed=0):
         scale *= roughness
     return hm
 
-def fault_formation(size=100, iterations=1000, min_h=-0.01, max_h=0.01, seed=0):
+def _ds_noise(rng, count, scale):
+    """count sorteios em [-scale, scale), na mesma ordem de rng.rand() um a um"""
+    return ((rng.rand(count)*2 - 1) * scale).astype(np.float32)
+
+def diamond_square(n=129, roughness=0.6, seed=0, progress=None):
+    """Diamond-square com cada passo de cada nível feito em fatias com stride.
+
+    Para n = 2^k + 1 o resultado é idêntico ao da referência célula a célula
+    (mesma ordem de sorteios e mesmas contas em float32). Outros tamanhos são
+    gerados no próximo 2^k + 1 e recortados para n x n.
+    """
+    size = 2
+    while size + 1 < n:
+        size *= 2
+    N = size + 1
+    rng = np.random.RandomState(seed)
+    hm = np.zeros((N, N), dtype=np.float32)
+    hm[0, 0] = rng.rand()
+    hm[0, N-1] = rng.rand()
+    hm[N-1, 0] = rng.rand()
+    hm[N-1, N-1] = rng.rand()
+    step = N - 1
+    scale = 1.0
+    while step > 1:
+        hs = step // 2
+        m = (N - 1) // step + 1          # vértices já definidos por linha
+        
+        # Diamond: centro de cada quadrado = média dos 4 cantos + ruído
+        c = hm[0::step, 0::step]
+        center = c[:-1, :-1] + c[:-1, 1:]
+        center += c[1:, :-1]
+        center += c[1:, 1:]
+        center /= np.float32(4.0)
+        center += _ds_noise(rng, (m-1)*(m-1), scale).reshape(m-1, m-1)
+        hm[hs::step, hs::step] = center
+        
+        # Square: pontos médios das arestas. Em ordem de linhas eles alternam
+        # linhas "A" (y múltiplo de step, m-1 pontos) e "B" (y = hs + k*step, m pontos)
+        noise = _ds_noise(rng, m*(m-1) + (m-1)*m, scale)
+        noise = np.concatenate([noise, np.zeros(m, dtype=np.float32)]).reshape(m, 2*m - 1)
+        
+        # Linhas A: vizinhos acima/abaixo são centros, esquerda/direita são vértices
+        total = np.zeros((m, m-1), dtype=np.float32)
+        count = np.zeros((m, m-1), dtype=np.float32)
+        total[1:] += center; count[1:] += 1
+        total[:-1] += center; count[:-1] += 1
+        total += c[:, :-1]
+        total += c[:, 1:]
+        count += 2
+        total /= count
+        total += noise[:, :m-1]
+        
+        # Linhas B: acima/abaixo são vértices, esquerda/direita são centros
+        total_b = c[:-1, :] + c[1:, :]
+        count_b = np.full((m-1, m), 2, dtype=np.float32)
+        total_b[:, 1:] += center; count_b[:, 1:] += 1
+        total_b[:, :-1] += center; count_b[:, :-1] += 1
+        total_b /= count_b
+        total_b += noise[:m-1, m-1:]
+        
+        hm[0::step, hs::step] = total
+        hm[hs::step, 0::step] = total_b
+        
+        step = hs
+        scale *= roughness
+        report(progress, 1 - step / (N - 1))
+    if N != n:
+        hm = np.ascontiguousarray(hm[:n, :n])
+    return hm
+
+# falhas por bloco: fixo, para que o resultado não dependa do número de workers
+FAULT_CHUNK = 256
+
+def fault_lines(size, iterations, min_h=-0.01, max_h=0.01, seed=0):
+    """Sorteia as falhas na ordem serial: array (iterations, 5) com x1, y1, dx, dy, dh"""
     rng = np.random.RandomState(seed)
-    hm = np.zeros((size, size), dtype=np.float32)
-    for _ in range(iterations):
+    faults = np.empty((iterations, 5))
+    for i in range(iterations):
         x1, y1 = rng.rand(2) * size
         ang = rng.rand() * 2*math.pi
-        dx = math.cos(ang)
-        dy = math.sin(ang)
-        dh = rng.uniform(min_h, max_h)
+        faults[i] = x1, y1, math.cos(ang), math.sin(ang), rng.uniform(min_h, max_h)
+    return faults
+
+# Memória máxima (bytes) dos temporários de um lote de falhas no modo em lote
+FAULT_BATCH_BYTES = 64 * 1024**2
+
+def _fault_chunk_loop(size, faults):
+    """Referência célula a célula (lenta), usada nos benchmarks"""
+    hm = np.zeros((size, size), dtype=np.float64)
+    for x1, y1, dx, dy, dh in faults:
         for y in range(size):
             for x in range(size):
                 cross = (x - x1)*dy - (y - y1)*dx
@@ -360,11 +1701,85 @@ def fault_formation(size=100, iterations=1000, min_h=-0.01, max_h=0.01, seed=0):
                     hm[y, x] += dh
     return hm
 
+def _fault_chunk_masks(size, faults):
+    """Uma máscara de semiplano por falha sobre a grade de coordenadas.
+
+    O termo (x - x1)*dy só depende da coluna e (y - y1)*dx só da linha, então a
+    máscara é uma comparação com broadcast de dois vetores. Mesma conta e
+    mesma ordem de soma da referência: resultado idêntico.
+    """
+    coords = np.arange(size, dtype=np.float64)
+    hm = np.zeros((size, size), dtype=np.float64)
+    mask = np.empty((size, size), dtype=bool)
+    for x1, y1, dx, dy, dh in faults:
+        np.greater((coords - x1)*dy, ((coords - y1)*dx)[:, None], out=mask)
+        np.add(hm, dh, out=hm, where=mask)
+    return hm
+
+def _fault_chunk_batched(size, faults, max_bytes=FAULT_BATCH_BYTES):
+    """Lotes de falhas por chamada NumPy, sem materializar as máscaras.
+
+    Em cada linha o semiplano de uma falha é um prefixo ou sufixo de colunas
+    (o produto (x - x1)*dy é monotônico em x), então basta achar o limite
+    com searchsorted sobre os mesmos valores da máscara e marcar +dh/-dh num
+    array de diferenças; um cumsum por linha no fim reconstrói o mapa. Os
+    temporários de cada lote ficam limitados a max_bytes. As células elevadas
+    são as mesmas da referência; só a ordem da soma muda (~1e-16 relativo).
+    """
+    coords = np.arange(size, dtype=np.float64)
+    rows = np.arange(size) * (size + 1)
+    batch = max(1, int(max_bytes // (6 * 8 * size)))
+    diff = np.zeros(size * (size + 1), dtype=np.float64)
+    for i in range(0, len(faults), batch):
+        x1, y1, dx, dy, dh = faults[i:i+batch].T
+        a = (coords[None, :] - x1[:, None]) * dy[:, None]   # termo de cada coluna
+        b = (coords[None, :] - y1[:, None]) * dx[:, None]   # termo de cada linha
+        asc = dy >= 0
+        a[~asc] = a[~asc, ::-1]
+        # k = número de colunas com a <= b (as k primeiras, em ordem crescente de a);
+        # as elevadas (a > b) são as colunas [k, size), ou [0, size-k) se a foi invertido
+        k = np.empty(b.shape, dtype=np.intp)
+        for j in range(len(dh)):
+            k[j] = np.searchsorted(a[j], b[j], side='right')
+        start = np.where(asc[:, None], k, 0)
+        stop = np.where(asc[:, None], size, size - k)
+        w = np.broadcast_to(dh[:, None], k.shape).ravel()
+        diff += np.bincount((rows + start).ravel(), w, minlength=diff.size)
+        diff -= np.bincount((rows + stop).ravel(), w, minlength=diff.size)
+    return np.cumsum(diff.reshape(size, size + 1), axis=1)[:, :size]
+
+FAULT_METHODS = {
+    "loop": _fault_chunk_loop,
+    "mask": _fault_chunk_masks,
+    "batched": _fault_chunk_batched,
+}
+
+def fault_formation(size=100, iterations=1000, min_h=-0.01, max_h=0.01, seed=0, method="batched",
+                    workers=None, progress=None):
+    """Terreno por falhas: cada falha eleva um semiplano em dh.
+
+    method: "batched" (lotes de falhas por chamada NumPy), "mask" (uma máscara
+    por falha, idêntico à referência) ou "loop" (referência célula a célula).
+    As falhas são acumuladas em float64 por blocos de FAULT_CHUNK e os blocos
+    somados em ordem; com workers > 1 os blocos rodam em processos e o
+    resultado é idêntico ao serial.
+    """
+    faults = fault_lines(size, iterations, min_h, max_h, seed)
+    tasks = [(size, faults[i:i+FAULT_CHUNK]) for i in range(0, iterations, FAULT_CHUNK)]
+    hm = np.zeros((size, size), dtype=np.float64)
+    for part in run_chunks(FAULT_METHODS[method], tasks, workers, progress):
+        hm += part
+    return hm.astype(np.float32)
+
 # ------------------------
 # VOXEL
 # ------------------------
 
-def voxel_grid_sphere(n=20, r=8):
+VOXEL_SLAB_BYTES = 32 * 1024**2   # teto dos temporários de cada fatia do voxelizador
+VOXEL_PREVIEW_N = 48              # lado máximo da grade usada na prévia 3D
+
+def voxel_grid_sphere_loop(n=20, r=8):
+    """Referência antiga: laço triplo célula a célula"""
     grid = np.zeros((n, n, n), dtype=bool)
     c = n // 2
     for x in range(n):
@@ -374,6 +1789,226 @@ def voxel_grid_sphere(n=20, r=8):
                     grid[x, y, z] = True
     return grid
 
+def voxel_grid_sphere(n=20, r=8):
+    """Grade densa n³ da esfera (mesmas contas inteiras da referência)"""
+    return voxelize(sphere_field(n, r), n).to_dense()
+
+# Campos implícitos: field(x, y, z) <= 0 é "dentro". x, y e z chegam como
+# índices inteiros com broadcast (k,1,1), (1,n,1), (1,1,n).
+
+def sphere_field(n, r):
+    c = n // 2
+    def field(x, y, z):
+        return (x-c)**2 + (y-c)**2 + (z-c)**2 - r**2
+    return field
+
+def torus_field(n, R, r):
+    """Toro em torno do eixo z, raio maior R e raio do tubo r"""
+    c = n // 2
+    def field(x, y, z):
+        ring = np.sqrt((x-c)**2 + (y-c)**2) - R
+        return ring**2 + (z-c)**2 - r**2
+    return field
+
+def noise_field(n, seed=0, threshold=0.5, scale=None, octaves=3):
+    """Volume de ruído de valor 3D (fBm): dentro onde o ruído passa do limiar"""
+    scale = scale or max(4.0, n / 4)
+    rng = np.random.RandomState(seed)
+    lattices = []
+    for o in range(octaves):
+        s = scale / 2**o
+        g = int(n / s) + 2
+        lattices.append((s, rng.rand(g, g, g)))
+    norm = sum(0.5**o for o in range(octaves))
+    
+    def weights(v, s):
+        f = v.ravel() / s
+        i = np.floor(f).astype(np.intp)
+        t = f - i
+        return i, t*t*(3 - 2*t)
+    
+    def field(x, y, z):
+        # interpolação trilinear separável: z na grade, depois y, depois x
+        total = 0.0
+        for o, (s, lat) in enumerate(lattices):
+            (ix, tx), (iy, ty), (iz, tz) = weights(x, s), weights(y, s), weights(z, s)
+            a = lat[:, :, iz]
+            a = a + (lat[:, :, iz+1] - a)*tz
+            b = a[:, iy]
+            b = b + (a[:, iy+1] - b)*ty[:, None]
+            c = b[ix]
+            c = c + (b[ix+1] - c)*tx[:, None, None]
+            total = total + c * 0.5**o
+        return threshold - total / norm
+    return field
+
+def voxelize(field, n, max_bytes=VOXEL_SLAB_BYTES, progress=None):
+    """Voxeliza field(x, y, z) <= 0 na grade n³ direto para VoxelRLE.
+
+    O campo é avaliado com broadcast em fatias de x cujo temporário fica
+    abaixo de max_bytes; a grade densa inteira nunca existe.
+    """
+    coords = np.arange(n)
+    slab = max(1, int(max_bytes // (8 * n * n)))
+    
+    def slabs():
+        for x0 in range(0, n, slab):
+            x = coords[x0:x0+slab, None, None]
+            inside = field(x, coords[None, :, None], coords[None, None, :]) <= 0
+            yield np.broadcast_to(inside, (len(x), n, n))
+            report(progress, min(x0 + slab, n) / n)
+    return VoxelRLE.from_slabs((n, n, n), slabs())
+
+# Faces de um voxel: -x, +x, -y, +y, -z, +z (cantos no cubo unitário)
+VOXEL_FACE_CORNERS = np.array([
+    [[0, 0, 0], [0, 1, 0], [0, 1, 1], [0, 0, 1]],
+    [[1, 0, 0], [1, 1, 0], [1, 1, 1], [1, 0, 1]],
+    [[0, 0, 0], [1, 0, 0], [1, 0, 1], [0, 0, 1]],
+    [[0, 1, 0], [1, 1, 0], [1, 1, 1], [0, 1, 1]],
+    [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]],
+    [[0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]],
+], dtype=np.float32)
+
+class VoxelRLE:
+    """Grade booleana (nx, ny, nz) guardada como runs ao longo de z.
+
+    Cada linha l = x*ny + y tem seus intervalos ocupados [starts, stops) em
+    starts[line_ptr[l]:line_ptr[l+1]]. A memória cresce com o número de
+    runs (a superfície), não com o volume. Fatias densas são reconstruídas
+    sob demanda com slab(x0, x1).
+    """
+    
+    def __init__(self, shape, line_ptr, starts, stops):
+        self.shape = tuple(int(v) for v in shape)
+        self.line_ptr = line_ptr
+        self.starts = starts
+        self.stops = stops
+    
+    @staticmethod
+    def _encode(block):
+        """Runs de um bloco denso (k, ny, nz): (runs por linha, starts, stops)"""
+        k, ny, nz = block.shape
+        padded = np.zeros((k*ny, nz + 2), dtype=np.int8)
+        padded[:, 1:-1] = block.reshape(k*ny, nz)
+        d = np.diff(padded, axis=1)
+        begin = np.flatnonzero(d == 1)
+        end = np.flatnonzero(d == -1)
+        counts = np.bincount(begin // (nz + 1), minlength=k*ny)
+        return counts, (begin % (nz + 1)).astype(np.int32), (end % (nz + 1)).astype(np.int32)
+    
+    @classmethod
+    def from_slabs(cls, shape, slabs):
+        """Monta a partir de blocos densos consecutivos ao longo de x"""
+        counts, starts, stops = [np.zeros(1, dtype=np.int64)], [], []
+        for block in slabs:
+            c, s, e = cls._encode(block)
+            counts.append(c)
+            starts.append(s)
+            stops.append(e)
+        line_ptr = np.cumsum(np.concatenate(counts))
+        empty = np.zeros(0, dtype=np.int32)
+        return cls(shape, line_ptr, np.concatenate(starts or [empty]), np.concatenate(stops or [empty]))
+    
+    @classmethod
+    def from_dense(cls, grid):
+        return cls.from_slabs(grid.shape, [grid])
+    
+    def to_arrays(self):
+        return np.array(self.shape), self.line_ptr, self.starts, self.stops
+    
+    @classmethod
+    def from_arrays(cls, shape, line_ptr, starts, stops):
+        return cls(shape, line_ptr, starts, stops)
+    
+    @property
+    def nbytes(self):
+        return self.line_ptr.nbytes + self.starts.nbytes + self.stops.nbytes
+    
+    def count(self):
+        """Número de voxels ocupados"""
+        return int((self.stops - self.starts).sum())
+    
+    def slab(self, x0, x1):
+        """Bloco denso das camadas x0..x1-1"""
+        nx, ny, nz = self.shape
+        l0, l1 = x0*ny, x1*ny
+        r0, r1 = self.line_ptr[l0], self.line_ptr[l1]
+        line = np.repeat(np.arange(l1 - l0), np.diff(self.line_ptr[l0:l1+1]))
+        d = np.zeros((l1 - l0, nz + 1), dtype=np.int8)
+        d[line, self.starts[r0:r1]] = 1
+        d[line, self.stops[r0:r1]] = -1
+        return (np.cumsum(d, axis=1, dtype=np.int8)[:, :nz] > 0).reshape(x1 - x0, ny, nz)
+    
+    def to_dense(self):
+        return self.slab(0, self.shape[0])
+    
+    def _layers(self, max_bytes=VOXEL_SLAB_BYTES, multiple=1):
+        nx, ny, nz = self.shape
+        step = max(1, int(max_bytes // (2 * ny * (nz + 1))) // multiple) * multiple
+        return range(0, nx, step), step
+    
+    def downsample(self, f):
+        """Grade f vezes menor por eixo (um voxel grosso é ocupado se algum fino for)"""
+        nx, ny, nz = self.shape
+        out = (-(-nx // f), -(-ny // f), -(-nz // f))
+        xs, step = self._layers(multiple=f)
+        
+        def slabs():
+            for x0 in xs:
+                x1 = min(x0 + step, nx)
+                block = np.zeros((-(-(x1 - x0) // f) * f, out[1] * f, out[2] * f), dtype=bool)
+                block[:x1-x0, :ny, :nz] = self.slab(x0, x1)
+                k = len(block) // f
+                yield block.reshape(k, f, out[1], f, out[2], f).any(axis=(1, 3, 5))
+        return VoxelRLE.from_slabs(out, slabs())
+    
+    def surface_faces(self):
+        """Faces expostas (voxel ocupado com vizinho vazio), em fatias com 1 camada de borda.
+
+        Devolve (vox, dirs): índices (m, 3) dos voxels e a direção de cada
+        face (0..5 na ordem de VOXEL_FACE_CORNERS).
+        """
+        nx, ny, nz = self.shape
+        xs, step = self._layers()
+        vox, dirs = [], []
+        for x0 in xs:
+            x1 = min(x0 + step, nx)
+            lo, hi = max(x0 - 1, 0), min(x1 + 1, nx)
+            g = np.zeros((x1 - x0 + 2, ny + 2, nz + 2), dtype=bool)
+            g[lo - x0 + 1:hi - x0 + 1, 1:-1, 1:-1] = self.slab(lo, hi)
+            core = g[1:-1, 1:-1, 1:-1]
+            neighbors = (g[:-2, 1:-1, 1:-1], g[2:, 1:-1, 1:-1],
+                         g[1:-1, :-2, 1:-1], g[1:-1, 2:, 1:-1],
+                         g[1:-1, 1:-1, :-2], g[1:-1, 1:-1, 2:])
+            for d, nb in enumerate(neighbors):
+                idx = np.argwhere(core & ~nb)
+                idx[:, 0] += x0
+                vox.append(idx.astype(np.int32))
+                dirs.append(np.full(len(idx), d, dtype=np.int8))
+        if not vox:
+            return np.zeros((0, 3), dtype=np.int32), np.zeros(0, dtype=np.int8)
+        return np.concatenate(vox), np.concatenate(dirs)
+
+def voxel_quads(vox, dirs, scale=1.0):
+    """Quadriláteros (m, 4, 3) das faces de surface_faces()"""
+    return (vox[:, None, :].astype(np.float32) + VOXEL_FACE_CORNERS[dirs]) * np.float32(scale)
+
+def voxel_preview_factor(n, preview_n=VOXEL_PREVIEW_N):
+    return max(1, -(-n // preview_n))
+
+VOXEL_SHAPES = ("Esfera", "Toro", "Ruído")
+
+def voxel_shape(n, shape="Esfera", radius=8, seed=0, threshold=0.5, progress=None):
+    """Volume implícito n³ em VoxelRLE"""
+    if shape == "Esfera":
+        field = sphere_field(n, min(radius, n//2 - 1))
+    elif shape == "Toro":
+        R = min(radius, (n//2 - 1) * 3 / 4)
+        field = torus_field(n, R, R / 3)
+    else:
+        field = noise_field(n, seed=seed, threshold=threshold)
+    return voxelize(field, n, progress=progress)
+
 # ------------------------
 # SUPERFICIE 3D
 # ------------------------
@@ -386,6 +2021,196 @@ def sphere_parametric(n=80, radius=1.0):
     Z = radius * np.outer(np.ones_like(u), np.cos(v))
     return X, Y, Z
 
+# ------------------------
+# GERAÇÃO EM BLOCOS (PÔSTERES)
+# ------------------------
+
+class PNGStreamWriter:
+    """Escreve um PNG de 8 bits (cinza ou RGB) faixa por faixa, sem manter a imagem inteira.
+
+    Uso:
+        with PNGStreamWriter(path, width, height) as png:
+            png.write_rows(faixa_uint8)   # (n, width) ou (n, width, 3)
+    """
+    def __init__(self, path, width, height, rgb=False, level=6):
+        self.width, self.height = width, height
+        self.channels = 3 if rgb else 1
+        self.rows_written = 0
+        self._zip = zlib.compressobj(level)
+        self._f = open(path, 'wb')
+        self._f.write(b'\x89PNG\r\n\x1a\n')
+        color_type = 2 if rgb else 0
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+
+    def _chunk(self, tag, data):
+        self._f.write(struct.pack('>I', len(data)))
+        self._f.write(tag)
+        self._f.write(data)
+        self._f.write(struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    def write_rows(self, rows):
+        rows = np.ascontiguousarray(rows, dtype=np.uint8).reshape(len(rows), -1)
+        # cada linha do PNG começa com o byte de filtro (0 = nenhum)
+        raw = np.zeros((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        raw[:, 1:] = rows
+        data = self._zip.compress(raw.tobytes())
+        if data:
+            self._chunk(b'IDAT', data)
+        self.rows_written += rows.shape[0]
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._chunk(b'IDAT', self._zip.flush())
+        self._chunk(b'IEND', b'')
+        self._f.close()
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG incompleto: {self.rows_written} de {self.height} linhas")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # erro ou cancelamento no meio: só fecha o arquivo, sem mascarar a exceção
+            self._f.close()
+            return
+        self.close()
+
+def to_pixels(values, cmap=None):
+    """Converte valores em [0, 1] para uint8 (cinza) ou RGB via colormap do Matplotlib"""
+    values = np.clip(values, 0, 1)
+    if cmap is None:
+        return (values * 255 + 0.5).astype(np.uint8)
+    return matplotlib.colormaps[cmap](values, bytes=True)[..., :3]
+
+def _perlin_tile(width, height, window, scale=60.0, octaves=4, persistence=0.5, lacunarity=2.0, seed=0, periodic=False):
+    return perlin_noise_2d_map(width, height, scale, octaves, persistence, lacunarity, seed, window=window,
+                               periodic=periodic)
+
+def _worley_tile(width, height, window, num_points=50, seed=0, mode=1, periodic=False):
+    return worley_noise_2d(width, height, num_points, seed, mode, window=window, normalize=False, periodic=periodic)
+
+def _voronoi_tile(width, height, window, num_points=30, seed=0):
+    return voronoi_maps(width, height, num_points, seed, window=window)[0]
+
+def _domain_warping_tile(width, height, window, base_scale=60.0, warp_scale=30.0, warp_strength=1.5, seed=0, levels=1,
+                         periodic=False):
+    return domain_warping_map(width, height, base_scale, warp_scale, warp_strength, seed, levels,
+                              window=window, normalize=False, periodic=periodic)
+
+# nome -> (função de bloco, precisa de normalização min/max global)
+TILED_GENERATORS = {
+    "perlin": (_perlin_tile, False),
+    "worley_f1": (functools.partial(_worley_tile, mode=1), True),
+    "worley_f2": (functools.partial(_worley_tile, mode=2), True),
+    "worley_f2f1": (functools.partial(_worley_tile, mode=3), True),
+    "voronoi": (_voronoi_tile, True),
+    "domain_warping": (_domain_warping_tile, True),
+}
+
+def iter_tiles(width, height, tile=1024):
+    """Gera janelas (x0, y0, w, h) cobrindo o mapa, faixa por faixa"""
+    for y0 in range(0, height, tile):
+        for x0 in range(0, width, tile):
+            yield x0, y0, min(tile, width - x0), min(tile, height - y0)
+
+def _tile_task(kind, width, height, window, params):
+    return TILED_GENERATORS[kind][0](width, height, window, **params)
+
+def tiled_map(kind, width, height, tile=512, workers=None, normalize=True, progress=None, **params):
+    """Monta o mapa inteiro em memória a partir de blocos (em processos se workers > 1)"""
+    windows = list(iter_tiles(width, height, tile))
+    blocks = run_chunks(_tile_task, [(kind, width, height, w, params) for w in windows], workers, progress)
+    out = np.empty((height, width), dtype=np.float32)
+    for (x0, y0, w, h), block in zip(windows, blocks):
+        out[y0:y0+h, x0:x0+w] = block
+    if normalize and TILED_GENERATORS[kind][1]:
+        out = (out - out.min()) / (out.max() - out.min() + 1e-8)
+    return out
+
+def repeat_tile(tile_img, y0, h, width):
+    """Faixa de linhas y0..y0+h (largura width) de um ladrilho periódico repetido"""
+    th, tw = tile_img.shape
+    return tile_img[np.arange(y0, y0 + h) % th][:, np.arange(width) % tw]
+
+def render_tiled(kind, width, height, out_path, tile=1024, cmap=None, workers=None, period=None,
+                 progress=None, **params):
+    """Gera um mapa de ruído bloco a bloco e grava em .npy (memmap) ou .png.
+
+    Cada bloco é calculado nas coordenadas globais, então as emendas são
+    invisíveis e o resultado é igual ao mapa inteiro. A memória fica limitada
+    a uma faixa de blocos. Mapas com normalização global (Worley, Voronoi,
+    domain warping) passam por um .npy temporário antes do PNG. Com
+    workers > 1 os blocos de cada faixa são calculados em processos.
+
+    period=(tw, th) calcula uma vez só um ladrilho periódico tw x th
+    (periodic=True) e repete ele até width x height, sem calcular ruído
+    por bloco; a normalização do ladrilho vale para o mapa inteiro.
+    progress recebe a fração de faixas de blocos prontas.
+    """
+    needs_norm = TILED_GENERATORS[kind][1]
+    to_png = out_path.lower().endswith('.png')
+
+    if period is not None:
+        tw, th = period
+        params = dict(params, periodic=True)
+        tile_img = tiled_map(kind, tw, th, tile=min(tile, 512), workers=workers, **params)
+        if to_png:
+            with PNGStreamWriter(out_path, width, height, rgb=cmap is not None) as png:
+                for y0 in range(0, height, tile):
+                    png.write_rows(to_pixels(repeat_tile(tile_img, y0, min(tile, height - y0), width), cmap))
+                    report(progress, min(y0 + tile, height) / height)
+        else:
+            arr = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float32, shape=(height, width))
+            for y0 in range(0, height, tile):
+                h = min(tile, height - y0)
+                arr[y0:y0+h] = repeat_tile(tile_img, y0, h, width)
+                report(progress, (y0 + h) / height)
+            arr.flush()
+            del arr
+        return out_path
+
+    if to_png and not needs_norm:
+        with PNGStreamWriter(out_path, width, height, rgb=cmap is not None) as png:
+            for y0 in range(0, height, tile):
+                h = min(tile, height - y0)
+                windows = [(x0, y0, min(tile, width - x0), h) for x0 in range(0, width, tile)]
+                blocks = run_chunks(_tile_task, [(kind, width, height, w, params) for w in windows], workers)
+                band = np.empty((h, width), dtype=np.float32)
+                for (x0, _, w, _), block in zip(windows, blocks):
+                    band[:, x0:x0+w] = block
+                png.write_rows(to_pixels(band, cmap))
+                report(progress, (y0 + h) / height)
+        return out_path
+
+    raw_path = out_path if not to_png else out_path + '.tmp.npy'
+    arr = np.lib.format.open_memmap(raw_path, mode='w+', dtype=np.float32, shape=(height, width))
+    try:
+        lo, hi = np.float32(np.inf), np.float32(-np.inf)
+        for y0 in range(0, height, tile):
+            windows = [(x0, y0, min(tile, width - x0), min(tile, height - y0)) for x0 in range(0, width, tile)]
+            blocks = run_chunks(_tile_task, [(kind, width, height, w, params) for w in windows], workers)
+            for (x0, _, w, h), block in zip(windows, blocks):
+                arr[y0:y0+h, x0:x0+w] = block
+                lo, hi = min(lo, block.min()), max(hi, block.max())
+            report(progress, min(y0 + tile, height) / height)
+        if needs_norm:
+            for y0 in range(0, height, tile):
+                arr[y0:y0+tile] = (arr[y0:y0+tile] - lo) / (hi - lo + 1e-8)
+        arr.flush()
+
+        if to_png:
+            with PNGStreamWriter(out_path, width, height, rgb=cmap is not None) as png:
+                for y0 in range(0, height, tile):
+                    png.write_rows(to_pixels(arr[y0:y0+tile], cmap))
+    finally:
+        # cancelamento/erro no meio também apaga o .npy temporário
+        del arr
+        if to_png:
+            os.remove(raw_path)
+    return out_path
+
 # ------------------------
 # DESCRIÇÕES DOS ALGORITMOS
 # ------------------------
@@ -399,7 +2224,8 @@ Usado em texturas de nuvens, terrenos e efeitos procedurais.
 Parâmetros:
 • Escala: Tamanho das características (10-200)
 • Oitavas: Níveis de detalhe (1-8)
-• Seed: Semente para variação""",
+• Seed: Semente para variação
+• Tileável: grade periódica, o mapa emenda com ele mesmo""",
 
     "2D - Worley F1": """WORLEY NOISE (F1) - Distância ao ponto mais próximo
 
@@ -409,7 +2235,8 @@ F1 mede a distância ao primeiro ponto mais próximo.
 
 Parâmetros:
 • Pontos: Número de células (10-200)
-• Seed: Semente para distribuição""",
+• Seed: Semente para distribuição
+• Tileável: distâncias no toro, o mapa emenda com ele mesmo""",
 
     "2D - Worley F2": """WORLEY NOISE (F2) - Distância ao segundo ponto
 
@@ -419,7 +2246,19 @@ Bom para texturas de mármore e padrões venosos.
 
 Parâmetros:
 • Pontos: Número de células (10-200)
-• Seed: Semente para distribuição""",
+• Seed: Semente para distribuição
+• Tileável: distâncias no toro, o mapa emenda com ele mesmo""",
+
+    "2D - Worley F2-F1": """WORLEY NOISE (F2 - F1) - Bordas das células
+
+Diferença entre o segundo e o primeiro ponto mais próximo.
+Fica próxima de zero nas fronteiras entre células.
+Ótimo para rachaduras, pele de réptil e vitrais.
+
+Parâmetros:
+• Pontos: Número de células (10-200)
+• Seed: Semente para distribuição
+• Tileável: distâncias no toro, o mapa emenda com ele mesmo""",
 
     "2D - Voronoi": """VORONOI DIAGRAM - Partição espacial
 
@@ -429,7 +2268,9 @@ Usado em mapeamento, análise espacial e arte generativa.
 
 Parâmetros:
 • Pontos: Número de centros (10-150)
-• Seed: Semente para posições""",
+• Seed: Semente para posições
+• Modo rápido: Transformada de distância exata (EDT)
+• Colorir células: Mostra o mapa de rótulos das regiões""",
 
     "2D - Maze (Recursive Backtracker)": """LABIRINTO - Geração por retrocesso recursivo
 
@@ -437,8 +2278,13 @@ Algoritmo que cria labirintos perfeitos (solução única).
 Usa pilha para backtracking quando encontra becos sem saída.
 Gera padrões orgânicos com muitos corredores longos.
 
+Alternativas: Wilson (labirinto uniforme, passeios com
+apagamento de laços) e Eller (linha a linha, memória de
+uma linha só; a exportação grava direto no PNG).
+
 Parâmetros:
-• Células X/Y: Tamanho do labirinto (5-50)
+• Algoritmo: Backtracker, Wilson ou Eller
+• Células X/Y: Tamanho do labirinto (5-2000)
 • Seed: Semente para variação""",
 
     "2D - DLA": """DLA - Diffusion-Limited Aggregation
@@ -448,8 +2294,10 @@ Partículas se movem aleatoriamente até aderir à estrutura.
 Modela cristais, corais, relâmpagos e crescimento natural.
 
 Parâmetros:
-• Tamanho: Resolução da grade (64-512)
-• Partículas: Quantidade simulada (100-5000)
+• Tamanho: Resolução da grade (64-1024)
+• Partículas: Quantidade agregada (100-100000)
+• Aderência: Chance de grudar ao tocar (menor = mais denso)
+• Deriva ao centro: Viés dos passos para o centro
 • Seed: Semente para movimento""",
 
     "2D - K-Means": """K-MEANS - Clustering e agrupamento
@@ -459,8 +2307,9 @@ Agrupa pontos em K clusters por proximidade.
 Usado em análise de dados, compressão e segmentação.
 
 Parâmetros:
-• Pontos: Quantidade de dados (100-1000)
-• K: Número de clusters (2-15)
+• Método: Lloyd (exato, para ao convergir) ou Mini-batch
+• Pontos: Quantidade de dados (100-200000)
+• K: Número de clusters (2-64)
 • Seed: Semente para distribuição""",
 
     "2D - Quadtree": """QUADTREE - Particionamento espacial hierárquico
@@ -468,11 +2317,13 @@ Parâmetros:
 Estrutura de dados que divide recursivamente o espaço.
 Cada nó tem 4 filhos representando quadrantes.
 Otimiza buscas espaciais e detecção de colisão.
+Construída em lote pela ordem de Morton (Z-order),
+com consultas por retângulo, raio e k vizinhos.
 
 Parâmetros:
-• Pontos: Objetos a indexar (50-1000)
-• Capacidade: Pontos por nó (1-20)
-• Prof. Máx: Níveis de subdivisão (3-12)
+• Pontos: Objetos a indexar (50-1000000)
+• Capacidade: Pontos por nó (1-64)
+• Prof. Máx: Níveis de subdivisão (3-16)
 • Seed: Semente para distribuição""",
 
     "2D - Circle Packing": """CIRCLE PACKING - Empacotamento de círculos
@@ -481,8 +2332,14 @@ Algoritmo que posiciona círculos sem sobreposição.
 Gera padrões orgânicos e visualmente interessantes.
 Usado em design, visualização de dados e arte.
 
+Métodos: aleatório, maior primeiro (raios em ordem
+decrescente) e cadeia de frente (círculos tangentes
+crescendo do centro, o mais denso).
+
 Parâmetros:
-• Círculos: Quantidade a empacotar (20-300)
+• Método: Aleatório, Maior primeiro ou Cadeia de frente
+• Raio Container: Tamanho da área (50-2000)
+• Círculos: Quantidade a empacotar (20-50000)
 • Raio Min/Máx: Tamanho dos círculos (2-50)
 • Seed: Semente para posições""",
 
@@ -495,7 +2352,9 @@ Usado para texturas avançadas, nuvens e terrenos.
 Parâmetros:
 • Escala Base: Frequência do ruído (20-150)
 • Força Warp: Intensidade da distorção (0.5-5.0)
-• Seed: Semente para variação""",
+• Níveis Warp: Warp aplicado sobre o warp (1-3)
+• Seed: Semente para variação
+• Tileável: grades periódicas, o mapa emenda com ele mesmo""",
 
     "3D - Esfera Parametrica": """ESFERA PARAMÉTRICA - Superfície 3D matemática
 
@@ -527,15 +2386,20 @@ Parâmetros:
 • Iterações: Número de falhas (100-5000)
 • Seed: Semente para falhas""",
 
-    "3D - Voxel (Esfera)": """VOXEL GRID - Representação volumétrica 3D
+    "3D - Voxel (Implícito)": """VOXEL GRID - Representação volumétrica 3D
 
 Estrutura 3D de cubos (pixels volumétricos).
 Usada em Minecraft, simulações e modelagem.
 Permite manipulação simples de geometria complexa.
+Guardada em runs (RLE); a prévia mostra só as faces
+expostas, numa grade reduzida para grids grandes.
 
 Parâmetros:
-• Grid N: Tamanho da grade (10-40)
-• Raio: Tamanho da esfera (3-20)""",
+• Forma: Esfera, Toro ou volume de Ruído
+• Grid N: Tamanho da grade (10-256)
+• Raio: Tamanho da esfera / toro (3-127)
+• Limiar: Corte do ruído (0.2-0.8)
+• Seed: Semente do ruído""",
 
     "3D - Superficie Perlin (Heightmap)": """HEIGHTMAP PERLIN - Terreno com ruído coerente
 
@@ -558,6 +2422,7 @@ ALGOS = [
     "2D - Perlin Noise",
     "2D - Worley F1",
     "2D - Worley F2",
+    "2D - Worley F2-F1",
     "2D - Voronoi",
     "2D - Maze (Recursive Backtracker)",
     "2D - DLA",
@@ -568,15 +2433,659 @@ ALGOS = [
     "3D - Esfera Parametrica",
     "3D - Terreno (Diamond-Square)",
     "3D - Terreno (Fault Formation)",
-    "3D - Voxel (Esfera)",
+    "3D - Voxel (Implícito)",
     "3D - Superficie Perlin (Heightmap)"
 ]
 
+# ------------------------
+# CACHE DE RESULTADOS
+# ------------------------
+
+# Orçamento de memória do cache da interface e pasta dos .npz expulsos
+RESULT_CACHE_MB = 512
+RESULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "procedural_explorer_cache")
+
+# Controles que só mudam o desenho, não os dados calculados
+DISPLAY_ONLY_PARAMS = {'cells', 'triangles', 'tile_preview'}
+
+# Entradas 3D desenhadas como superfície (prévia com orçamento de triângulos)
+SURFACE_ALGOS = ("3D - Esfera Parametrica", "3D - Terreno (Diamond-Square)",
+                 "3D - Terreno (Fault Formation)", "3D - Superficie Perlin (Heightmap)")
+
+def _result_arrays(data):
+    """Lista de arrays se o resultado for um array ou tupla de arrays, senão None"""
+    if isinstance(data, np.ndarray):
+        return [data]
+    if isinstance(data, tuple) and data and all(isinstance(a, np.ndarray) for a in data):
+        return list(data)
+    return None
+
+def _result_nbytes(data):
+    """Estimativa do tamanho em memória de um resultado de generate()"""
+    arrays = _result_arrays(data)
+    if arrays is not None:
+        return sum(a.nbytes for a in arrays)
+    if isinstance(data, (list, tuple)):
+        return sys.getsizeof(data) + sum(_result_nbytes(item) for item in data)
+    return sys.getsizeof(data)
+
+class ResultCache:
+    """Cache LRU de resultados de generate(), limitado por memória.
+
+    A chave é o nome do algoritmo mais o dicionário exato de parâmetros do
+    painel (menos os controles só de exibição). Quando o orçamento estoura,
+    as entradas menos usadas saem da memória; com spill_dir, as que forem
+    arrays são gravadas em .npz e recarregadas numa próxima consulta. Os
+    arrays guardados são somente leitura.
+    """
+    
+    def __init__(self, max_bytes=512 * 1024**2, spill_dir=None, max_disk_bytes=2 * 1024**3):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()   # chave -> (dados, bytes)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(algo, params):
+        items = tuple(sorted((k, v) for k, v in params.items() if k not in DISPLAY_ONLY_PARAMS))
+        return (algo, items)
+    
+    def _spill_path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, digest + ".npz")
+    
+    def get(self, algo, params):
+        """Retorna o resultado guardado ou None"""
+        key = self.key(algo, params)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+        data = self._load(key)
+        if data is not None:
+            self.hits += 1
+            self._store(key, data)
+            return data
+        self.misses += 1
+        return None
+    
+    def put(self, algo, params, data):
+        self._store(self.key(algo, params), data)
+    
+    def _store(self, key, data):
+        for a in _result_arrays(data) or ():
+            a.flags.writeable = False
+        nbytes = _result_nbytes(data)
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        if nbytes > self.max_bytes:
+            self._spill(key, data)
+            return
+        self._entries[key] = (data, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes:
+            old_key, (old_data, old_bytes) = self._entries.popitem(last=False)
+            self._bytes -= old_bytes
+            self._spill(old_key, old_data)
+    
+    def _spill(self, key, data):
+        """Grava em disco um resultado expulso da memória (só arrays)"""
+        arrays = _result_arrays(data)
+        if self.spill_dir is None or arrays is None:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            np.savez(path, *arrays, tuple=np.array(isinstance(data, tuple)))
+        self._trim_disk()
+    
+    def _load(self, key):
+        if self.spill_dir is None:
+            return None
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as f:
+                n = len(f.files) - 1
+                arrays = tuple(f[f"arr_{i}"] for i in range(n))
+                as_tuple = bool(f["tuple"])
+        except Exception:
+            return None
+        os.utime(path)
+        return arrays if as_tuple else arrays[0]
+    
+    def _trim_disk(self):
+        """Remove os .npz mais antigos (por data de acesso) acima de max_disk_bytes"""
+        files = [os.path.join(self.spill_dir, f) for f in os.listdir(self.spill_dir)
+                 if f.endswith(".npz")]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in files)
+        while files and total > self.max_disk_bytes:
+            oldest = files.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+    
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+    
+    def __len__(self):
+        return len(self._entries)
+
+# ------------------------
+# PRÉVIA 3D
+# ------------------------
+
+PREVIEW_TRIANGLES = 20000   # orçamento padrão de triângulos da prévia de superfícies
+FULL_SURFACE_TRIANGLES = 2_000_000   # teto da exportação pela interface (~1024² vértices)
+MESH_CACHE_ENTRIES = 8
+MESH_CACHE_MB = 128
+
+# Direção da luz do sombreamento padrão do Matplotlib (azimute 225°, altitude ~19.5°)
+_LIGHT = matplotlib.colors.LightSource(azdeg=225, altdeg=19.4712).direction
+
+def decimate_surface(X, Y, Z, budget=PREVIEW_TRIANGLES):
+    """Amostra linhas e colunas (mantendo as bordas) até caber em ~budget triângulos.
+
+    budget=None devolve a grade inteira. Os vértices são pontos da própria
+    grade, então a malha reduzida passa pela superfície original.
+    """
+    rows, cols = Z.shape
+    tris = 2 * (rows - 1) * (cols - 1)
+    if budget is None or tris <= budget:
+        return X, Y, Z
+    f = math.sqrt(budget / tris)
+    ri = np.unique(np.linspace(0, rows - 1, max(2, int((rows - 1) * f) + 1)).round().astype(np.intp))
+    ci = np.unique(np.linspace(0, cols - 1, max(2, int((cols - 1) * f) + 1)).round().astype(np.intp))
+    sel = np.ix_(ri, ci)
+    return X[sel], Y[sel], Z[sel]
+
+def surface_quads(X, Y, Z, cmap='viridis', shade=True):
+    """Quadriláteros (m, 4, 3) e cores RGBA de uma grade, sem o laço por face do plot_surface.
+
+    A cor vem do z médio de cada face no colormap, escurecida pela normal
+    como no sombreamento padrão do plot_surface.
+    """
+    P = np.stack([X, Y, Z], axis=-1).astype(np.float64)
+    quads = np.stack([P[:-1, :-1], P[:-1, 1:], P[1:, 1:], P[1:, :-1]], axis=2).reshape(-1, 4, 3)
+    zm = quads[:, :, 2].mean(axis=1)
+    lo, hi = zm.min(), zm.max()
+    colors = matplotlib.colormaps[cmap]((zm - lo) / (hi - lo) if hi > lo else np.zeros_like(zm))
+    if shade:
+        n = np.cross(quads[:, 2] - quads[:, 0], quads[:, 3] - quads[:, 1])
+        norm = np.linalg.norm(n, axis=1)
+        norm[norm == 0] = 1
+        k = (n / norm[:, None]) @ _LIGHT
+        colors[:, :3] *= (0.65 + 0.35 * k)[:, None]
+    return quads.astype(np.float32), colors
+
+class MeshCache:
+    """LRU pequeno das malhas de prévia já montadas (chave: algoritmo, parâmetros, orçamento).
+
+    Redesenhar o mesmo resultado (girar a câmera e redesenhar, trocar só
+    controles de exibição, voltar a um resultado do cache) não refaz a
+    decimação nem as faces. Limitado em entradas e em bytes; uma malha
+    maior que max_bytes é devolvida sem ser guardada.
+    """
+    
+    def __init__(self, max_entries=MESH_CACHE_ENTRIES, max_bytes=MESH_CACHE_MB * 1024**2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # chave -> ((quads, cores), bytes)
+        self._bytes = 0
+    
+    def get(self, key, build):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+        mesh = build()
+        nbytes = sum(a.nbytes for a in mesh)
+        if nbytes > self.max_bytes:
+            return mesh
+        self._entries[key] = (mesh, nbytes)
+        self._bytes += nbytes
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._bytes -= self._entries.popitem(last=False)[1][1]
+        return mesh
+    
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+MESH_CACHE = MeshCache()
+
+def _surface_grid(algo, data):
+    """(X, Y, Z, colormap) de um resultado 3D de superfície"""
+    if algo == "3D - Esfera Parametrica":
+        X, Y, Z = data
+        return X, Y, Z, 'viridis'
+    X, Y = np.meshgrid(np.arange(data.shape[1]), np.arange(data.shape[0]))
+    cmap = 'viridis' if algo == "3D - Superficie Perlin (Heightmap)" else 'terrain'
+    return X, Y, data, cmap
+
+def draw_surface(ax, algo, params, data, budget, preview=True):
+    """Superfície 3D com até budget triângulos; só as malhas de prévia vão para o MESH_CACHE"""
+    X, Y, Z, cmap = _surface_grid(algo, data)
+    
+    def build():
+        return surface_quads(*decimate_surface(X, Y, Z, budget), cmap=cmap)
+    if preview:
+        quads, colors = MESH_CACHE.get((ResultCache.key(algo, params), budget), build)
+    else:
+        quads, colors = build()
+    ax.add_collection3d(Poly3DCollection(quads, facecolors=colors, linewidths=0))
+    ax.auto_scale_xyz([X.min(), X.max()], [Y.min(), Y.max()], [Z.min(), Z.max()])
+    tris = 2 * len(quads)
+    full = 2 * (Z.shape[0] - 1) * (Z.shape[1] - 1)
+    label = "prévia" if preview else "malha reduzida"
+    title = algo if tris == full else f"{algo}\n{label}: {tris} de {full} triângulos"
+    ax.set_title(title, fontsize=14, fontweight='bold')
+
+# ------------------------
+# PARÂMETROS DOS ALGORITMOS
+# ------------------------
+
+# Controles de cada algoritmo: (tipo, nome, rótulo, ...). Tipos:
+#   'spin' / 'double': mínimo, máximo, padrão, passo
+#   'check': padrão
+#   'combo': opções (a primeira é o padrão)
+# O painel da interface é montado a partir daqui, e default_params() dá os
+# mesmos padrões para uso sem interface.
+
+_PERIODIC_CONTROLS = [
+    ('check', 'periodic', 'Tileável (periódico):', False),
+    ('check', 'tile_preview', 'Prévia 2×2:', False),
+]
+
+_WORLEY_CONTROLS = [
+    ('spin', 'width', 'Largura:', 64, 1024, 512, 64),
+    ('spin', 'height', 'Altura:', 64, 1024, 512, 64),
+    ('spin', 'points', 'Pontos:', 10, 200, 50, 10),
+    ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+] + _PERIODIC_CONTROLS
+
+# Superfícies 3D: orçamento da prévia (ver PRÉVIA 3D)
+_PREVIEW_CONTROLS = [
+    ('spin', 'triangles', 'Triângulos (prévia):', 2000, 200000, PREVIEW_TRIANGLES, 2000),
+]
+
+ALGO_CONTROLS = {
+    '2D - Perlin Noise': [
+        ('spin', 'width', 'Largura:', 64, 1024, 512, 64),
+        ('spin', 'height', 'Altura:', 64, 1024, 512, 64),
+        ('double', 'scale', 'Escala:', 10.0, 200.0, 60.0, 10.0),
+        ('spin', 'octaves', 'Oitavas:', 1, 8, 4),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+    ] + _PERIODIC_CONTROLS,
+    '2D - Worley F1': _WORLEY_CONTROLS,
+    '2D - Worley F2': _WORLEY_CONTROLS,
+    '2D - Worley F2-F1': _WORLEY_CONTROLS,
+    '2D - Voronoi': [
+        ('spin', 'width', 'Largura:', 64, 1024, 512, 64),
+        ('spin', 'height', 'Altura:', 64, 1024, 512, 64),
+        ('spin', 'points', 'Pontos:', 10, 150, 30, 10),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+        ('check', 'fast', 'Modo rápido (EDT):', True),
+        ('check', 'cells', 'Colorir células:', False),
+    ],
+    '2D - Maze (Recursive Backtracker)': [
+        ('combo', 'maze_algo', 'Algoritmo:', list(MAZE_ALGORITHMS)),
+        ('spin', 'maze_w', 'Células X:', 5, 2000, 20, 5),
+        ('spin', 'maze_h', 'Células Y:', 5, 2000, 15, 5),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+    ],
+    '2D - DLA': [
+        ('spin', 'grid_size', 'Tamanho:', 64, 1024, 256, 64),
+        ('spin', 'particles', 'Partículas:', 100, 100000, 1500, 500),
+        ('double', 'stickiness', 'Aderência:', 0.05, 1.0, 1.0, 0.05),
+        ('double', 'bias', 'Deriva ao centro:', 0.0, 0.5, 0.0, 0.05),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+    ],
+    '2D - K-Means': [
+        ('combo', 'kmeans_method', 'Método:', list(KMEANS_METHODS)),
+        ('spin', 'points', 'Pontos:', 100, 200000, 300, 50),
+        ('spin', 'k', 'K (clusters):', 2, 64, 5),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+    ],
+    '2D - Quadtree': [
+        ('spin', 'width', 'Largura:', 100, 1000, 400, 50),
+        ('spin', 'height', 'Altura:', 100, 1000, 400, 50),
+        ('spin', 'points', 'Pontos:', 50, 1000000, 200, 50),
+        ('spin', 'capacity', 'Capacidade:', 1, 64, 4),
+        ('spin', 'max_depth', 'Prof. Máx:', 3, 16, 8),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+    ],
+    '2D - Circle Packing': [
+        ('combo', 'packing', 'Método:', list(CIRCLE_PACKING_METHODS)),
+        ('spin', 'container_r', 'Raio Container:', 50, 2000, 150, 25),
+        ('spin', 'circles', 'Círculos:', 20, 50000, 80, 10),
+        ('spin', 'rmin', 'Raio Min:', 2, 20, 3),
+        ('spin', 'rmax', 'Raio Máx:', 5, 50, 15, 5),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+    ],
+    '2D - Domain Warping': [
+        ('spin', 'width', 'Largura:', 64, 1024, 512, 64),
+        ('spin', 'height', 'Altura:', 64, 1024, 512, 64),
+        ('double', 'base_scale', 'Escala Base:', 20.0, 150.0, 60.0, 10.0),
+        ('double', 'warp_strength', 'Força Warp:', 0.5, 5.0, 1.5, 0.5),
+        ('spin', 'warp_levels', 'Níveis Warp:', 1, 3, 1),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+    ] + _PERIODIC_CONTROLS,
+    '3D - Esfera Parametrica': [
+        ('spin', 'resolution', 'Resolução:', 20, 1000, 60, 10),
+    ] + _PREVIEW_CONTROLS,
+    '3D - Terreno (Diamond-Square)': [
+        ('spin', 'size', 'Tamanho:', 33, 2049, 129, 64),
+        ('double', 'roughness', 'Rugosidade:', 0.1, 1.5, 0.6, 0.1),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+    ] + _PREVIEW_CONTROLS,
+    '3D - Terreno (Fault Formation)': [
+        ('spin', 'size', 'Tamanho:', 40, 1024, 100, 20),
+        ('spin', 'iterations', 'Iterações:', 100, 5000, 1000, 100),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+    ] + _PREVIEW_CONTROLS,
+    '3D - Voxel (Implícito)': [
+        ('combo', 'voxel_shape', 'Forma:', list(VOXEL_SHAPES)),
+        ('spin', 'grid_n', 'Grid N:', 10, 256, 20, 5),
+        ('spin', 'radius', 'Raio:', 3, 127, 8, 2),
+        ('double', 'threshold', 'Limiar (ruído):', 0.2, 0.8, 0.5, 0.05),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+    ],
+    '3D - Superficie Perlin (Heightmap)': [
+        ('spin', 'resolution', 'Resolução:', 40, 2048, 100, 20),
+        ('double', 'scale', 'Escala:', 10.0, 150.0, 40.0, 10.0),
+        ('spin', 'octaves', 'Oitavas:', 1, 8, 4),
+        ('spin', 'seed', 'Seed:', 0, 99999, 0, 100),
+    ] + _PREVIEW_CONTROLS,
+}
+
+def default_params(algo):
+    """Dicionário nome -> valor padrão dos controles de `algo` (o mesmo do painel)"""
+    params = {}
+    for kind, name, label, *args in ALGO_CONTROLS[algo]:
+        if kind in ('spin', 'double'):
+            params[name] = args[2]
+        elif kind == 'check':
+            params[name] = args[0]
+        else:
+            params[name] = list(args[0])[0]
+    return params
+
+def resolve_params(algo, params=None):
+    """Completa `params` com os padrões de `algo`; nomes ou opções desconhecidos levantam ValueError.
+
+    Os limites mínimo/máximo do painel não são impostos: fora da interface
+    mapas maiores são permitidos.
+    """
+    if algo not in ALGO_CONTROLS:
+        raise ValueError(f"Algoritmo desconhecido: {algo}")
+    out = default_params(algo)
+    unknown = set(params or ()) - set(out)
+    if unknown:
+        raise ValueError(f"{algo}: parâmetros desconhecidos {sorted(unknown)}; "
+                         f"aceitos: {sorted(out)}")
+    out.update(params or {})
+    for kind, name, label, *args in ALGO_CONTROLS[algo]:
+        if kind == 'combo' and out[name] not in args[0]:
+            raise ValueError(f"{algo}: {name}={out[name]!r} não é uma das opções {list(args[0])}")
+        if kind == 'spin':
+            out[name] = int(out[name])
+        elif kind == 'double':
+            out[name] = float(out[name])
+        elif kind == 'check':
+            out[name] = bool(out[name])
+    return out
+
+# ------------------------
+# EXECUÇÃO DOS ALGORITMOS
+# ------------------------
+
+def generate(algo, params, workers=None, progress=None):
+    """Calcula os dados do algoritmo `algo` a partir do dicionário de parâmetros.
+
+    Não toca em widgets nem no Matplotlib, então pode rodar fora da thread da
+    interface. `params` usa as mesmas chaves dos controles do painel.
+    """
+    p = params
+    if algo == "2D - Perlin Noise":
+        return perlin_noise_2d_map(
+            width=p['width'],
+            height=p['height'],
+            scale=p['scale'],
+            octaves=p['octaves'],
+            seed=p['seed'],
+            periodic=p['periodic'],
+            workers=workers,
+            progress=progress
+        )
+    
+    elif algo in ("2D - Worley F1", "2D - Worley F2", "2D - Worley F2-F1"):
+        return worley_noise_2d(
+            width=p['width'],
+            height=p['height'],
+            num_points=p['points'],
+            seed=p['seed'],
+            mode={"2D - Worley F1": 1, "2D - Worley F2": 2}.get(algo, 3),
+            periodic=p['periodic'],
+            workers=workers,
+            progress=progress
+        )
+    
+    elif algo == "2D - Voronoi":
+        return voronoi_maps(
+            width=p['width'],
+            height=p['height'],
+            num_points=p['points'],
+            seed=p['seed'],
+            fast=p['fast'],
+            progress=progress
+        )
+    
+    elif algo == "2D - Maze (Recursive Backtracker)":
+        return MAZE_ALGORITHMS[p['maze_algo']](w=p['maze_w'], h=p['maze_h'], seed=p['seed'],
+                                               progress=progress)
+    
+    elif algo == "2D - DLA":
+        return dla(
+            grid_size=p['grid_size'],
+            num_particles=p['particles'],
+            seed=p['seed'],
+            stickiness=p['stickiness'],
+            bias=p['bias'],
+            progress=progress
+        )
+    
+    elif algo == "2D - K-Means":
+        return k_means_demo(n_points=p['points'], k=p['k'], seed=p['seed'],
+                            method=KMEANS_METHODS[p['kmeans_method']], progress=progress)
+    
+    elif algo == "2D - Quadtree":
+        W, H = p['width'], p['height']
+        rng = np.random.RandomState(p['seed'])
+        pts = rng.rand(p['points'], 2) * np.array([W, H])
+        qt = PointQuadtree(pts, Rect(0, 0, W, H), cap=p['capacity'], max_depth=p['max_depth'])
+        return qt.rect_array(), pts
+    
+    elif algo == "2D - Circle Packing":
+        return circle_packing(
+            container_r=p['container_r'],
+            n=p['circles'],
+            rmin=p['rmin'],
+            rmax=p['rmax'],
+            seed=p['seed'],
+            method=CIRCLE_PACKING_METHODS[p['packing']],
+            progress=progress
+        )
+    
+    elif algo == "2D - Domain Warping":
+        return domain_warping_map(
+            width=p['width'],
+            height=p['height'],
+            base_scale=p['base_scale'],
+            warp_scale=p['base_scale'] * 0.6,
+            warp_strength=p['warp_strength'],
+            seed=p['seed'],
+            levels=p['warp_levels'],
+            periodic=p['periodic'],
+            progress=progress
+        )
+    
+    elif algo == "3D - Esfera Parametrica":
+        return sphere_parametric(n=p['resolution'], radius=1.0)
+    
+    elif algo == "3D - Terreno (Diamond-Square)":
+        return diamond_square(n=p['size'], roughness=p['roughness'], seed=p['seed'], progress=progress)
+    
+    elif algo == "3D - Terreno (Fault Formation)":
+        return fault_formation(
+            size=p['size'],
+            iterations=p['iterations'],
+            seed=p['seed'],
+            workers=workers,
+            progress=progress
+        )
+    
+    elif algo == "3D - Voxel (Implícito)":
+        n = p['grid_n']
+        voxels = voxel_shape(n, p['voxel_shape'], p['radius'], p['seed'], p['threshold'],
+                             progress=progress)
+        f = voxel_preview_factor(n)
+        vox, dirs = (voxels.downsample(f) if f > 1 else voxels).surface_faces()
+        return voxels.to_arrays() + (vox, dirs)
+    
+    elif algo == "3D - Superficie Perlin (Heightmap)":
+        n = p['resolution']
+        return perlin_noise_2d_map(
+            width=n,
+            height=n,
+            scale=p['scale'],
+            octaves=p['octaves'],
+            seed=p['seed'],
+            workers=workers,
+            progress=progress
+        )
+    
+    raise ValueError(f"Algoritmo desconhecido: {algo}")
+
+def draw_result(fig, algo, params, data, preview=True, full_budget=None):
+    """Desenha em `fig` os dados calculados por generate().
+
+    Com preview=False as superfícies 3D usam a malha inteira (exportação),
+    ou no máximo full_budget triângulos.
+    """
+    p = params
+    
+    if algo in ("2D - Perlin Noise", "2D - Worley F1", "2D - Worley F2", "2D - Worley F2-F1",
+                "2D - Domain Warping"):
+        ax = fig.add_subplot(111)
+        tiled = p.get('periodic') and p.get('tile_preview')
+        ax.imshow(np.tile(data, (2, 2)) if tiled else data, origin='upper', cmap='viridis')
+        ax.set_title(f"{algo} (2×2)" if tiled else algo, fontsize=14, fontweight='bold')
+        ax.axis('off')
+    
+    elif algo == "2D - Voronoi":
+        img, labels = data
+        ax = fig.add_subplot(111)
+        if p['cells']:
+            ax.imshow(labels % 20, origin='upper', cmap='tab20')
+            ax.imshow(img, origin='upper', cmap='gray', alpha=0.35)
+        else:
+            ax.imshow(img, origin='upper', cmap='viridis')
+        ax.set_title(algo, fontsize=14, fontweight='bold')
+        ax.axis('off')
+    
+    elif algo == "2D - Maze (Recursive Backtracker)":
+        ax = fig.add_subplot(111)
+        ax.imshow(data, cmap='binary', origin='upper')
+        ax.set_title(algo, fontsize=14, fontweight='bold')
+        ax.axis('off')
+    
+    elif algo == "2D - DLA":
+        ax = fig.add_subplot(111)
+        ax.imshow(data, origin='upper', cmap='hot')
+        ax.set_title(algo, fontsize=14, fontweight='bold')
+        ax.axis('off')
+    
+    elif algo == "2D - K-Means":
+        pts, labels, cent = data
+        ax = fig.add_subplot(111)
+        ax.scatter(pts[:,0], pts[:,1], c=labels, s=8 if len(pts) <= 5000 else 1,
+                   cmap='tab10', alpha=0.6, rasterized=len(pts) > 5000)
+        ax.scatter(cent[:,0], cent[:,1], s=200, marker='X', c='red', 
+                  linewidths=2, edgecolors='black', zorder=10)
+        ax.set_title(algo, fontsize=14, fontweight='bold')
+        ax.set_aspect('equal', 'box')
+    
+    elif algo == "2D - Quadtree":
+        rects, pts = data
+        W, H = p['width'], p['height']
+        ax = fig.add_subplot(111)
+        x, y, w, h = rects.T
+        # só as bordas esquerda/superior de cada nó + o contorno externo
+        segs = np.concatenate([
+            np.stack([np.stack([x, y], 1), np.stack([x + w, y], 1)], 1),
+            np.stack([np.stack([x, y], 1), np.stack([x, y + h], 1)], 1),
+            [[[W, 0], [W, H]], [[0, H], [W, H]]],
+        ])
+        ax.add_collection(LineCollection(segs, colors='b', linewidths=0.8))
+        ax.scatter(pts[:, 0], pts[:, 1], s=6 if len(pts) <= 5000 else 1, c='red', zorder=5, rasterized=len(pts) > 5000)
+        ax.set_title(algo, fontsize=14, fontweight='bold')
+        ax.set_xlim(0, W)
+        ax.set_ylim(0, H)
+        ax.set_aspect('equal', 'box')
+        ax.invert_yaxis()
+    
+    elif algo == "2D - Circle Packing":
+        ax = fig.add_subplot(111)
+        ax.set_aspect('equal', 'box')
+        R = p['container_r']
+        ax.set_xlim(-R-10, R+10)
+        ax.set_ylim(-R-10, R+10)
+        # Container circle
+        container = Circle((0, 0), R, fill=False, edgecolor='black', linewidth=2)
+        ax.add_patch(container)
+        # Packed circles (uma coleção só: milhares de patches ficam lentos)
+        circles = PatchCollection([Circle((cx, cy), cr) for (cx, cy, cr) in data],
+                                  facecolor='lightblue', edgecolor='blue',
+                                  linewidth=1 if len(data) < 2000 else 0.3)
+        ax.add_collection(circles)
+        ax.set_title(algo, fontsize=14, fontweight='bold')
+        ax.axis('off')
+    
+    elif algo in SURFACE_ALGOS:
+        ax = fig.add_subplot(111, projection='3d')
+        budget = p.get('triangles', PREVIEW_TRIANGLES) if preview else full_budget
+        draw_surface(ax, algo, p, data, budget, preview)
+    
+    elif algo == "3D - Voxel (Implícito)":
+        shape, vox, dirs = data[0], data[4], data[5]
+        n = int(shape[0])
+        f = voxel_preview_factor(n)
+        ax = fig.add_subplot(111, projection='3d')
+        # sombreamento fixo por direção da face, no lugar de ax.voxels (lento: um cubo por voxel)
+        shade = np.array([0.55, 0.85, 0.65, 0.75, 0.45, 1.0])[dirs]
+        colors = np.column_stack([np.zeros_like(shade), shade, shade, np.full_like(shade, 0.9)])
+        faces = Poly3DCollection(voxel_quads(vox, dirs, f), facecolors=colors,
+                                 edgecolors='k' if len(vox) < 3000 else 'none', linewidths=0.3)
+        ax.add_collection3d(faces)
+        ax.set_xlim(0, n)
+        ax.set_ylim(0, n)
+        ax.set_zlim(0, n)
+        title = f"{algo} - {n}³" + (f" (prévia 1:{f})" if f > 1 else "")
+        ax.set_title(title, fontsize=14, fontweight='bold')
+
 # ------------------------
 # PAINEL DE CONTROLE DINÂMICO
 # ------------------------
 
 class DynamicControlPanel(QWidget):
+    # Emitido quando qualquer controle muda de valor (usado pela prévia automática)
+    changed = pyqtSignal()
+    
     def __init__(self):
         super().__init__()
         self.layout = QFormLayout()
@@ -601,6 +3110,7 @@ class DynamicControlPanel(QWidget):
         spinbox.setRange(min_val, max_val)
         spinbox.setValue(default)
         spinbox.setSingleStep(step)
+        spinbox.valueChanged.connect(self.changed)
         self.layout.addRow(label, spinbox)
         self.controls[name] = spinbox
         return spinbox
@@ -612,15 +3122,146 @@ class DynamicControlPanel(QWidget):
         spinbox.setValue(default)
         spinbox.setSingleStep(step)
         spinbox.setDecimals(decimals)
+        spinbox.valueChanged.connect(self.changed)
         self.layout.addRow(label, spinbox)
         self.controls[name] = spinbox
         return spinbox
     
+    def add_checkbox(self, name, label, default=False):
+        """Adiciona um CheckBox"""
+        checkbox = QCheckBox()
+        checkbox.setChecked(default)
+        checkbox.stateChanged.connect(self.changed)
+        self.layout.addRow(label, checkbox)
+        self.controls[name] = checkbox
+        return checkbox
+    
+    def add_combobox(self, name, label, items, default=None):
+        """Adiciona um ComboBox"""
+        combo = QComboBox()
+        combo.addItems(items)
+        if default is not None:
+            combo.setCurrentText(default)
+        combo.currentTextChanged.connect(self.changed)
+        self.layout.addRow(label, combo)
+        self.controls[name] = combo
+        return combo
+    
+    def add_control(self, kind, name, label, *args):
+        """Adiciona um controle descrito como em ALGO_CONTROLS"""
+        add = {'spin': self.add_spinbox, 'double': self.add_doublespinbox,
+               'check': self.add_checkbox, 'combo': self.add_combobox}[kind]
+        if kind == 'combo':
+            return add(name, label, list(args[0]))
+        return add(name, label, *args)
+    
+    def link_range(self, lo_name, hi_name):
+        """Mantém o controle hi_name >= lo_name (ex.: Raio Máx >= Raio Min)"""
+        lo, hi = self.controls[lo_name], self.controls[hi_name]
+        floor = hi.minimum()
+        
+        def clamp(value):
+            hi.setMinimum(max(floor, value))
+        
+        lo.valueChanged.connect(clamp)
+        clamp(lo.value())
+    
     def get_value(self, name):
         """Retorna o valor de um controle"""
         if name in self.controls:
-            return self.controls[name].value()
+            control = self.controls[name]
+            if isinstance(control, QCheckBox):
+                return control.isChecked()
+            if isinstance(control, QComboBox):
+                return control.currentText()
+            return control.value()
         return None
+    
+    def values(self):
+        """Retorna um dicionário nome -> valor de todos os controles"""
+        return {name: self.get_value(name) for name in self.controls}
+
+# ------------------------
+# EXECUÇÃO EM SEGUNDO PLANO
+# ------------------------
+
+class GenerationWorker(QThread):
+    """Roda generate() fora da thread da interface.
+
+    O cancelamento é cooperativo: o callback de progresso levanta
+    GenerationCancelled na próxima checagem depois de cancel().
+    """
+    progress_changed = pyqtSignal(int, int)               # job_id, porcentagem
+    succeeded = pyqtSignal(int, str, object, object)      # job_id, algo, params, dados
+    failed = pyqtSignal(int, str)                         # job_id, mensagem
+    
+    def __init__(self, job_id, algo, params, workers=None):
+        super().__init__()
+        self.job_id = job_id
+        self.algo = algo
+        self.params = params
+        self.workers = workers
+        self._cancelled = False
+    
+    def cancel(self):
+        self._cancelled = True
+    
+    def _progress(self, fraction):
+        if self._cancelled:
+            raise GenerationCancelled()
+        self.progress_changed.emit(self.job_id, int(fraction * 100))
+    
+    def run(self):
+        try:
+            data = generate(self.algo, self.params, self.workers, self._progress)
+        except GenerationCancelled:
+            return
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.failed.emit(self.job_id, str(e))
+            return
+        if not self._cancelled:
+            self.succeeded.emit(self.job_id, self.algo, self.params, data)
+
+class ExportWorker(QThread):
+    """Roda uma exportação demorada, fn(path, progress), fora da thread da interface.
+
+    Cancelamento cooperativo como no GenerationWorker; uma exportação
+    cancelada apaga o arquivo parcial.
+    """
+    progress_changed = pyqtSignal(int)    # porcentagem
+    succeeded = pyqtSignal(str)           # caminho
+    failed = pyqtSignal(str, str)         # caminho, mensagem
+    
+    def __init__(self, fn, path):
+        super().__init__()
+        self.fn = fn
+        self.path = path
+        self._cancelled = False
+    
+    def cancel(self):
+        self._cancelled = True
+    
+    def _progress(self, fraction):
+        if self._cancelled:
+            raise GenerationCancelled()
+        self.progress_changed.emit(int(fraction * 100))
+    
+    def run(self):
+        try:
+            self.fn(self.path, self._progress)
+        except GenerationCancelled:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.failed.emit(self.path, "cancelada")
+            return
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.failed.emit(self.path, str(e))
+            return
+        self.succeeded.emit(self.path)
 
 # ------------------------
 # JANELA PRINCIPAL
@@ -666,10 +3307,26 @@ class ProceduralExplorer(QMainWindow):
         control_scroll_layout.addWidget(self.control_panel)
         control_scroll_layout.addStretch()
         
+        # Processos para os geradores pesados (oitavas, blocos, falhas)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, os.cpu_count() or 1)
+        self.workers_spin.setValue(min(4, os.cpu_count() or 1))
+        
         # Botões
         self.btn_run = QPushButton("▶ Executar")
         self.btn_run.setStyleSheet("QPushButton { font-size: 14px; padding: 8px; background-color: #4CAF50; color: white; }")
         self.btn_save = QPushButton("💾 Salvar imagem...")
+        self.btn_save.setToolTip(
+            f"Superfícies 3D são exportadas em segundo plano com a malha inteira, "
+            f"até {FULL_SURFACE_TRIANGLES:,} triângulos".replace(",", "."))
+        self.btn_tiled = QPushButton("🧱 Exportar em blocos (pôster)...")
+        self.btn_cancel = QPushButton("■ Cancelar")
+        self.btn_cancel.setEnabled(False)
+        self.auto_check = QCheckBox("Prévia automática")
+        self.disk_cache_check = QCheckBox("Cache em disco (.npz)")
+        self.disk_cache_check.toggled.connect(self.on_disk_cache_toggled)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
         
         left.addWidget(QLabel("<b>Selecione o Algoritmo:</b>"))
         left.addWidget(self.algo_combo)
@@ -677,19 +3334,47 @@ class ProceduralExplorer(QMainWindow):
         left.addWidget(self.description_box)
         left.addWidget(QLabel("<b>Parâmetros:</b>"))
         left.addWidget(control_scroll)
-        left.addWidget(self.btn_run)
+        workers_row = QHBoxLayout()
+        workers_row.addWidget(QLabel("Processos:"))
+        workers_row.addWidget(self.workers_spin)
+        left.addLayout(workers_row)
+        left.addWidget(self.auto_check)
+        left.addWidget(self.disk_cache_check)
+        run_row = QHBoxLayout()
+        run_row.addWidget(self.btn_run, 3)
+        run_row.addWidget(self.btn_cancel, 1)
+        left.addLayout(run_row)
+        left.addWidget(self.progress_bar)
         left.addWidget(self.btn_save)
+        left.addWidget(self.btn_tiled)
         
         # Canvas matplotlib
-        self.fig = plt.figure(figsize=(8, 7))
+        self.fig = Figure(figsize=(8, 7))
         self.canvas = FigureCanvas(self.fig)
         
         layout.addLayout(left, 2)
         layout.addWidget(self.canvas, 5)
         
+        # Resultados já calculados (trocar de seed e voltar é instantâneo)
+        self.cache = ResultCache(max_bytes=RESULT_CACHE_MB * 1024**2)
+        # Resultado desenhado agora (algoritmo, parâmetros, dados), usado na exportação
+        self._shown = None
+        
+        # Execução em segundo plano: id da última requisição e workers vivos
+        self._job_id = 0
+        self._workers = []
+        self._exports = []
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(300)
+        self._debounce.timeout.connect(self.run_current)
+        
         # Conectar eventos
         self.btn_run.clicked.connect(self.run_current)
+        self.btn_cancel.clicked.connect(self.cancel_all)
+        self.control_panel.changed.connect(self.schedule_run)
         self.btn_save.clicked.connect(self.save_image)
+        self.btn_tiled.clicked.connect(self.export_tiled)
         
         # Inicializar com primeiro algoritmo
         self.on_algorithm_changed(ALGOS[0])
@@ -704,295 +3389,123 @@ class ProceduralExplorer(QMainWindow):
         self.control_panel.clear_controls()
         
         # Adicionar controles específicos para cada algoritmo
-        if algo_name == "2D - Perlin Noise":
-            self.control_panel.add_spinbox('width', 'Largura:', 64, 1024, 512, step=64)
-            self.control_panel.add_spinbox('height', 'Altura:', 64, 1024, 512, step=64)
-            self.control_panel.add_doublespinbox('scale', 'Escala:', 10.0, 200.0, 60.0, step=10.0)
-            self.control_panel.add_spinbox('octaves', 'Oitavas:', 1, 8, 4)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
-        
-        elif algo_name in ["2D - Worley F1", "2D - Worley F2"]:
-            self.control_panel.add_spinbox('width', 'Largura:', 64, 1024, 512, step=64)
-            self.control_panel.add_spinbox('height', 'Altura:', 64, 1024, 512, step=64)
-            self.control_panel.add_spinbox('points', 'Pontos:', 10, 200, 50, step=10)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
-        
-        elif algo_name == "2D - Voronoi":
-            self.control_panel.add_spinbox('width', 'Largura:', 64, 1024, 512, step=64)
-            self.control_panel.add_spinbox('height', 'Altura:', 64, 1024, 512, step=64)
-            self.control_panel.add_spinbox('points', 'Pontos:', 10, 150, 30, step=10)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
-        
-        elif algo_name == "2D - Maze (Recursive Backtracker)":
-            self.control_panel.add_spinbox('maze_w', 'Células X:', 5, 50, 20, step=5)
-            self.control_panel.add_spinbox('maze_h', 'Células Y:', 5, 50, 15, step=5)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
-        
-        elif algo_name == "2D - DLA":
-            self.control_panel.add_spinbox('grid_size', 'Tamanho:', 64, 512, 256, step=64)
-            self.control_panel.add_spinbox('particles', 'Partículas:', 100, 5000, 1500, step=100)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
-        
-        elif algo_name == "2D - K-Means":
-            self.control_panel.add_spinbox('points', 'Pontos:', 100, 1000, 300, step=50)
-            self.control_panel.add_spinbox('k', 'K (clusters):', 2, 15, 5)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
-        
-        elif algo_name == "2D - Quadtree":
-            self.control_panel.add_spinbox('width', 'Largura:', 100, 1000, 400, step=50)
-            self.control_panel.add_spinbox('height', 'Altura:', 100, 1000, 400, step=50)
-            self.control_panel.add_spinbox('points', 'Pontos:', 50, 1000, 200, step=50)
-            self.control_panel.add_spinbox('capacity', 'Capacidade:', 1, 20, 4)
-            self.control_panel.add_spinbox('max_depth', 'Prof. Máx:', 3, 12, 8)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
-        
-        elif algo_name == "2D - Circle Packing":
-            self.control_panel.add_spinbox('container_r', 'Raio Container:', 50, 300, 150, step=25)
-            self.control_panel.add_spinbox('circles', 'Círculos:', 20, 300, 80, step=10)
-            self.control_panel.add_spinbox('rmin', 'Raio Min:', 2, 20, 3)
-            self.control_panel.add_spinbox('rmax', 'Raio Máx:', 5, 50, 15, step=5)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
-        
-        elif algo_name == "2D - Domain Warping":
-            self.control_panel.add_spinbox('width', 'Largura:', 64, 1024, 512, step=64)
-            self.control_panel.add_spinbox('height', 'Altura:', 64, 1024, 512, step=64)
-            self.control_panel.add_doublespinbox('base_scale', 'Escala Base:', 20.0, 150.0, 60.0, step=10.0)
-            self.control_panel.add_doublespinbox('warp_strength', 'Força Warp:', 0.5, 5.0, 1.5, step=0.5)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
-        
-        elif algo_name == "3D - Esfera Parametrica":
-            self.control_panel.add_spinbox('resolution', 'Resolução:', 20, 150, 60, step=10)
-        
-        elif algo_name == "3D - Terreno (Diamond-Square)":
-            self.control_panel.add_doublespinbox('roughness', 'Rugosidade:', 0.1, 1.5, 0.6, step=0.1)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
-        
-        elif algo_name == "3D - Terreno (Fault Formation)":
-            self.control_panel.add_spinbox('size', 'Tamanho:', 40, 200, 100, step=20)
-            self.control_panel.add_spinbox('iterations', 'Iterações:', 100, 5000, 1000, step=100)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
-        
-        elif algo_name == "3D - Voxel (Esfera)":
-            self.control_panel.add_spinbox('grid_n', 'Grid N:', 10, 40, 20, step=5)
-            self.control_panel.add_spinbox('radius', 'Raio:', 3, 20, 8, step=2)
-        
-        elif algo_name == "3D - Superficie Perlin (Heightmap)":
-            self.control_panel.add_spinbox('resolution', 'Resolução:', 40, 220, 100, step=20)
-            self.control_panel.add_doublespinbox('scale', 'Escala:', 10.0, 150.0, 40.0, step=10.0)
-            self.control_panel.add_spinbox('octaves', 'Oitavas:', 1, 8, 4)
-            self.control_panel.add_spinbox('seed', 'Seed:', 0, 99999, 0, step=100)
+        for kind, name, label, *args in ALGO_CONTROLS.get(algo_name, []):
+            self.control_panel.add_control(kind, name, label, *args)
+        if {'rmin', 'rmax'} <= set(self.control_panel.controls):
+            self.control_panel.link_range('rmin', 'rmax')
+        
+        self.schedule_run()
     
     def run_current(self):
-        """Executa o algoritmo atual"""
+        """Executa o algoritmo atual numa thread de fundo (a última requisição vence)"""
+        self._debounce.stop()
+        algo = self.algo_combo.currentText()
+        params = self.control_panel.values()
+        self.cancel_current()
+        self._job_id += 1
+        data = self.cache.get(algo, params)
+        if data is not None:
+            self.on_generated(self._job_id, algo, params, data)
+            return
+        worker = GenerationWorker(self._job_id, algo, params, self.workers_spin.value())
+        worker.progress_changed.connect(self.on_progress)
+        worker.succeeded.connect(self.on_generated)
+        worker.failed.connect(self.on_failed)
+        worker.finished.connect(lambda w=worker: self.on_worker_finished(w))
+        self._workers.append(worker)
+        self.progress_bar.setValue(0)
+        self.btn_cancel.setEnabled(True)
+        worker.start()
+    
+    def schedule_run(self):
+        """Reinicia o debounce: só executa quando os controles param de mudar"""
+        if self.auto_check.isChecked():
+            self._debounce.start()
+    
+    def on_disk_cache_toggled(self, checked):
+        self.cache.spill_dir = RESULT_CACHE_DIR if checked else None
+    
+    def cancel_current(self):
+        """Pede cancelamento cooperativo de todas as execuções em andamento"""
+        for worker in self._workers:
+            worker.cancel()
+        self.btn_cancel.setEnabled(bool(self._exports))
+    
+    def cancel_all(self):
+        """Botão Cancelar: execuções e exportações em andamento"""
+        for worker in self._exports:
+            worker.cancel()
+        self.cancel_current()
+    
+    def on_progress(self, job_id, percent):
+        if job_id == self._job_id:
+            self.progress_bar.setValue(percent)
+    
+    def on_generated(self, job_id, algo, params, data):
+        """Desenha o resultado (na thread da interface) se ainda for o pedido mais recente"""
+        self.cache.put(algo, params, data)
+        if job_id != self._job_id:
+            return
         try:
-            algo = self.algo_combo.currentText()
-            p = self.control_panel
+            # mantém a câmera do usuário ao redesenhar o mesmo algoritmo 3D
+            view = None
+            if self._shown and self._shown[0] == algo and self.fig.axes:
+                old = self.fig.axes[0]
+                if old.name == '3d':
+                    view = (old.elev, old.azim)
             self.fig.clf()
-            
-            if algo == "2D - Perlin Noise":
-                img = perlin_noise_2d_map(
-                    width=p.get_value('width'),
-                    height=p.get_value('height'),
-                    scale=p.get_value('scale'),
-                    octaves=p.get_value('octaves'),
-                    seed=p.get_value('seed')
-                )
-                ax = self.fig.add_subplot(111)
-                ax.imshow(img, origin='upper', cmap='viridis')
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-                ax.axis('off')
-            
-            elif algo == "2D - Worley F1":
-                img = worley_noise_2d(
-                    width=p.get_value('width'),
-                    height=p.get_value('height'),
-                    num_points=p.get_value('points'),
-                    seed=p.get_value('seed'),
-                    mode=1
-                )
-                ax = self.fig.add_subplot(111)
-                ax.imshow(img, origin='upper', cmap='viridis')
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-                ax.axis('off')
-            
-            elif algo == "2D - Worley F2":
-                img = worley_noise_2d(
-                    width=p.get_value('width'),
-                    height=p.get_value('height'),
-                    num_points=p.get_value('points'),
-                    seed=p.get_value('seed'),
-                    mode=2
-                )
-                ax = self.fig.add_subplot(111)
-                ax.imshow(img, origin='upper', cmap='viridis')
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-                ax.axis('off')
-            
-            elif algo == "2D - Voronoi":
-                img = voronoi_distance_map(
-                    width=p.get_value('width'),
-                    height=p.get_value('height'),
-                    num_points=p.get_value('points'),
-                    seed=p.get_value('seed')
-                )
-                ax = self.fig.add_subplot(111)
-                ax.imshow(img, origin='upper', cmap='viridis')
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-                ax.axis('off')
-            
-            elif algo == "2D - Maze (Recursive Backtracker)":
-                grid = maze_recursive_backtracker(
-                    w=p.get_value('maze_w'),
-                    h=p.get_value('maze_h'),
-                    seed=p.get_value('seed')
-                )
-                ax = self.fig.add_subplot(111)
-                ax.imshow(grid, cmap='binary', origin='upper')
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-                ax.axis('off')
-            
-            elif algo == "2D - DLA":
-                img = dla(
-                    grid_size=p.get_value('grid_size'),
-                    num_particles=p.get_value('particles'),
-                    seed=p.get_value('seed')
-                )
-                ax = self.fig.add_subplot(111)
-                ax.imshow(img, origin='upper', cmap='hot')
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-                ax.axis('off')
-            
-            elif algo == "2D - K-Means":
-                pts, labels, cent = k_means_demo(
-                    n_points=p.get_value('points'),
-                    k=p.get_value('k'),
-                    seed=p.get_value('seed')
-                )
-                ax = self.fig.add_subplot(111)
-                ax.scatter(pts[:,0], pts[:,1], c=labels, s=8, cmap='tab10', alpha=0.6)
-                ax.scatter(cent[:,0], cent[:,1], s=200, marker='X', c='red', 
-                          linewidths=2, edgecolors='black', zorder=10)
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-                ax.set_aspect('equal', 'box')
-            
-            elif algo == "2D - Quadtree":
-                W = p.get_value('width')
-                H = p.get_value('height')
-                rect = Rect(0, 0, W, H)
-                qt = Quadtree(rect, cap=p.get_value('capacity'), 
-                             max_depth=p.get_value('max_depth'))
-                rng = np.random.RandomState(p.get_value('seed'))
-                pts = (rng.rand(p.get_value('points'), 2) * np.array([W, H])).tolist()
-                for pt in pts:
-                    qt.insert(pt)
-                rects = []
-                qt.collect_rects(rects)
-                ax = self.fig.add_subplot(111)
-                for r in rects:
-                    xs = [r.x, r.x+r.w, r.x+r.w, r.x, r.x]
-                    ys = [r.y, r.y, r.y+r.h, r.y+r.h, r.y]
-                    ax.plot(xs, ys, 'b-', linewidth=0.8)
-                px = [pt[0] for pt in pts]
-                py = [pt[1] for pt in pts]
-                ax.scatter(px, py, s=6, c='red', zorder=5)
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-                ax.set_xlim(0, W)
-                ax.set_ylim(0, H)
-                ax.set_aspect('equal', 'box')
-                ax.invert_yaxis()
-            
-            elif algo == "2D - Circle Packing":
-                circles = circle_packing(
-                    container_r=p.get_value('container_r'),
-                    n=p.get_value('circles'),
-                    rmin=p.get_value('rmin'),
-                    rmax=p.get_value('rmax'),
-                    seed=p.get_value('seed')
-                )
-                ax = self.fig.add_subplot(111)
-                ax.set_aspect('equal', 'box')
-                R = p.get_value('container_r')
-                ax.set_xlim(-R-10, R+10)
-                ax.set_ylim(-R-10, R+10)
-                # Container circle
-                container = plt.Circle((0, 0), R, fill=False, edgecolor='black', linewidth=2)
-                ax.add_patch(container)
-                # Packed circles
-                for (cx, cy, cr) in circles:
-                    c = plt.Circle((cx, cy), cr, fill=True, facecolor='lightblue', 
-                                  edgecolor='blue', linewidth=1)
-                    ax.add_patch(c)
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-                ax.axis('off')
-            
-            elif algo == "2D - Domain Warping":
-                img = domain_warping_map(
-                    width=p.get_value('width'),
-                    height=p.get_value('height'),
-                    base_scale=p.get_value('base_scale'),
-                    warp_scale=p.get_value('base_scale') * 0.6,
-                    warp_strength=p.get_value('warp_strength'),
-                    seed=p.get_value('seed')
-                )
-                ax = self.fig.add_subplot(111)
-                ax.imshow(img, origin='upper', cmap='viridis')
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-                ax.axis('off')
-            
-            elif algo == "3D - Esfera Parametrica":
-                ax = self.fig.add_subplot(111, projection='3d')
-                X, Y, Z = sphere_parametric(n=p.get_value('resolution'), radius=1.0)
-                ax.plot_surface(X, Y, Z, cmap='viridis', linewidth=0, antialiased=True)
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-            
-            elif algo == "3D - Terreno (Diamond-Square)":
-                hm = diamond_square(n=129, roughness=p.get_value('roughness'), 
-                                   seed=p.get_value('seed'))
-                ax = self.fig.add_subplot(111, projection='3d')
-                X, Y = np.meshgrid(np.arange(hm.shape[0]), np.arange(hm.shape[1]))
-                ax.plot_surface(X, Y, hm, cmap='terrain', linewidth=0, antialiased=True)
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-            
-            elif algo == "3D - Terreno (Fault Formation)":
-                hm = fault_formation(
-                    size=p.get_value('size'),
-                    iterations=p.get_value('iterations'),
-                    seed=p.get_value('seed')
-                )
-                ax = self.fig.add_subplot(111, projection='3d')
-                X, Y = np.meshgrid(np.arange(hm.shape[0]), np.arange(hm.shape[1]))
-                ax.plot_surface(X, Y, hm, cmap='terrain', linewidth=0, antialiased=True)
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-            
-            elif algo == "3D - Voxel (Esfera)":
-                n = p.get_value('grid_n')
-                r = min(p.get_value('radius'), n//2-1)
-                grid = voxel_grid_sphere(n=n, r=r)
-                ax = self.fig.add_subplot(111, projection='3d')
-                ax.voxels(grid, edgecolor='k', facecolors='cyan', alpha=0.7)
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-            
-            elif algo == "3D - Superficie Perlin (Heightmap)":
-                n = p.get_value('resolution')
-                hm = perlin_noise_2d_map(
-                    width=n,
-                    height=n,
-                    scale=p.get_value('scale'),
-                    octaves=p.get_value('octaves'),
-                    seed=p.get_value('seed')
-                )
-                ax = self.fig.add_subplot(111, projection='3d')
-                X, Y = np.meshgrid(np.arange(hm.shape[1]), np.arange(hm.shape[0]))
-                ax.plot_surface(X, Y, hm, cmap='viridis', linewidth=0, antialiased=True)
-                ax.set_title(algo, fontsize=14, fontweight='bold')
-            
+            draw_result(self.fig, algo, params, data)
+            if view and self.fig.axes and self.fig.axes[0].name == '3d':
+                self.fig.axes[0].view_init(*view)
+            self._shown = (algo, params, data)
             self.canvas.draw()
-            
+            self.progress_bar.setValue(100)
         except Exception as e:
-            print(f"Erro ao executar algoritmo: {e}")
+            print(f"Erro ao desenhar algoritmo: {e}")
             import traceback
             traceback.print_exc()
     
+    def on_failed(self, job_id, message):
+        if job_id == self._job_id:
+            print(f"Erro ao executar algoritmo: {message}")
+    
+    def on_worker_finished(self, worker):
+        if worker in self._workers:
+            self._workers.remove(worker)
+        worker.deleteLater()
+        if not self._exports and not any(w.job_id == self._job_id for w in self._workers):
+            self.btn_cancel.setEnabled(False)
+    
+    def start_export(self, fn, path, label):
+        """Roda fn(path, progress) num ExportWorker, com a barra de progresso e o botão Cancelar"""
+        worker = ExportWorker(fn, path)
+        worker.progress_changed.connect(self.progress_bar.setValue)
+        worker.succeeded.connect(lambda p: self.progress_bar.setValue(100))
+        worker.succeeded.connect(lambda p: self.show_status(f"✓ {label} salvo em: {p}"))
+        worker.failed.connect(lambda p, msg: self.show_status(f"✗ {label} ({p}): {msg}"))
+        worker.finished.connect(lambda w=worker: self.on_export_finished(w))
+        self._exports.append(worker)
+        self.progress_bar.setValue(0)
+        self.btn_cancel.setEnabled(True)
+        self.show_status(f"Exportando {label.lower()} em segundo plano: {path}")
+        worker.start()
+    
+    def on_export_finished(self, worker):
+        self._exports.remove(worker)
+        worker.deleteLater()
+        if not self._exports and not any(w.job_id == self._job_id for w in self._workers):
+            self.btn_cancel.setEnabled(False)
+    
+    def show_status(self, message):
+        print(message)
+        self.statusBar().showMessage(message)
+    
+    def closeEvent(self, event):
+        self.cancel_all()
+        for worker in list(self._workers) + self._exports:
+            worker.wait()
+        super().closeEvent(event)
+    
     def save_image(self):
         """Salva a imagem atual"""
         path, _ = QFileDialog.getSaveFileName(
@@ -1000,17 +3513,116 @@ class ProceduralExplorer(QMainWindow):
             "PNG (*.png);;JPG (*.jpg);;SVG (*.svg)"
         )
         if path:
+            if self._shown and self._shown[0] in SURFACE_ALGOS:
+                self.save_full_surface(path)
+                return
             try:
                 self.fig.savefig(path, bbox_inches='tight', dpi=300)
                 print(f"✓ Imagem salva em: {path}")
             except Exception as e:
                 print(f"✗ Erro ao salvar imagem: {e}")
 
+    def save_full_surface(self, path):
+        """Exporta a superfície 3D em segundo plano, com até FULL_SURFACE_TRIANGLES triângulos
+        (a tela mostra só a prévia; Procedural_batch.py --full-mesh não tem teto)"""
+        algo, params, data = self._shown
+        size = self.fig.get_size_inches()
+        old = self.fig.axes[0]
+        view = (old.elev, old.azim)
+        
+        def export(path, progress):
+            fig = Figure(figsize=size)
+            FigureCanvasAgg(fig)
+            draw_result(fig, algo, params, data, preview=False, full_budget=FULL_SURFACE_TRIANGLES)
+            fig.axes[0].view_init(*view)
+            fig.savefig(path, bbox_inches='tight', dpi=300)
+        
+        self.start_export(export, path, f"Superfície (até {FULL_SURFACE_TRIANGLES} triângulos)")
+
+    def tiled_params(self, algo):
+        """Mapeia o algoritmo atual para (tipo, parâmetros) de render_tiled, ou None"""
+        p = self.control_panel
+        if algo == "2D - Perlin Noise":
+            return "perlin", dict(scale=p.get_value('scale'), octaves=p.get_value('octaves'),
+                                  seed=p.get_value('seed'))
+        if algo in ("2D - Worley F1", "2D - Worley F2", "2D - Worley F2-F1"):
+            kind = {"2D - Worley F1": "worley_f1", "2D - Worley F2": "worley_f2",
+                    "2D - Worley F2-F1": "worley_f2f1"}[algo]
+            return kind, dict(num_points=p.get_value('points'), seed=p.get_value('seed'))
+        if algo == "2D - Voronoi":
+            return "voronoi", dict(num_points=p.get_value('points'), seed=p.get_value('seed'))
+        if algo == "2D - Domain Warping":
+            return "domain_warping", dict(base_scale=p.get_value('base_scale'),
+                                          warp_scale=p.get_value('base_scale') * 0.6,
+                                          warp_strength=p.get_value('warp_strength'),
+                                          seed=p.get_value('seed'),
+                                          levels=p.get_value('warp_levels'))
+        return None
+    
+    def export_maze(self):
+        """Exporta um labirinto grande como PNG, linha a linha no caso do Eller"""
+        p = self.control_panel
+        w, ok = QInputDialog.getInt(self, "Exportar labirinto", "Células X:", 2000, 2, 100000, 100)
+        if not ok:
+            return
+        h, ok = QInputDialog.getInt(self, "Exportar labirinto", "Células Y:", w, 2, 100000, 100)
+        if not ok:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar labirinto", "", "PNG (*.png)")
+        if not path:
+            return
+        seed, algorithm = p.get_value('seed'), p.get_value('maze_algo')
+        
+        def export(path, progress):
+            write_maze_png(path, w, h, seed=seed, algorithm=algorithm, progress=progress)
+        self.start_export(export, path, f"Labirinto {w}x{h}")
+    
+    def export_tiled(self):
+        """Exporta o ruído atual em tamanho de pôster, bloco a bloco"""
+        algo = self.algo_combo.currentText()
+        if algo == "2D - Maze (Recursive Backtracker)":
+            self.export_maze()
+            return
+        spec = self.tiled_params(algo)
+        if spec is None:
+            print(f"✗ Exportação em blocos indisponível para: {algo}")
+            return
+        width, ok = QInputDialog.getInt(self, "Exportar em blocos", "Largura (px):", 8000, 64, 100000, 500)
+        if not ok:
+            return
+        height, ok = QInputDialog.getInt(self, "Exportar em blocos", "Altura (px):", width, 64, 100000, 500)
+        if not ok:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Exportar em blocos", "",
+            "PNG (*.png);;NumPy memmap (*.npy)"
+        )
+        if not path:
+            return
+        kind, params = spec
+        cmap = 'viridis' if path.lower().endswith('.png') else None
+        # tileável: um ladrilho do tamanho do painel, calculado uma vez e repetido
+        period = None
+        if self.control_panel.get_value('periodic'):
+            period = (self.control_panel.get_value('width'), self.control_panel.get_value('height'))
+        workers = self.workers_spin.value()
+        
+        def export(path, progress):
+            render_tiled(kind, width, height, path, cmap=cmap, workers=workers, period=period,
+                         progress=progress, **params)
+        self.start_export(export, path, f"Mapa {width}x{height}")
+
 def main():
+    if not QT_OK:
+        sys.exit("PyQt5 não encontrado: instale PyQt5 para a interface, "
+                 "ou use Procedural_batch.py para gerar sem interface.")
+    matplotlib.use("Qt5Agg")
     app = QApplication(sys.argv)
     win = ProceduralExplorer()
     win.show()
-    sys.exit(app.exec_())
+    ret = app.exec_()
+    shutdown_pools()
+    sys.exit(ret)
 
 if __name__ == "__main__":
     main()